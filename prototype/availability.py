@@ -0,0 +1,306 @@
+from bisect import bisect_left
+from heapq import heapify, heappop, heappush
+from typing import Dict, Iterator, List, Tuple
+
+from model import Room
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only VectorIndex needs it
+    np = None
+
+# A free block is stored as a mutable entry [start, room_index, end, alive].
+# Entries are ordered by (start, room_index), which is the order the original
+# room-by-room scan preferred on ties, so the index picks the same block.
+START, ROOM, END, ALIVE = range(4)
+SLOT = 4  # VectorIndex entries also carry their position in the flat arrays
+
+INDEXES = ("heap", "vector")
+# both give the same schedule; the vector index is much faster on many or fragmented rooms
+DEFAULT_INDEX = "vector" if np is not None else "heap"
+
+
+class AvailabilityIndex:
+    """
+    Free room blocks keyed by capacity tier, each tier a min-heap on start time.
+
+    candidates() walks every tier that is big enough in global start order
+    without popping anything, so the scheduler can stop at the first block
+    that passes its conflict check. take() retires a block and pushes back
+    whatever is left of it, an O(log n) update per commit.
+    """
+
+    def __init__(self, rooms: List[Room]):
+        self.rooms = rooms
+        self.capacities: List[int] = sorted({room.capacity for room in rooms})
+        self.tiers: List[List[list]] = [[] for _ in self.capacities]
+        self.by_room: List[Dict[int, list]] = [{} for _ in rooms]
+        self.live = 0
+        self.stale = 0
+
+        for room_index, room in enumerate(rooms):
+            tier = self.tiers[bisect_left(self.capacities, room.capacity)]
+            for a, b in room.blocks():
+                entry = [a, room_index, b, True]
+                tier.append(entry)
+                self.by_room[room_index][id(entry)] = entry
+                self.live += 1
+        for tier in self.tiers:
+            heapify(tier)
+
+    def _tier_of(self, room_index: int) -> List[list]:
+        return self.tiers[bisect_left(self.capacities, self.rooms[room_index].capacity)]
+
+    def _push(self, room_index: int, start: int, end: int) -> None:
+        entry = [start, room_index, end, True]
+        heappush(self._tier_of(room_index), entry)
+        self.by_room[room_index][id(entry)] = entry
+        self.live += 1
+
+    def candidates(self, need: int, minutes: int, stats=None) -> Iterator[list]:
+        """
+        Yield live blocks with capacity >= need and length >= minutes, earliest start first.
+
+        The tiers are enumerated through a frontier heap over their implicit
+        trees, so only the blocks actually inspected are paid for. With an
+        instrument.Stats, live blocks skipped as too short are counted.
+        """
+        frontier: List[Tuple[list, int, int]] = []
+        for t in range(bisect_left(self.capacities, need), len(self.tiers)):
+            if self.tiers[t]:
+                frontier.append((self.tiers[t][0], t, 0))
+        heapify(frontier)
+
+        while frontier:
+            entry, t, i = heappop(frontier)
+            heap = self.tiers[t]
+            child = 2 * i + 1
+            if child < len(heap):
+                heappush(frontier, (heap[child], t, child))
+                if child + 1 < len(heap):
+                    heappush(frontier, (heap[child + 1], t, child + 1))
+
+            if entry[ALIVE]:
+                if entry[END] - entry[START] >= minutes:
+                    yield entry
+                elif stats is not None:
+                    stats.count("rejected_duration")
+
+    def take(self, entry: list, start: int, end: int) -> None:
+        """Remove [start, end) from the block held by entry, keeping any remainder free."""
+        a, room_index, b = entry[START], entry[ROOM], entry[END]
+        self._retire(entry)
+
+        if a < start:
+            self._push(room_index, a, start)
+        if end < b:
+            self._push(room_index, end, b)
+
+        if self.stale > max(self.live, len(self.tiers)):
+            self.compact()
+
+    def _retire(self, entry: list) -> None:
+        entry[ALIVE] = False
+        del self.by_room[entry[ROOM]][id(entry)]
+        self.live -= 1
+        self.stale += 1
+
+    def _window(self, room_index: int, start: int, end: int) -> Tuple[int, int]:
+        # the room availability window holding [start, end), or just [start, end) if none does
+        for a, b in self.rooms[room_index].blocks():
+            if a <= start and end <= b:
+                return a, b
+        return start, end
+
+    def add_free(self, room_index: int, start: int, end: int) -> None:
+        """
+        Give [start, end) back to the room, merged with the free blocks it touches.
+
+        Only blocks inside the same availability window are merged; two windows
+        that happen to touch are still two stretches, never one free block.
+        """
+        lo, hi = self._window(room_index, start, end)
+        # free blocks of one window never touch each other, so only the neighbours on either side merge
+        left, right = start, end
+        for entry in list(self.by_room[room_index].values()):
+            if entry[START] <= end and start <= entry[END] and lo <= entry[START] and entry[END] <= hi:
+                left = min(left, entry[START])
+                right = max(right, entry[END])
+                self._retire(entry)
+        self._push(room_index, max(left, lo), min(right, hi))
+
+    def remove_window(self, room_index: int, start: int, end: int) -> None:
+        """Withdraw [start, end) from whatever free blocks of the room overlap it."""
+        for entry in list(self.by_room[room_index].values()):
+            if entry[START] < end and start < entry[END]:
+                self.take(entry, max(start, entry[START]), min(end, entry[END]))
+
+    def clone(self) -> "AvailabilityIndex":
+        """Independent copy holding only the live blocks."""
+        other = AvailabilityIndex.__new__(AvailabilityIndex)
+        other.rooms = self.rooms
+        other.capacities = self.capacities
+        other.tiers = []
+        other.by_room = [{} for _ in self.rooms]
+        for heap in self.tiers:
+            live = [entry[:] for entry in heap if entry[ALIVE]]
+            heapify(live)
+            other.tiers.append(live)
+            for entry in live:
+                other.by_room[entry[ROOM]][id(entry)] = entry
+        other.live = self.live
+        other.stale = 0
+        return other
+
+    def compact(self) -> None:
+        """Drop retired entries from the heaps."""
+        for t, heap in enumerate(self.tiers):
+            live = [entry for entry in heap if entry[ALIVE]]
+            heapify(live)
+            self.tiers[t] = live
+        self.stale = 0
+
+    def block_containing(self, room_index: int, start: int, end: int):
+        """The live block of the room holding all of [start, end), or None."""
+        for entry in self.by_room[room_index].values():
+            if entry[START] <= start and end <= entry[END]:
+                return entry
+        return None
+
+    def live_below(self, need: int) -> int:
+        """Live blocks in rooms smaller than need, the ones candidates() never looks at."""
+        return sum(len(blocks) for room, blocks in zip(self.rooms, self.by_room) if room.capacity < need)
+
+    def free_blocks(self, room_index: int) -> List[Tuple[int, int]]:
+        return sorted((entry[START], entry[END]) for entry in self.by_room[room_index].values())
+
+
+class VectorIndex(AvailabilityIndex):
+    """
+    AvailabilityIndex over flat NumPy arrays, one slot per free block.
+
+    Requires numpy. candidates() finds every live block that is big and long
+    enough with two masks over the whole array and ranks the survivors by
+    (start, room) with argpartition/argsort, instead of walking the tier heaps
+    one entry at a time in Python. The order is the heap index's, so the
+    schedule is the same. Entries are [start, room, end, alive, slot] and go
+    through by_room like the heap index's, so every other method is shared.
+    With an instrument.Stats, all live blocks that are too short count as
+    rejected_duration, not only the ones looked at before the pick.
+    """
+
+    # candidates() sorts this many survivors first, enough for most courses, and the rest only if asked
+    HEAD = 16
+
+    def __init__(self, rooms: List[Room]):
+        if np is None:
+            raise RuntimeError("VectorIndex requires numpy")
+        self.rooms = rooms
+        self.capacities = sorted({room.capacity for room in rooms})
+        self.tiers = []
+        self.by_room = [{} for _ in rooms]
+        self.live = 0
+        self.stale = 0
+        blocks = sum(len(room.free_starts) for room in rooms)
+        self._allocate(max(16, 2 * blocks))
+        for room_index, room in enumerate(rooms):
+            for a, b in room.blocks():
+                self._push(room_index, a, b)
+
+    def _allocate(self, size: int) -> None:
+        self.used = 0
+        self.entries: List[list] = []
+        self.starts = np.zeros(size, dtype=np.int64)
+        self.ends = np.zeros(size, dtype=np.int64)
+        self.caps = np.zeros(size, dtype=np.int64)
+        # start * rooms + room, one int64 sort key for the (start, room) order
+        self.keys = np.zeros(size, dtype=np.int64)
+        self.alive = np.zeros(size, dtype=bool)
+
+    def _grow(self) -> None:
+        size = 2 * len(self.starts)
+        for name in ("starts", "ends", "caps", "keys", "alive"):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _push(self, room_index: int, start: int, end: int) -> None:
+        if self.used == len(self.starts):
+            self._grow()
+        slot = self.used
+        self.used += 1
+        entry = [start, room_index, end, True, slot]
+        self.entries.append(entry)
+        self.starts[slot] = start
+        self.ends[slot] = end
+        self.caps[slot] = self.rooms[room_index].capacity
+        self.keys[slot] = start * len(self.rooms) + room_index
+        self.alive[slot] = True
+        self.by_room[room_index][id(entry)] = entry
+        self.live += 1
+
+    def _retire(self, entry: list) -> None:
+        self.alive[entry[SLOT]] = False
+        super()._retire(entry)
+
+    def candidates(self, need: int, minutes: int, stats=None) -> Iterator[list]:
+        n = self.used
+        usable = self.alive[:n] & (self.caps[:n] >= need)
+        fits = usable & (self.ends[:n] - self.starts[:n] >= minutes)
+        if stats is not None:
+            stats.count("rejected_duration", int(np.count_nonzero(usable)) - int(np.count_nonzero(fits)))
+        slots = np.flatnonzero(fits)
+        keys = self.keys[slots]
+        entries = self.entries
+
+        if len(slots) > self.HEAD:
+            part = np.argpartition(keys, self.HEAD)
+            head, rest = part[:self.HEAD], part[self.HEAD:]
+            batches = (head[np.argsort(keys[head])], rest)
+        else:
+            batches = (np.argsort(keys),)
+        for i, batch in enumerate(batches):
+            if i:
+                batch = batch[np.argsort(keys[batch])]
+            for slot in slots[batch].tolist():
+                entry = entries[slot]
+                if entry[ALIVE]:
+                    yield entry
+
+    def compact(self) -> None:
+        """Drop retired slots from the arrays."""
+        live = [entry for entry in self.entries if entry[ALIVE]]
+        slots = np.fromiter((entry[SLOT] for entry in live), dtype=np.intp, count=len(live))
+        for name in ("starts", "ends", "caps", "keys", "alive"):
+            column = getattr(self, name)
+            column[:len(live)] = column[slots]
+            column[len(live):self.used] = 0
+        for slot, entry in enumerate(live):
+            entry[SLOT] = slot
+        self.entries = live
+        self.used = len(live)
+        self.stale = 0
+
+    def clone(self) -> "VectorIndex":
+        """Independent copy holding only the live blocks."""
+        other = VectorIndex.__new__(VectorIndex)
+        other.rooms = self.rooms
+        other.capacities = self.capacities
+        other.tiers = []
+        other.by_room = [{} for _ in self.rooms]
+        other.live = 0
+        other.stale = 0
+        other._allocate(max(16, 2 * self.live))
+        for entry in sorted(entry for entry in self.entries if entry[ALIVE]):
+            other._push(entry[ROOM], entry[START], entry[END])
+        return other
+
+
+def make_index(kind: str, rooms: List[Room]) -> AvailabilityIndex:
+    """An empty-schedule index of the given kind (see INDEXES) over rooms."""
+    if kind == "heap":
+        return AvailabilityIndex(rooms)
+    if kind == "vector":
+        return VectorIndex(rooms)
+    raise ValueError(f"Unknown index: {kind!r} (expected one of {', '.join(INDEXES)})")
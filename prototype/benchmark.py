@@ -0,0 +1,134 @@
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+
+from availability import DEFAULT_INDEX, INDEXES
+from calendars import DEFAULT_ENGINE
+from generate import DatasetSpec, generate
+from state import ScheduleState
+
+import main
+import output
+
+# Headless benchmark over generated terms. Every size is timed phase by phase:
+# load (TTL parse), model (enrollment, rooms and courses), schedule (building
+# the state's conflict graph, calendars and free block index, then the greedy
+# pass) and write (exam_schedule.json), each the best of `repeat` runs. Results
+# are stored as JSON so two runs can be compared with --compare.
+
+SIZES: Dict[str, int] = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+PHASES = ("load", "model", "schedule", "write")
+
+
+@dataclass
+class SizeResult:
+    size: str
+    spec: dict
+    rooms: int
+    courses: int
+    enrollments: int
+    scheduled: int
+    unscheduled: int
+    # phase -> best seconds over the repeats
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+
+def bench_size(name: str, spec: DatasetSpec, work: Path, engine: str = DEFAULT_ENGINE,
+               repeat: int = 1, index: str = DEFAULT_INDEX) -> SizeResult:
+    directory = work / name
+    if not (directory / "spec.json").exists() or json.loads((directory / "spec.json").read_text()) != asdict(spec):
+        generate(spec, directory)
+    paths = [str(directory / "students.ttl"), str(directory / "classes.ttl"), str(directory / "rooms.ttl")]
+
+    best: Dict[str, float] = {}
+
+    def timed(phase, fn, *args):
+        t = perf_counter()
+        value = fn(*args)
+        elapsed = perf_counter() - t
+        best[phase] = min(best.get(phase, elapsed), elapsed)
+        return value
+
+    for _ in range(repeat):
+        graphs = timed("load", main.load_sources, *paths)
+        model = timed("model", main.model_from_graphs, *graphs)
+        del graphs
+        schedule = timed("schedule", lambda: main.schedule_greedy(model, ScheduleState.initial(model, engine, index=index)))
+        timed("write", output.write_json, directory / "exam_schedule.json", schedule, model.enrollment)
+
+    scheduled = sum(1 for item in schedule if item["room"] is not None)
+    return SizeResult(
+        size=name,
+        spec=asdict(spec),
+        rooms=len(model.rooms),
+        courses=len(model.courses),
+        enrollments=len(model.enrollment.indices),
+        scheduled=scheduled,
+        unscheduled=len(schedule) - scheduled,
+        seconds=best,
+    )
+
+
+def run_benchmark(sizes: Sequence[str] = ("1k", "10k", "100k"), engine: str = DEFAULT_ENGINE, repeat: int = 1,
+                  work: Optional[Path] = None, seed: int = 0, index: str = DEFAULT_INDEX) -> dict:
+    """Benchmark every named size and return the report that --out stores."""
+    work = Path(work) if work is not None else Path(tempfile.gettempdir()) / "ggs-bench"
+    results: List[SizeResult] = []
+    for name in sizes:
+        result = bench_size(name, DatasetSpec.scaled(SIZES[name], seed), work, engine, repeat, index)
+        results.append(result)
+        phases = "  ".join(f"{phase}={result.seconds[phase]:.3f}s" for phase in PHASES)
+        print(f"{name:>5} | {phases} | scheduled={result.scheduled} unscheduled={result.unscheduled}")
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "engine": engine,
+        "index": index,
+        "repeat": repeat,
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print each phase of current as a ratio of the same size and phase in baseline."""
+    before = {result["size"]: result["seconds"] for result in baseline["results"]}
+    for result in current["results"]:
+        old = before.get(result["size"])
+        if old is None:
+            continue
+        ratios = "  ".join(
+            f"{phase}={result['seconds'][phase] / old[phase]:.2f}x" for phase in PHASES if old.get(phase)
+        )
+        print(f"{result['size']:>5} vs baseline | {ratios}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time load, model, schedule and write on generated terms")
+    parser.add_argument("--sizes", default="1k,10k,100k", help=f"comma separated, from {', '.join(SIZES)}")
+    parser.add_argument("--engine", default=DEFAULT_ENGINE)
+    parser.add_argument("--index", default=DEFAULT_INDEX, choices=INDEXES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--work", help="where generated terms are kept between runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the report as JSON here")
+    parser.add_argument("--compare", help="a previous report to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes.split(","), args.engine, args.repeat, args.work, args.seed, args.index)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
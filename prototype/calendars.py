@@ -0,0 +1,482 @@
+from array import array
+from math import gcd
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from conflicts import ConflictGraph, build_conflict_graph
+
+import bisect
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the int bitset engine needs nothing extra
+    np = None
+
+
+# A calendar answers "can these students sit an exam in [start, end)" for the
+# scheduler. schedule_greedy calls prepare() once per course, then fits() for
+# every candidate and commit() for the chosen one, so an engine can do its
+# per-course work (merging student rows, looking up neighbours) up front.
+# clone() returns an independent calendar with the same commitments, used to
+# branch a ScheduleState without rebuilding it. release() undoes a commit() of
+# the same window for the prepared course, and adjust_conflicts() tells the
+# calendar a student joined (+1) or left (-1) a class next to other classes.
+# earliest(lo, hi, minutes) is the first start s in [lo, hi - minutes] with
+# fits(s, s + minutes), or None, found in one sweep instead of a fits() per start.
+
+
+def can_place_for_students(student_intervals, students, start, end):
+
+    #student_intervals: dict[student_iri] -> (starts, ends) arrays in epoch minutes, sorted
+    #bisect each student's calendar for the neighbours of [start, end)
+
+    for stu in students:
+        intervals = student_intervals.get(stu)
+        if intervals is None:
+            continue
+        starts, ends = intervals
+
+        i = bisect.bisect_right(starts, start)
+
+        if i > 0 and ends[i - 1] > start:
+            return False
+        if i < len(starts) and end > starts[i]:
+            return False
+
+    return True
+
+def commit_students(student_intervals, students, start, end):
+    # insert in order, exams are not committed chronologically so appending breaks bisect
+    for stu in students:
+        intervals = student_intervals.get(stu)
+        if intervals is None:
+            intervals = student_intervals[stu] = (array("q"), array("q"))
+        starts, ends = intervals
+        i = bisect.bisect_right(starts, start)
+        starts.insert(i, start)
+        ends.insert(i, end)
+
+
+def first_gap(starts: Sequence[int], ends: Sequence[int], lo: int, hi: int, minutes: int, i: int = 0) -> Optional[int]:
+    # busy intervals sorted by start from index i on, possibly overlapping; earliest free
+    # [s, s + minutes) inside [lo, hi)
+    cursor = lo
+    for k in range(i, len(starts)):
+        if cursor + minutes > hi:
+            return None
+        if starts[k] >= cursor + minutes:
+            return cursor
+        if ends[k] > cursor:
+            cursor = ends[k]
+    return cursor if cursor + minutes <= hi else None
+
+def first_free_run(busy: int, lo: int, hi: int, n: int) -> Optional[int]:
+    # lowest bit p in [lo, hi - n] with bits p .. p + n - 1 of busy all clear
+    if n <= 0:
+        return lo if lo <= hi else None
+    if hi - lo < n:
+        return None
+    run = ~busy & (((1 << (hi - lo)) - 1) << lo)
+    have = 1
+    while have < n and run:
+        # bit p survives while p .. p + 2 * have - 1 are free, so log2(n) steps
+        step = min(have, n - have)
+        run &= run >> step
+        have += step
+    if not run:
+        return None
+    return (run & -run).bit_length() - 1
+
+
+class StudentCalendar:
+    """Per-student sorted interval lists, checked by bisection."""
+
+    def __init__(self):
+        self.student_intervals: Dict[Hashable, Tuple[array, array]] = {}
+        self._students: Sequence[Hashable] = ()
+        # after a clone the interval arrays are shared until a student is committed to again
+        self._shared = False
+        self._owned: Set[Hashable] = set()
+
+    def prepare(self, cls_key: str, students: Sequence[Hashable]) -> None:
+        self._students = students
+
+    def fits(self, start: int, end: int) -> bool:
+        return can_place_for_students(self.student_intervals, self._students, start, end)
+
+    def earliest(self, lo: int, hi: int, minutes: int) -> Optional[int]:
+        busy = []
+        for stu in self._students:
+            intervals = self.student_intervals.get(stu)
+            if intervals is None:
+                continue
+            starts, ends = intervals
+            # a student's exams never overlap, so ends are sorted too
+            i = bisect.bisect_right(ends, lo)
+            while i < len(starts) and starts[i] < hi:
+                busy.append((starts[i], ends[i]))
+                i += 1
+        busy.sort()
+        return first_gap([a for a, _ in busy], [b for _, b in busy], lo, hi, minutes)
+
+    def _own(self) -> None:
+        if not self._shared:
+            return
+        intervals, owned = self.student_intervals, self._owned
+        for stu in self._students:
+            if stu not in owned:
+                pair = intervals.get(stu)
+                if pair is not None:
+                    intervals[stu] = (array("q", pair[0]), array("q", pair[1]))
+                owned.add(stu)
+
+    def commit(self, start: int, end: int) -> None:
+        self._own()
+        commit_students(self.student_intervals, self._students, start, end)
+
+    def release(self, start: int, end: int) -> None:
+        self._own()
+        for stu in self._students:
+            intervals = self.student_intervals.get(stu)
+            if intervals is None:
+                continue
+            starts, ends = intervals
+            i = bisect.bisect_left(starts, start)
+            while i < len(starts) and starts[i] == start:
+                if ends[i] == end:
+                    del starts[i]
+                    del ends[i]
+                    break
+                i += 1
+
+    def adjust_conflicts(self, cls_key: str, others: Iterable[str], delta: int) -> None:
+        pass
+
+    def clone(self) -> "StudentCalendar":
+        other = StudentCalendar()
+        other.student_intervals = dict(self.student_intervals)
+        other._shared = self._shared = True
+        self._owned = set()
+        return other
+
+
+class TimeGrid:
+    """
+    Fixed grid of ticks over the exam period.
+
+    Times that do not land on a tick are rounded outwards (start down, end up),
+    so a grid check can only ever be more conservative than the exact one.
+    """
+
+    def __init__(self, origin: int, tick: int):
+        self.origin = origin
+        self.tick = tick
+
+    def span(self, start: int, end: int) -> Tuple[int, int]:
+        lo = (start - self.origin) // self.tick
+        hi = -((self.origin - end) // self.tick)
+        return max(lo, 0), hi
+
+    def mask(self, start: int, end: int) -> int:
+        lo, hi = self.span(start, end)
+        return ((1 << (hi - lo)) - 1) << lo
+
+    def inner(self, start: int, end: int) -> Tuple[int, int]:
+        # ticks wholly inside [start, end), the opposite rounding to span()
+        return -((self.origin - start) // self.tick), (end - self.origin) // self.tick
+
+    def time(self, tick: int) -> int:
+        return self.origin + tick * self.tick
+
+    @classmethod
+    def covering(cls, rooms, courses, tick: Optional[int] = None) -> "TimeGrid":
+        """
+        Build a grid over the rooms' availability. Without an explicit tick the
+        gcd of every block boundary and exam length is used, which is exact.
+        """
+        origin = min((room.free_starts[0] for room in rooms if len(room.free_starts)), default=0)
+        if tick is None:
+            tick = 0
+            for room in rooms:
+                for a, b in room.blocks():
+                    tick = gcd(tick, a - origin, b - origin)
+            for course in courses:
+                tick = gcd(tick, course.exam_minutes)
+        return cls(origin, tick or 1)
+
+
+class BitsetCalendar:
+    """
+    Student calendars as occupancy bitsets on a TimeGrid, one Python int per student.
+
+    prepare() ORs the course's student rows together once, after which every
+    candidate is a single AND against the window mask.
+    """
+
+    def __init__(self, grid: TimeGrid):
+        self.grid = grid
+        self.rows: Dict[Hashable, int] = {}
+        self._students: Sequence[Hashable] = ()
+        self._busy = 0
+
+    def prepare(self, cls_key: str, students: Sequence[Hashable]) -> None:
+        rows = self.rows
+        busy = 0
+        for stu in students:
+            busy |= rows.get(stu, 0)
+        self._students = students
+        self._busy = busy
+
+    def _cover(self, start: int) -> None:
+        # availability was added before the grid origin: move the origin back and shift every row
+        grid = self.grid
+        shift = -((start - grid.origin) // grid.tick)
+        self.grid = TimeGrid(grid.origin - shift * grid.tick, grid.tick)
+        self.rows = {stu: row << shift for stu, row in self.rows.items()}
+        self._busy <<= shift
+
+    def fits(self, start: int, end: int) -> bool:
+        if start < self.grid.origin:
+            self._cover(start)
+        return not self._busy & self.grid.mask(start, end)
+
+    def earliest(self, lo: int, hi: int, minutes: int) -> Optional[int]:
+        if lo < self.grid.origin:
+            self._cover(lo)
+        grid = self.grid
+        t0, t1 = grid.inner(lo, hi)
+        p = first_free_run(self._busy, t0, t1, -(-minutes // grid.tick))
+        return None if p is None else grid.time(p)
+
+    def commit(self, start: int, end: int) -> None:
+        if start < self.grid.origin:
+            self._cover(start)
+        window = self.grid.mask(start, end)
+        rows = self.rows
+        for stu in self._students:
+            rows[stu] = rows.get(stu, 0) | window
+        self._busy |= window
+
+    def release(self, start: int, end: int) -> None:
+        # a student's exams never share a tick (fits() would have refused), so clearing is exact
+        if start < self.grid.origin:
+            self._cover(start)
+        keep = ~self.grid.mask(start, end)
+        rows = self.rows
+        for stu in self._students:
+            if stu in rows:
+                rows[stu] &= keep
+        self._busy &= keep
+
+    def adjust_conflicts(self, cls_key: str, others: Iterable[str], delta: int) -> None:
+        pass
+
+    def clone(self) -> "BitsetCalendar":
+        other = BitsetCalendar(self.grid)
+        other.rows = dict(self.rows)  # ints are immutable, a shallow copy is a full one
+        return other
+
+
+class MatrixBitsetCalendar:
+    """
+    Student calendars as a packed uint64 matrix (students x grid words).
+
+    Requires numpy. prepare() is one OR-reduce over the course's rows and
+    commit() is one masked write into them.
+    """
+
+    def __init__(self, grid: TimeGrid, horizon: int, students: Iterable[Hashable]):
+        if np is None:
+            raise RuntimeError("MatrixBitsetCalendar requires numpy")
+        self.grid = grid
+        self.row_of: Dict[Hashable, int] = {stu: i for i, stu in enumerate(dict.fromkeys(students))}
+        _, ticks = grid.span(grid.origin, horizon)
+        self.words = max(1, -(-ticks // 64))
+        self.matrix = np.zeros((max(1, len(self.row_of)), self.words), dtype=np.uint64)
+        self._rows = np.empty(0, dtype=np.intp)
+        self._busy = np.zeros(self.words, dtype=np.uint64)
+
+    def _cover(self, start: int, end: int) -> None:
+        # grow the matrix by whole words when a window falls outside the grid
+        grid = self.grid
+        if start < grid.origin:
+            ticks = -((start - grid.origin) // grid.tick)
+            pad = -(-ticks // 64)
+            self.grid = grid = TimeGrid(grid.origin - 64 * pad * grid.tick, grid.tick)
+            self.matrix = np.hstack([np.zeros((len(self.matrix), pad), dtype=np.uint64), self.matrix])
+            self._busy = np.concatenate([np.zeros(pad, dtype=np.uint64), self._busy])
+            self.words += pad
+        _, hi = grid.span(start, end)
+        if hi > 64 * self.words:
+            pad = -(-hi // 64) - self.words
+            self.matrix = np.hstack([self.matrix, np.zeros((len(self.matrix), pad), dtype=np.uint64)])
+            self._busy = np.concatenate([self._busy, np.zeros(pad, dtype=np.uint64)])
+            self.words += pad
+
+    def _window(self, start: int, end: int):
+        self._cover(start, end)
+        lo, hi = self.grid.span(start, end)
+        w0, w1 = lo // 64, -(-hi // 64)
+        bits = ((1 << (hi - lo)) - 1) << (lo - w0 * 64)
+        words = np.array([(bits >> (64 * k)) & 0xFFFFFFFFFFFFFFFF for k in range(w1 - w0)], dtype=np.uint64)
+        return w0, w1, words
+
+    def _row(self, stu: Hashable) -> int:
+        row = self.row_of.get(stu)
+        if row is None:
+            # late enrollment of a student the matrix was not sized for
+            if len(self.row_of) == len(self.matrix):
+                self.matrix = np.vstack([self.matrix, np.zeros((max(16, len(self.matrix) // 4), self.words), dtype=np.uint64)])
+            row = self.row_of[stu] = len(self.row_of)
+        return row
+
+    def prepare(self, cls_key: str, students: Sequence[Hashable]) -> None:
+        self._rows = np.fromiter((self._row(stu) for stu in students), dtype=np.intp, count=len(students))
+        if len(self._rows):
+            self._busy = np.bitwise_or.reduce(self.matrix[self._rows], axis=0)
+        else:
+            self._busy = np.zeros(self.words, dtype=np.uint64)
+
+    def fits(self, start: int, end: int) -> bool:
+        w0, w1, words = self._window(start, end)
+        return not np.any(self._busy[w0:w1] & words)
+
+    def earliest(self, lo: int, hi: int, minutes: int) -> Optional[int]:
+        self._cover(lo, hi)
+        grid = self.grid
+        t0, t1 = grid.inner(lo, hi)
+        if t1 <= t0:
+            return None
+        # only the words under the block go through Python ints
+        w0, w1 = t0 // 64, -(-t1 // 64)
+        busy = int.from_bytes(self._busy[w0:w1].astype("<u8").tobytes(), "little")
+        p = first_free_run(busy, t0 - 64 * w0, t1 - 64 * w0, -(-minutes // grid.tick))
+        return None if p is None else grid.time(p + 64 * w0)
+
+    def commit(self, start: int, end: int) -> None:
+        w0, w1, words = self._window(start, end)
+        if len(self._rows):
+            self.matrix[self._rows, w0:w1] |= words
+        self._busy[w0:w1] |= words
+
+    def release(self, start: int, end: int) -> None:
+        w0, w1, words = self._window(start, end)
+        if len(self._rows):
+            self.matrix[self._rows, w0:w1] &= ~words
+        self._busy[w0:w1] &= ~words
+
+    def adjust_conflicts(self, cls_key: str, others: Iterable[str], delta: int) -> None:
+        pass
+
+    def clone(self) -> "MatrixBitsetCalendar":
+        other = MatrixBitsetCalendar.__new__(MatrixBitsetCalendar)
+        other.grid = self.grid
+        other.row_of = dict(self.row_of)
+        other.words = self.words
+        other.matrix = self.matrix.copy()
+        other._rows = np.empty(0, dtype=np.intp)
+        other._busy = np.zeros(self.words, dtype=np.uint64)
+        return other
+
+
+class ConflictGraphCalendar:
+    """
+    Class-level calendar over a precomputed conflict graph.
+
+    A class fits at [start, end) when none of its already placed neighbours
+    overlap it, so the work per candidate scales with conflicting classes
+    rather than enrolled students.
+    """
+
+    def __init__(self, graph: ConflictGraph):
+        self.graph = graph
+        self._own_graph = False  # the graph is shared with clones until adjust_conflicts() copies it
+        self.placed: Dict[str, List[Tuple[int, int]]] = {}
+        self._cls = ""
+        self._starts = array("q")
+        self._ends = array("q")
+
+    def prepare(self, cls_key: str, students: Sequence[Hashable]) -> None:
+        placed = self.placed
+        busy = sorted(
+            slot
+            for neighbour in self.graph.get(cls_key, ())
+            for slot in placed.get(neighbour, ())
+        )
+
+        # merge neighbour slots into disjoint sorted intervals so one bisect answers fits()
+        starts, ends = array("q"), array("q")
+        for a, b in busy:
+            if ends and a <= ends[-1]:
+                if b > ends[-1]:
+                    ends[-1] = b
+            else:
+                starts.append(a)
+                ends.append(b)
+
+        self._cls = cls_key
+        self._starts = starts
+        self._ends = ends
+
+    def fits(self, start: int, end: int) -> bool:
+        starts, ends = self._starts, self._ends
+        i = bisect.bisect_right(starts, start)
+        if i > 0 and ends[i - 1] > start:
+            return False
+        if i < len(starts) and end > starts[i]:
+            return False
+        return True
+
+    def earliest(self, lo: int, hi: int, minutes: int) -> Optional[int]:
+        # the merged intervals are disjoint, so ends are sorted and one bisect finds the sweep start
+        return first_gap(self._starts, self._ends, lo, hi, minutes, bisect.bisect_right(self._ends, lo))
+
+    def commit(self, start: int, end: int) -> None:
+        self.placed.setdefault(self._cls, []).append((start, end))
+
+    def release(self, start: int, end: int) -> None:
+        slots = self.placed.get(self._cls)
+        if slots and (start, end) in slots:
+            slots.remove((start, end))
+
+    def adjust_conflicts(self, cls_key: str, others: Iterable[str], delta: int) -> None:
+        if not self._own_graph:
+            self.graph = dict(self.graph)
+            self._own_graph = True
+        graph = self.graph
+        for other in others:
+            if other == cls_key:
+                continue
+            for a, b in ((cls_key, other), (other, cls_key)):
+                row = graph[a] = dict(graph.get(a, {}))
+                weight = row.get(b, 0) + delta
+                if weight > 0:
+                    row[b] = weight
+                else:
+                    row.pop(b, None)
+
+    def clone(self) -> "ConflictGraphCalendar":
+        other = ConflictGraphCalendar(self.graph)
+        other.placed = {cls: list(slots) for cls, slots in self.placed.items()}
+        self._own_graph = False
+        return other
+
+
+ENGINES = ("intervals", "bitset", "matrix", "graph")
+DEFAULT_ENGINE = "graph"
+
+
+def make_calendar(engine: str, rooms, courses, students_by_class, tick: Optional[int] = None,
+                  graph: Optional[ConflictGraph] = None):
+    # graph -> prebuilt conflict graph for the "graph" engine, built from students_by_class otherwise
+    if engine == "intervals":
+        return StudentCalendar()
+    if engine == "bitset":
+        return BitsetCalendar(TimeGrid.covering(rooms, courses, tick))
+    if engine == "matrix":
+        grid = TimeGrid.covering(rooms, courses, tick)
+        horizon = max((max(room.free_ends) for room in rooms if len(room.free_ends)), default=grid.origin)
+        students = (stu for members in students_by_class.values() for stu in members)
+        return MatrixBitsetCalendar(grid, horizon, students)
+    if engine == "graph":
+        return ConflictGraphCalendar(graph if graph is not None else build_conflict_graph(students_by_class))
+    raise ValueError(f"Unknown conflict engine: {engine!r} (expected one of {', '.join(ENGINES)})")
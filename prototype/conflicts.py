@@ -0,0 +1,59 @@
+from itertools import combinations
+from typing import Dict, Hashable, Iterable, List, Mapping, Sequence
+
+# Two classes conflict when they share at least one student; the edge weight is
+# the number of shared students. Enrollments are fixed for a scheduling run, so
+# the graph is built once and every student check becomes a neighbour check.
+
+ConflictGraph = Dict[str, Dict[str, int]]
+
+
+def build_conflict_graph(students_by_class: Mapping[str, Sequence[Hashable]]) -> ConflictGraph:
+    classes_by_student: Dict[Hashable, List[str]] = {}
+    for cls, students in students_by_class.items():
+        for stu in students:
+            classes_by_student.setdefault(stu, []).append(cls)
+
+    graph: ConflictGraph = {cls: {} for cls in students_by_class}
+    for classes in classes_by_student.values():
+        if len(classes) < 2:
+            continue
+        for a, b in combinations(dict.fromkeys(classes), 2):
+            graph[a][b] = graph[a].get(b, 0) + 1
+            graph[b][a] = graph[b].get(a, 0) + 1
+    return graph
+
+
+def conflict_degree(graph: ConflictGraph, cls: str) -> int:
+    return len(graph.get(cls, ()))
+
+
+def shared_students(graph: ConflictGraph, cls: str) -> int:
+    return sum(graph.get(cls, {}).values())
+
+
+def connected_components(graph: ConflictGraph, classes: Iterable[str]) -> List[List[str]]:
+    """
+    Groups of classes linked by shared students, each in the order of classes.
+
+    Classes in different components never share a student, so they only ever
+    compete for rooms. Classes missing from the graph are components of their own.
+    """
+    position = {cls: i for i, cls in enumerate(classes)}
+    seen = set()
+    components = []
+    for cls in position:
+        if cls in seen:
+            continue
+        seen.add(cls)
+        component, stack = [], [cls]
+        while stack:
+            current = stack.pop()
+            component.append(current)
+            for other in graph.get(current, ()):
+                if other not in seen and other in position:
+                    seen.add(other)
+                    stack.append(other)
+        component.sort(key=position.__getitem__)
+        components.append(component)
+    return components
@@ -0,0 +1,131 @@
+from bisect import bisect_left
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List
+
+from model import Course, TermModel
+
+# Why courses end up unscheduled. precheck() runs before the greedy pass and
+# finds the courses no schedule could place: more seats than any room has, or
+# an exam longer than every block in the rooms big enough. Those are skipped.
+# It also compares, per room size, the exam minutes the courses needing such
+# rooms ask for with the minutes those rooms offer; a shortfall means some of
+# them must fail, though not which. Every course the greedy pass still cannot
+# place gets a Failure from its rejection counts in schedule_greedy's
+# candidate loop: either no big and long enough block was left at its turn,
+# or every one that was clashed with its students' other exams.
+
+REASONS = ("no_room_big_enough", "no_block_long_enough", "rooms_used_up", "student_conflicts")
+
+
+@dataclass
+class Failure:
+    class_iri: str
+    reason: str  # one of REASONS
+    need: int
+    minutes: int
+    message: str
+    # schedule_greedy's rejection counts for the course, empty when the precheck ruled it out
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Shortfall:
+    seats: int  # rooms with at least this many seats
+    courses: int  # courses that need such a room
+    demand: int  # their exam minutes
+    supply: int  # the free minutes of those rooms
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Precheck:
+    infeasible: Dict[str, Failure]
+    shortfalls: List[Shortfall]
+
+    def feasible(self, courses: Iterable[Course]) -> List[Course]:
+        """courses without the infeasible ones, in the same order."""
+        return [course for course in courses if str(course.uri) not in self.infeasible]
+
+
+def precheck(model: TermModel) -> Precheck:
+    """Courses that cannot be placed at all, and room sizes with more demand than supply."""
+    capacities = sorted({room.capacity for room in model.rooms})
+    longest = [0] * len(capacities)
+    supply = [0] * len(capacities)
+    for room in model.rooms:
+        tier = bisect_left(capacities, room.capacity)
+        for a, b in room.blocks():
+            longest[tier] = max(longest[tier], b - a)
+            supply[tier] += b - a
+    # rooms of a tier or bigger: the longest block and the total minutes among them
+    for tier in range(len(capacities) - 2, -1, -1):
+        longest[tier] = max(longest[tier], longest[tier + 1])
+        supply[tier] += supply[tier + 1]
+
+    infeasible: Dict[str, Failure] = {}
+    demand = [0] * len(capacities)
+    courses = [0] * len(capacities)
+    for course in model.courses:
+        cls_key, need, minutes = str(course.uri), course.need, course.exam_minutes
+        tier = bisect_left(capacities, need)
+        if tier == len(capacities):
+            biggest = capacities[-1] if capacities else 0
+            infeasible[cls_key] = Failure(cls_key, "no_room_big_enough", need, minutes,
+                                          f"needs {need} seats, the biggest room has {biggest}")
+        elif minutes > longest[tier]:
+            infeasible[cls_key] = Failure(cls_key, "no_block_long_enough", need, minutes,
+                                          f"needs {minutes} minutes, the longest block in a room with "
+                                          f"{need}+ seats is {longest[tier]}")
+        else:
+            demand[tier] += minutes
+            courses[tier] += 1
+
+    shortfalls = []
+    wanted = count = 0
+    for tier in range(len(capacities) - 1, -1, -1):
+        # everything needing this tier or a bigger one has to fit in these rooms
+        wanted += demand[tier]
+        count += courses[tier]
+        if wanted > supply[tier]:
+            shortfalls.append(Shortfall(capacities[tier], count, wanted, supply[tier]))
+    shortfalls.reverse()
+    return Precheck(infeasible, shortfalls)
+
+
+def failure(course: Course, counts: Dict[str, int]) -> Failure:
+    """Why schedule_greedy could not place course, from the counts it recorded for it."""
+    cls_key, need, minutes = str(course.uri), course.need, course.exam_minutes
+    too_small = counts.get("rejected_capacity", 0)
+    too_short = counts.get("rejected_duration", 0)
+    clashed = counts.get("rejected_student_conflict", 0)
+    if counts.get("candidates_evaluated", 0) == 0:
+        return Failure(cls_key, "rooms_used_up", need, minutes,
+                       f"no free block with {need}+ seats and {minutes}+ minutes was left "
+                       f"({too_small} free blocks too small, {too_short} too short)", counts)
+    return Failure(cls_key, "student_conflicts", need, minutes,
+                   f"all {clashed} free blocks big and long enough clashed with its students' other exams", counts)
+
+
+def explain(model: TermModel, checked: Precheck, failures: Dict[str, Dict[str, int]]) -> List[Failure]:
+    """A Failure for every course the precheck ruled out or schedule_greedy recorded, in model order."""
+    explained = []
+    for course in model.courses:
+        cls_key = str(course.uri)
+        if cls_key in checked.infeasible:
+            explained.append(checked.infeasible[cls_key])
+        elif cls_key in failures:
+            explained.append(failure(course, failures[cls_key]))
+    return explained
+
+
+def summary(failures: Iterable[Failure]) -> Dict[str, int]:
+    """How many failures there are per reason, in REASONS order, leaving out reasons with none."""
+    counts = {reason: 0 for reason in REASONS}
+    for item in failures:
+        counts[item.reason] += 1
+    return {reason: n for reason, n in counts.items() if n}
@@ -0,0 +1,117 @@
+from bisect import bisect_left, bisect_right
+from heapq import heappop, heappush
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from conflicts import ConflictGraph, build_conflict_graph, conflict_degree
+from main import schedule_greedy
+from model import Course, TermModel
+from state import ScheduleState
+
+# DSatur-style dynamic ordering. Instead of fixing the order up front, the
+# next course is always the one with the fewest feasible slots left, ties
+# going to the higher conflict degree, then the bigger course, then model
+# order. A course's slots are the distinct start times of free blocks big and
+# long enough for it. A slot is lost once a placed neighbour (a class sharing
+# students) overlaps the exam it would hold. Placing a course only touches its
+# neighbours: their lost slots are found by bisecting their sorted starts, and
+# their new key is pushed onto a heap with lazy deletion, so the whole run is
+# about O((V + E) log V) on top of the greedy placements themselves.
+#
+# Room time used up by other courses is not tracked in the key, so it is a
+# heuristic; placement itself is schedule_greedy's, one course at a time.
+
+
+def slot_starts(model: TermModel, courses: Optional[Sequence[Course]] = None) -> List[List[int]]:
+    """Per course of courses (model.courses by default), the sorted distinct starts of the room blocks it could use."""
+    capacities = sorted({room.capacity for room in model.rooms})
+    blocks = [(room.capacity, a, b) for room in model.rooms for a, b in room.blocks()]
+    shared: Dict[Tuple[int, int], List[int]] = {}
+    starts = []
+    for course in (model.courses if courses is None else courses):
+        # the same rooms serve every need up to the next capacity, so share the list per (tier, length)
+        tier = bisect_left(capacities, course.need)
+        key = (tier, course.exam_minutes)
+        if key not in shared:
+            floor = capacities[tier] if tier < len(capacities) else course.need
+            shared[key] = sorted({a for cap, a, b in blocks if cap >= floor and b - a >= course.exam_minutes})
+        starts.append(shared[key])
+    return starts
+
+
+def schedule_dsatur(model: TermModel, state: Optional[ScheduleState] = None, graph: Optional[ConflictGraph] = None,
+                    stats=None, progress: Optional[Callable[[int, int], None]] = None,
+                    failures: Optional[Dict[str, Dict[str, int]]] = None,
+                    courses: Optional[Sequence[Course]] = None) -> List[dict]:
+    """
+    Schedule courses (model.courses by default), picking the most saturated one next.
+
+    Same arguments and item format as schedule_greedy; the items come in the
+    order the courses were picked, so the order of courses only breaks ties.
+    """
+    if graph is None:
+        graph = build_conflict_graph(model.enrollment)
+    if state is None:
+        state = ScheduleState.initial(model, graph=graph)
+    courses = model.courses if courses is None else list(courses)
+    position = {str(course.uri): i for i, course in enumerate(courses)}
+    starts = slot_starts(model, courses)
+    blocked = [bytearray(len(s)) for s in starts]
+    free = [len(s) for s in starts]
+    degree = [conflict_degree(graph, str(course.uri)) for course in courses]
+    done = [False] * len(courses)
+
+    def key(i):
+        return free[i], -degree[i], -courses[i].need, i
+
+    heap = [key(i) for i in range(len(courses))]
+    heap.sort()
+    schedule = []
+    step = max(1, len(courses) // 100)
+
+    while heap:
+        entry = heappop(heap)
+        i = entry[-1]
+        if done[i] or entry[0] != free[i]:
+            continue  # already placed, or pushed again since with fewer slots
+        done[i] = True
+        if progress is not None and len(schedule) % step == 0:
+            progress(len(schedule), len(courses))
+
+        course = courses[i]
+        cls_key = str(course.uri)
+        schedule.extend(schedule_greedy(model, state, [course], stats, failures=failures))
+        placed = state.placements.get(cls_key)
+        if placed is None:
+            continue
+
+        _, start, end = placed
+        for other in graph.get(cls_key, ()):
+            j = position.get(other)
+            if j is None or done[j]:
+                continue
+            # slots t of the neighbour whose exam [t, t + minutes) overlaps [start, end)
+            s, lost = starts[j], blocked[j]
+            lo = bisect_right(s, start - courses[j].exam_minutes)
+            hi = bisect_left(s, end)
+            newly = 0
+            for t in range(lo, hi):
+                if not lost[t]:
+                    lost[t] = 1
+                    newly += 1
+            if newly:
+                free[j] -= newly
+                heappush(heap, key(j))
+
+    if progress is not None:
+        progress(len(courses), len(courses))
+    return schedule
+
+
+def dsatur_order(model: TermModel, graph: ConflictGraph) -> List[Course]:
+    """
+    The order schedule_dsatur picks courses in on an empty state, as a static ordering.
+
+    schedule_greedy over this order gives the same schedule back.
+    """
+    by_key = {str(course.uri): course for course in model.courses}
+    return [by_key[item["class"]] for item in schedule_dsatur(model, graph=graph)]
@@ -0,0 +1,178 @@
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+
+def _csr(rows: array, cols: array, n_rows: int) -> Tuple[array, array]:
+    # counting sort of (row, col) pairs into row offsets + column ids, stable within a row
+    indptr = array("q", bytes(8 * (n_rows + 1)))
+    for r in rows:
+        indptr[r + 1] += 1
+    for i in range(n_rows):
+        indptr[i + 1] += indptr[i]
+
+    fill = array("q", indptr[:-1])
+    indices = array("q", bytes(8 * len(cols)))
+    for r, c in zip(rows, cols):
+        indices[fill[r]] = c
+        fill[r] += 1
+    return indptr, indices
+
+
+class Enrollment(Mapping):
+    """
+    Student x class enrollment with IRIs interned to dense integer ids.
+
+    Stored as compressed sparse rows: class i's students are
+    indices[indptr[i]:indptr[i + 1]], and the transpose gives each student's
+    classes. As a Mapping it reads like students_by_class, class IRI -> student
+    ids, so calendars and the conflict graph work on small ints instead of IRIs.
+
+    with_changes() layers add/drop edits over the CSR arrays as per-row
+    overrides instead of rebuilding them; compacted() folds them back in.
+    """
+
+    def __init__(self, students: List[str], classes: List[str], indptr: array, indices: array,
+                 overrides: Optional[Dict[int, array]] = None,
+                 student_overrides: Optional[Dict[int, array]] = None):
+        self.students = students
+        self.classes = classes
+        self.class_ids: Dict[str, int] = {cls: i for i, cls in enumerate(classes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.overrides: Dict[int, array] = overrides or {}
+        self.student_overrides: Dict[int, array] = student_overrides or {}
+        self._transpose = None
+        self._student_ids: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[Hashable, Hashable]]) -> "Enrollment":
+        """
+        Build from (student, class) pairs in one pass. Pairs are expected to be
+        unique, as they are when read off a graph.
+        """
+        student_ids: Dict[str, int] = {}
+        class_ids: Dict[str, int] = {}
+        rows, cols = array("q"), array("q")
+
+        for student, klass in pairs:
+            rows.append(class_ids.setdefault(str(klass), len(class_ids)))
+            cols.append(student_ids.setdefault(str(student), len(student_ids)))
+
+        indptr, indices = _csr(rows, cols, len(class_ids))
+        return cls(list(student_ids), list(class_ids), indptr, indices)
+
+    @classmethod
+    def from_lists(cls, students_by_class: Dict[str, List[str]]) -> "Enrollment":
+        return cls.from_pairs(
+            (stu, klass) for klass, members in students_by_class.items() for stu in dict.fromkeys(members)
+        )
+
+    def _row(self, i: int) -> array:
+        row = self.overrides.get(i)
+        if row is None:
+            row = self.indices[self.indptr[i]:self.indptr[i + 1]] if i + 1 < len(self.indptr) else array("q")
+        return row
+
+    def __getitem__(self, klass: str) -> array:
+        return self._row(self.class_ids[klass])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.classes)
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def count(self, klass: str) -> int:
+        i = self.class_ids.get(klass)
+        return 0 if i is None else len(self._row(i))
+
+    def counts(self) -> Dict[str, int]:
+        return {klass: len(self._row(i)) for i, klass in enumerate(self.classes)}
+
+    def student_iris(self, klass: str) -> List[str]:
+        # the same interned str objects every time, nothing is copied per group
+        students = self.students
+        return [students[s] for s in self.get(klass, ())]
+
+    @property
+    def transpose(self) -> Tuple[array, array]:
+        """(indptr, indices) of the student -> class rows of the base CSR, built on first use."""
+        if self._transpose is None:
+            rows = array("q")
+            for i in range(len(self.indptr) - 1):
+                rows.extend([i] * (self.indptr[i + 1] - self.indptr[i]))
+            self._transpose = _csr(self.indices, rows, len(self.students))
+        return self._transpose
+
+    def classes_of(self, student_id: int) -> array:
+        row = self.student_overrides.get(student_id)
+        if row is None:
+            indptr, indices = self.transpose
+            if student_id + 1 >= len(indptr):
+                return array("q")
+            row = indices[indptr[student_id]:indptr[student_id + 1]]
+        return row
+
+    def student_id(self, student: str) -> Optional[int]:
+        if self._student_ids is None:
+            self._student_ids = {stu: i for i, stu in enumerate(self.students)}
+        return self._student_ids.get(student)
+
+    def with_changes(self, added: Iterable[Tuple[str, str]] = (), dropped: Iterable[Tuple[str, str]] = ()) -> "Enrollment":
+        """
+        New Enrollment with (student IRI, class IRI) pairs added and dropped.
+
+        Only the touched class and student rows are copied; the CSR arrays and
+        the transpose are shared with self. Dropping a pair that is not
+        enrolled changes nothing, not even for an unknown student or class.
+        """
+        students, classes = self.students, self.classes
+        other = Enrollment.__new__(Enrollment)
+        other.students, other.classes, other.class_ids = students, classes, self.class_ids
+        other.indptr, other.indices = self.indptr, self.indices
+        other.overrides = dict(self.overrides)
+        other.student_overrides = dict(self.student_overrides)
+        other._transpose = self.transpose
+        other._student_ids = self._student_ids
+
+        def ids(student: str, klass: str) -> Tuple[int, int]:
+            if other.student_id(student) is None:
+                if other.students is students:
+                    other.students = list(students)
+                    other._student_ids = dict(other._student_ids)
+                other._student_ids[student] = len(other.students)
+                other.students.append(student)
+            if klass not in other.class_ids:
+                if other.classes is classes:
+                    other.classes = list(classes)
+                    other.class_ids = dict(self.class_ids)
+                other.class_ids[klass] = len(other.classes)
+                other.classes.append(klass)
+            return other.student_id(student), other.class_ids[klass]
+
+        for student, klass in added:
+            s, c = ids(student, klass)
+            row = other._row(c)
+            if s not in row:
+                other.overrides[c] = row + array("q", [s])
+                other.student_overrides[s] = other.classes_of(s) + array("q", [c])
+
+        for student, klass in dropped:
+            s, c = other.student_id(student), other.class_ids.get(klass)
+            if s is None or c is None:
+                continue  # never enrolled, nothing to intern
+            row = other._row(c)
+            if s in row:
+                other.overrides[c] = array("q", (x for x in row if x != s))
+                other.student_overrides[s] = array("q", (x for x in other.classes_of(s) if x != c))
+
+        return other
+
+    def compacted(self) -> "Enrollment":
+        """Plain CSR Enrollment with any overrides folded in."""
+        if not self.overrides:
+            return self
+        return Enrollment.from_pairs(
+            (self.students[s], klass) for i, klass in enumerate(self.classes) for s in self._row(i)
+        )
@@ -0,0 +1,180 @@
+from array import array
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+import argparse
+import json
+import random
+
+# Synthetic terms in the vocabulary of data/*.ttl, for benchmarks at sizes the
+# sample data does not reach. Students mostly enroll within one department,
+# which keeps the conflict graph clustered the way real terms are, and a
+# cross_enrollment share links the departments. Enrollments are drawn first so
+# room capacities and minimum capacities can be sized from the actual class
+# sizes; every file is streamed out line by line, so 1M students need no more
+# than the enrollment arrays in memory.
+
+TERM_START = datetime(2026, 5, 11, 8, 0)
+DAY_HOURS = 12
+EXAM_HOURS = (1.0, 1.5, 2.0, 2.5, 3.0)
+
+
+@dataclass
+class DatasetSpec:
+    students: int = 1_000
+    classes: int = 50
+    rooms: int = 10
+    # mean classes per student; each student takes between mean - 1 and mean + 1
+    enrollments_per_student: int = 4
+    days: int = 5
+    # availability blocks per room per day: 1 is one long day, higher cuts it into shorter blocks with gaps
+    fragmentation: int = 1
+    # students take their classes from one department of this many classes,
+    # except for a cross_enrollment share drawn from the whole catalogue
+    department_size: int = 25
+    cross_enrollment: float = 0.1
+    seed: int = 0
+
+    @classmethod
+    def scaled(cls, students: int, seed: int = 0) -> "DatasetSpec":
+        """A spec whose class, room and day counts grow with the student count."""
+        classes = max(20, students // 50)
+        return cls(
+            students=students,
+            classes=classes,
+            rooms=max(8, classes // 8),
+            days=5 if students < 10_000 else 10,
+            fragmentation=2,
+            seed=seed,
+        )
+
+
+def _round_up(value: float, step: int = 5) -> int:
+    return max(step, -(-int(value) // step) * step)
+
+
+def _literal(dt: datetime) -> str:
+    return f'"{dt.isoformat()}"^^xsd:dateTime'
+
+
+def generate(spec: DatasetSpec, directory) -> Path:
+    """Write students.ttl, classes.ttl and rooms.ttl for spec into directory."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(spec.seed)
+
+    # a few popular classes and a long tail in every department, like real course sizes
+    size = max(1, min(spec.department_size, spec.classes))
+    departments = [range(d, min(d + size, spec.classes)) for d in range(0, spec.classes, size)]
+    weights = [1.0 / (rank + 5) ** 0.8 for rank in range(size)]
+    cumulative: List[float] = []
+    total = 0.0
+    for w in weights:
+        total += w
+        cumulative.append(total)
+
+    mean = max(1, spec.enrollments_per_student)
+    offsets = array("q", [0])
+    taken = array("q")
+    counts = [0] * spec.classes
+    for _ in range(spec.students):
+        department = rnd.choice(departments)
+        k = min(len(department), max(1, mean + rnd.randint(-1, 1)))
+        chosen = {}
+        while len(chosen) < k:
+            if rnd.random() < spec.cross_enrollment:
+                c = rnd.randrange(spec.classes)
+            else:
+                c = department[rnd.choices(range(len(department)), cum_weights=cumulative[:len(department)])[0]]
+            chosen[c] = None
+        for c in chosen:
+            counts[c] += 1
+        taken.extend(chosen)
+        offsets.append(len(taken))
+
+    with open(directory / "students.ttl", "w", encoding="utf-8") as f:
+        f.write("@prefix ex:     <http://example.org/> .\n")
+        f.write("@prefix schema: <http://schema.org/> .\n")
+        f.write("###############################################\n# Students (Synthetic)\n###############################################\n")
+        for s in range(spec.students):
+            classes = ", ".join(f"ex:C{c:05d}" for c in taken[offsets[s]:offsets[s + 1]])
+            f.write(f'ex:_Student_{s:07d} a ex:Person ;\n  schema:name "Student {s:07d}" ;\n  ex:enrolledIn {classes} .\n')
+
+    # room sizes spread over the class sizes, the biggest room fitting the biggest class
+    sizes = sorted(counts)
+    capacities = sorted(
+        _round_up(sizes[min(len(sizes) - 1, (i + 1) * len(sizes) // spec.rooms)] * 1.1)
+        for i in range(spec.rooms)
+    )
+    capacities[-1] = max(capacities[-1], _round_up(sizes[-1] * 1.2))
+
+    with open(directory / "classes.ttl", "w", encoding="utf-8") as f:
+        f.write("@prefix ex:  <http://example.org/> .\n")
+        f.write("@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n")
+        f.write("@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n\n")
+        f.write("###############################################\n# Classes (Synthetic)\n###############################################\n\n")
+        for c in range(spec.classes):
+            min_cap = min(capacities[-1], _round_up(counts[c] * rnd.uniform(0.9, 1.3)))
+            hours = rnd.choice(EXAM_HOURS)
+            f.write(
+                f'ex:C{c:05d} a ex:Class ;\n    rdfs:label "Class {c:05d}" ;\n'
+                f'    ex:hasMinimumRoomCapacity {min_cap} ;\n    ex:examDuration "{hours}"^^xsd:decimal .\n\n'
+            )
+
+    block_hours = DAY_HOURS / spec.fragmentation
+    with open(directory / "rooms.ttl", "w", encoding="utf-8") as f:
+        f.write("@prefix ex:   <http://example.org/> .\n")
+        f.write("@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n")
+        f.write("@prefix xsd:  <http://www.w3.org/2001/XMLSchema#> .\n\n")
+        f.write("###############################################\n# Rooms (Synthetic)\n###############################################\n\n")
+        slot = 0
+        slots = []
+        for r, capacity in enumerate(capacities):
+            f.write(f'ex:Room{r:04d} a ex:Room ;\n    rdfs:label "Room {r:04d}" ;\n    ex:roomCapacity {capacity} ;\n\n')
+            for day in range(spec.days):
+                for b in range(spec.fragmentation):
+                    # blocks are at least 3 hours, with up to an hour cut off either side
+                    start = TERM_START + timedelta(days=day, hours=b * block_hours)
+                    end = start + timedelta(hours=block_hours)
+                    if spec.fragmentation > 1:
+                        start += timedelta(minutes=30 * rnd.randint(0, 2))
+                        end -= timedelta(minutes=30 * rnd.randint(0, 2))
+                    f.write(f"    ex:hasAvailability ex:_Time_slot_{slot:07d} ;\n")
+                    slots.append((slot, start, end))
+                    slot += 1
+            f.write(".\n\n")
+            for n, start, end in slots:
+                f.write(
+                    f"ex:_Time_slot_{n:07d}\n    a ex:AvailabilityTimeSlot ;\n"
+                    f"    ex:availableFrom {_literal(start)} ;\n    ex:availableUntil {_literal(end)} ;\n.\n\n"
+                )
+            slots.clear()
+
+    with open(directory / "spec.json", "w", encoding="utf-8") as f:
+        json.dump(asdict(spec), f, indent=2)
+    return directory
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic term in the data/*.ttl vocabulary")
+    parser.add_argument("directory")
+    parser.add_argument("--students", type=int, default=1_000)
+    parser.add_argument("--classes", type=int)
+    parser.add_argument("--rooms", type=int)
+    parser.add_argument("--enrollments", type=int, help="mean classes per student")
+    parser.add_argument("--days", type=int)
+    parser.add_argument("--fragmentation", type=int, help="availability blocks per room per day")
+    parser.add_argument("--department-size", type=int)
+    parser.add_argument("--cross-enrollment", type=float)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    spec = DatasetSpec.scaled(args.students, args.seed)
+    for name, value in (("classes", args.classes), ("rooms", args.rooms), ("enrollments_per_student", args.enrollments),
+                        ("days", args.days), ("fragmentation", args.fragmentation),
+                        ("department_size", args.department_size), ("cross_enrollment", args.cross_enrollment)):
+        if value is not None:
+            setattr(spec, name, value)
+    print(f"Wrote {generate(spec, args.directory)} | {spec}")
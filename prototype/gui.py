@@ -1,36 +1,136 @@
+import queue
+import threading
 import time
 import webbrowser
 from tkinter import *
 
 import main
 
+# Scheduler runs happen on a worker thread so the window stays responsive.
+# The worker reports through `events`, which the Tk loop drains every
+# POLL_MS with root.after; Cancel sets `cancel`, and the progress callback
+# raises Cancelled inside main.main() so even a long run stops promptly.
 
-def run_once():
-    output.delete('1.0', END)
-    output.insert(END, "running")
-    root.update()
+POLL_MS = 50
+
+events: "queue.Queue[tuple]" = queue.Queue()
+cancel = threading.Event()
+worker = None
+# per-iteration seconds of the run in progress, for the live min/mean/p95 line
+live_times = []
+
+
+class Cancelled(Exception):
+    pass
+
+
+def run_iterations(iterations):
+    # worker thread: never touches Tk, only puts events on the queue
+    times = []
+    try:
+        for iteration in range(1, iterations + 1):
+            def progress(phase, done, total):
+                if cancel.is_set():
+                    raise Cancelled()
+                events.put(("progress", iteration, iterations, phase, done, total))
+
+            start = time.time_ns()
+            main.main(progress=progress)
+            times.append((time.time_ns() - start) / 1_000_000_000)
+            events.put(("iteration", iteration, iterations, list(times)))
+        events.put(("done", times, False))
+    except Cancelled:
+        events.put(("done", times, True))
+    except Exception as e:
+        events.put(("error", f"{type(e).__name__}: {e}"))
 
-    start = time.time_ns()
-    main.main()
-    elapsed = (time.time_ns() - start) / 1_000_000_000
 
+def summary(times):
+    ordered = sorted(times)
+    p95 = ordered[max(0, -(-95 * len(ordered) // 100) - 1)]
+    return (f"min {ordered[0]:.4f}s  mean {sum(ordered) / len(ordered):.4f}s  "
+            f"p95 {p95:.4f}s")
+
+
+def show(text):
     output.delete('1.0', END)
-    output.insert(END, f"code ran in {elapsed:.4f} seconds")
+    output.insert(END, text)
+
+
+def start(iterations):
+    global worker
+    if worker is not None and worker.is_alive():
+        return
+    cancel.clear()
+    live_times.clear()
+    show("running")
+    run_button.config(state=DISABLED)
+    hundred_button.config(state=DISABLED)
+    cancel_button.config(state=NORMAL)
+    worker = threading.Thread(target=run_iterations, args=(iterations,), daemon=True)
+    worker.start()
+    root.after(POLL_MS, poll)
+
+
+def finish():
+    run_button.config(state=NORMAL)
+    hundred_button.config(state=NORMAL)
+    cancel_button.config(state=DISABLED)
+
+
+def poll():
+    # drain everything the worker sent since the last tick, then show the latest state
+    latest_progress = None
+    while True:
+        try:
+            event = events.get_nowait()
+        except queue.Empty:
+            break
+
+        kind = event[0]
+        if kind == "progress":
+            latest_progress = event
+        elif kind == "iteration":
+            live_times[:] = event[3]
+        elif kind == "done":
+            _, times, cancelled = event
+            finish()
+            if not times:
+                show("cancelled" if cancelled else "nothing ran")
+            elif len(times) == 1 and not cancelled:
+                show(f"code ran in {times[0]:.4f} seconds")
+            else:
+                head = "cancelled after " if cancelled else ""
+                show(f"{head}{len(times)} iterations ran in {sum(times):.4f} seconds\n"
+                     f"\nAverage time: {sum(times) / len(times):.4f} seconds\n{summary(times)}")
+            return
+        elif kind == "error":
+            finish()
+            show(f"run failed\n{event[1]}")
+            return
+
+    if latest_progress is not None:
+        _, iteration, iterations, phase, done, total = latest_progress
+        lines = [f"iteration {iteration} of {iterations}", f"phase: {phase}"]
+        if total:
+            lines.append(f"courses placed: {done} / {total}")
+        if live_times:
+            lines.append(summary(live_times))
+        show("\n".join(lines))
+    root.after(POLL_MS, poll)
+
+
+def run_once():
+    start(1)
 
 
 def run_hundred():
-    output.delete('1.0', END)
-    output.insert(END, "running")
-    root.update()
+    start(100)
 
-    start = time.time_ns()
-    for _ in range(100):
-        main.main()
-    elapsed = (time.time_ns() - start) / 1_000_000_000
 
-    output.delete('1.0', END)
-    output.insert(END, f"100 iterations ran in {elapsed:.4f} seconds\n")
-    output.insert(END, f"\nAverage time: {elapsed / 100:.4f} seconds")
+def cancel_run():
+    cancel.set()
+    show("cancelling")
 
 
 def open_repo(event):
@@ -39,7 +139,7 @@ def open_repo(event):
 
 root = Tk()
 root.title("Greedy Scheduling Algorithm")
-root.geometry('350x300')
+root.geometry('350x340')
 
 frame = Frame(root, padx=10, pady=10)
 frame.place(relx=0.5, rely=0.5, anchor='center')
@@ -60,11 +160,15 @@ output = Text(frame, height=5, width=40)
 output.pack(pady=5)
 output.insert('1.0', "Waiting to run")
 
-Button(frame, text="Run Scheduler", fg="red", command=run_once, cursor="hand2").pack(pady=2)
-Button(frame, text="Run Scheduler 100 times", fg="red", command=run_hundred, cursor="hand2").pack(pady=2)
+run_button = Button(frame, text="Run Scheduler", fg="red", command=run_once, cursor="hand2")
+run_button.pack(pady=2)
+hundred_button = Button(frame, text="Run Scheduler 100 times", fg="red", command=run_hundred, cursor="hand2")
+hundred_button.pack(pady=2)
+cancel_button = Button(frame, text="Cancel", command=cancel_run, state=DISABLED, cursor="hand2")
+cancel_button.pack(pady=2)
 
 repo_link = Label(frame, text="Click here for the full project repo", bg="#3A7FF6", fg="white", cursor="hand2")
 repo_link.pack(pady=5)
 repo_link.bind('<Button-1>', open_repo)
 
-root.mainloop()
\ No newline at end of file
+root.mainloop()
@@ -0,0 +1,239 @@
+from array import array
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from main import schedule_greedy
+from model import Room, TermModel, iso_from_minutes
+from state import ScheduleState
+
+# Incremental changes on top of a published schedule. Each delta updates the
+# model, unplaces only the exams it invalidates (a class whose new student
+# clashes or no longer fits the room, or the exams inside a closed room
+# window), and re-places those plus the still unscheduled classes greedily
+# against everything else that stays where it is.
+
+FOREVER = (-(1 << 62), 1 << 62)
+
+
+@dataclass(frozen=True)
+class AddEnrollment:
+    student: str
+    class_iri: str
+
+
+@dataclass(frozen=True)
+class DropEnrollment:
+    student: str
+    class_iri: str
+
+
+@dataclass(frozen=True)
+class CloseRoom:
+    # a whole room when start/end are None, otherwise [start, end) in epoch minutes
+    room_iri: str
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ExtendAvailability:
+    room_iri: str
+    start: int
+    end: int
+
+
+Delta = Union[AddEnrollment, DropEnrollment, CloseRoom, ExtendAvailability]
+Slot = Tuple[str, str, str]  # (room IRI, start, end) as in the JSON output
+
+
+@dataclass
+class GroupChange:
+    class_iri: str
+    before: Optional[Slot]
+    after: Optional[Slot]
+    students_changed: bool = False
+
+    def to_dict(self) -> dict:
+        def slot(value):
+            return None if value is None else dict(zip(("room_iri", "start", "end"), value))
+        return {
+            "class_iri": self.class_iri,
+            "before": slot(self.before),
+            "after": slot(self.after),
+            "students_changed": self.students_changed,
+        }
+
+
+class Rescheduler:
+    """
+    Keeps a model and its schedule state and applies deltas to them in place.
+
+    Work per apply() is proportional to the classes and rooms the deltas
+    touch plus the unscheduled classes that get retried, not the whole term:
+    the unscheduled classes are kept as a set, updated as exams are unplaced
+    and placed again.
+    """
+
+    def __init__(self, model: TermModel, state: Optional[ScheduleState] = None):
+        self.model = model
+        if state is None:
+            state = ScheduleState.initial(model)
+            schedule_greedy(model, state)
+        self.state = state
+        self.room_ids: Dict[str, int] = {str(room.uri): i for i, room in enumerate(model.rooms)}
+        self.course_ids: Dict[str, int] = {str(course.uri): i for i, course in enumerate(model.courses)}
+        self.unscheduled: Set[str] = {key for key in self.course_ids if key not in state.placements}
+
+    def _slot(self, cls_key: str) -> Optional[Slot]:
+        placed = self.state.placements.get(cls_key)
+        if placed is None:
+            return None
+        room_index, start, end = placed
+        offset = self.model.utc_offset
+        return str(self.model.rooms[room_index].uri), iso_from_minutes(start, offset), iso_from_minutes(end, offset)
+
+    def _set_model(self, model: TermModel) -> None:
+        self.model = model
+        self.state.model = model
+
+    def _change_enrollment(self, delta: Union[AddEnrollment, DropEnrollment], roster_changed: Set[str]) -> None:
+        model, state, calendar = self.model, self.state, self.state.calendar
+        cls_key = delta.class_iri
+        adding = isinstance(delta, AddEnrollment)
+        enrollment = model.enrollment
+
+        if adding == (delta.student in {enrollment.students[s] for s in enrollment.get(cls_key, ())}):
+            return  # already enrolled / not enrolled, nothing to do
+
+        placed = state.placements.get(cls_key)
+        if placed is not None:
+            # take the class off the student calendars while its roster changes
+            calendar.prepare(cls_key, enrollment.get(cls_key, ()))
+            calendar.release(placed[1], placed[2])
+
+        s = enrollment.student_id(delta.student)
+        neighbours = [] if s is None else [enrollment.classes[c] for c in enrollment.classes_of(s)]
+        calendar.adjust_conflicts(cls_key, neighbours, 1 if adding else -1)
+
+        pair = [(delta.student, cls_key)]
+        enrollment = enrollment.with_changes(added=pair) if adding else enrollment.with_changes(dropped=pair)
+        courses = model.courses
+        i = self.course_ids.get(cls_key)
+        if i is not None:
+            courses = list(courses)
+            courses[i] = replace(courses[i], enrollment=enrollment.count(cls_key))
+        self._set_model(replace(model, courses=courses, enrollment=enrollment))
+        roster_changed.add(cls_key)
+
+        if placed is None:
+            return
+        room_index, start, end = placed
+        calendar.prepare(cls_key, enrollment.get(cls_key, ()))
+        course = courses[i] if i is not None else None
+        room_ok = course is None or self.model.rooms[room_index].capacity >= course.need
+        if room_ok and calendar.fits(start, end):
+            calendar.commit(start, end)
+        else:
+            del state.placements[cls_key]
+            state.index.add_free(room_index, start, end)
+            self.unscheduled.add(cls_key)
+
+    def _close_room(self, delta: CloseRoom) -> None:
+        room_index = self.room_ids[delta.room_iri]
+        lo, hi = FOREVER
+        if delta.start is not None:
+            lo = delta.start
+        if delta.end is not None:
+            hi = delta.end
+
+        for cls_key, (r, start, end) in list(self.state.placements.items()):
+            if r == room_index and start < hi and lo < end:
+                self.state.unplace(cls_key)
+                self.unscheduled.add(cls_key)
+        self.state.index.remove_window(room_index, lo, hi)
+
+        room = self.model.rooms[room_index]
+        blocks = []
+        for a, b in room.blocks():
+            if a < lo:
+                blocks.append((a, min(b, lo)))
+            if b > hi:
+                blocks.append((max(a, hi), b))
+        self._replace_room(room_index, blocks)
+
+    def _extend_room(self, delta: ExtendAvailability) -> None:
+        room_index = self.room_ids[delta.room_iri]
+        booked = sorted(
+            (start, end) for r, start, end in self.state.placements.values()
+            if r == room_index and start < delta.end and delta.start < end
+        )
+        merged: List[Tuple[int, int]] = []
+        for a, b in sorted(list(self.model.rooms[room_index].blocks()) + [(delta.start, delta.end)]):
+            if merged and a <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+            else:
+                merged.append((a, b))
+        # the index merges free time only within one window, so it needs the widened windows first
+        self._replace_room(room_index, merged)
+
+        # free the new window around whatever is already booked inside it
+        cursor = delta.start
+        for start, end in booked + [(delta.end, delta.end)]:
+            if cursor < start:
+                self.state.index.add_free(room_index, cursor, start)
+            cursor = max(cursor, end)
+
+    def _replace_room(self, room_index: int, blocks: Sequence[Tuple[int, int]]) -> None:
+        # the model keeps describing the term's availability for validation and later runs
+        old = self.model.rooms[room_index]
+        rooms = list(self.model.rooms)
+        rooms[room_index] = Room(
+            uri=old.uri,
+            capacity=old.capacity,
+            free_starts=array("q", (a for a, _ in blocks)),
+            free_ends=array("q", (b for _, b in blocks)),
+        )
+        self._set_model(replace(self.model, rooms=rooms))
+        self.state.index.rooms = rooms
+
+    def schedule(self) -> List[dict]:
+        """Current schedule in schedule_greedy's item format, in the model's course order."""
+        return self.state.schedule()
+
+    def apply(self, *deltas: Delta) -> List[GroupChange]:
+        """Apply deltas, re-place what they displaced and return the groups that changed."""
+        roster_changed: Set[str] = set()
+        before: Dict[str, Optional[Slot]] = {}
+
+        def remember(keys):
+            for key in keys:
+                if key not in before:
+                    before[key] = self._slot(key)
+
+        remember(self.unscheduled)
+        for delta in deltas:
+            if isinstance(delta, (AddEnrollment, DropEnrollment)):
+                remember([delta.class_iri])
+                self._change_enrollment(delta, roster_changed)
+            elif isinstance(delta, CloseRoom):
+                room_index = self.room_ids[delta.room_iri]
+                remember(key for key, (r, _, _) in self.state.placements.items() if r == room_index)
+                self._close_room(delta)
+            elif isinstance(delta, ExtendAvailability):
+                self._extend_room(delta)
+            else:
+                raise TypeError(f"Unknown delta: {delta!r}")
+
+        # retry everything that is not placed now, in the model's greedy order
+        courses = self.model.courses
+        retry = [courses[i] for i in sorted(self.course_ids[key] for key in self.unscheduled)]
+        schedule_greedy(self.model, self.state, retry)
+        self.unscheduled.difference_update([key for key in self.unscheduled if key in self.state.placements])
+
+        changes = []
+        for key in sorted(before.keys() | roster_changed):
+            after = self._slot(key)
+            students_changed = key in roster_changed
+            if after != before.get(key) or (students_changed and after is not None):
+                changes.append(GroupChange(key, before.get(key), after, students_changed))
+        return changes
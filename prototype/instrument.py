@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+import cProfile
+import io
+import pstats
+import tracemalloc
+
+# Phase timers and hot-path counters for a scheduler run. A Stats is passed
+# down explicitly; schedule_greedy only counts when it is given one, so the
+# normal run pays nothing. profiled() adds an opt-in cProfile or tracemalloc
+# summary to the same report.
+
+PROFILERS = ("cpu", "memory")
+
+
+class Stats:
+    """Wall-clock seconds per phase and event counters, reported as one dict."""
+
+    def __init__(self, on_phase: Optional[Callable[[str], None]] = None):
+        # on_phase -> called with the phase name as each phase starts, e.g. to report progress
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.profile: Optional[dict] = None
+        self.on_phase = on_phase
+
+    @contextmanager
+    def phase(self, name: str):
+        if self.on_phase is not None:
+            self.on_phase(name)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - start
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> dict:
+        report = {
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "total": round(sum(self.phases.values()), 6),
+            "counters": dict(self.counters),
+        }
+        if self.profile is not None:
+            report["profile"] = self.profile
+        return report
+
+
+@contextmanager
+def profiled(kind: Optional[str], stats: Stats, top: int = 15):
+    """Run the block under cProfile ("cpu") or tracemalloc ("memory"), or neither for None."""
+    if kind is None:
+        yield
+        return
+    if kind not in PROFILERS:
+        raise ValueError(f"Unknown profiler: {kind!r} (expected one of {', '.join(PROFILERS)})")
+
+    if kind == "cpu":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            rows = []
+            for (filename, line, function), (_, calls, own, cumulative, _) in _sorted_stats(profiler):
+                rows.append({
+                    "function": f"{filename}:{line}({function})",
+                    "calls": calls,
+                    "own_s": round(own, 6),
+                    "cumulative_s": round(cumulative, 6),
+                })
+                if len(rows) == top:
+                    break
+            stats.profile = {"kind": "cpu", "top": rows}
+        return
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started:
+            tracemalloc.stop()
+        rows = [
+            {"where": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+            for stat in snapshot.statistics("lineno")[:top]
+        ]
+        stats.profile = {"kind": "memory", "current_bytes": current, "peak_bytes": peak, "top": rows}
+
+
+def _sorted_stats(profiler: cProfile.Profile):
+    # pstats keeps (primitive calls, calls, own time, cumulative time, callers) per function
+    table = pstats.Stats(profiler, stream=io.StringIO()).stats
+    return sorted(table.items(), key=lambda item: item[1][3], reverse=True)
@@ -1,11 +1,24 @@
 from rdflib import Graph, URIRef
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+from array import array
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
-
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from availability import DEFAULT_INDEX, END, INDEXES, ROOM, START
+from calendars import DEFAULT_ENGINE, ENGINES
+from diagnostics import Precheck, explain, precheck, summary
+from enrollment import Enrollment
+from instrument import PROFILERS, Stats, profiled
+from model import Course, Room, TermModel, iso_from_minutes, to_minutes, utc_offset
+from ordering import ORDERINGS, get_ordering, order_courses
+from state import ScheduleState
+
+import argparse
 import json
-import bisect
+import output
+import snapshot
+import ttl_stream
 
 
 data_directory = "../data/"
@@ -20,18 +33,10 @@ HAS_AVAILABILITY = URIRef(EX + "hasAvailability")
 AVAILABLE_FROM = URIRef(EX + "availableFrom")
 AVAILABLE_UNTIL = URIRef(EX + "availableUntil")
 
-@dataclass
-class Room:
-    uri: URIRef
-    capacity: int
-    free: List[Tuple[datetime, datetime]] # (start time, end time) pairs for availability
-
-@dataclass
-class Course:
-    uri: URIRef
-    exam_minutes: int
-    enrollment: int
-    min_room_capacity: int
+# the only predicates the model is built from, per input file
+STUDENT_PREDICATES = (ENROLLED_IN,)
+CLASS_PREDICATES = (EXAM_DURATION, HAS_MIN_CAP)
+ROOM_PREDICATES = (ROOM_CAPACITY, HAS_AVAILABILITY, AVAILABLE_FROM, AVAILABLE_UNTIL)
 
 def parse_iso_dt(value: str) -> datetime:
     return datetime.fromisoformat(value)
@@ -44,40 +49,11 @@ def load_graph(path: Path) -> Graph:
 def intervals_overlap(a_start, a_end, b_start, b_end):
     return a_start < b_end and b_start < a_end
 
-def can_place_for_students(student_intervals, students, start, end):
-
-    #student_intervals: dict[student_iri] -> list[(start, end)]
-    #current search time is in O(n) can be reduced to O(log n)
-    #this is by implementing a bisection technique which cuts open the intervals
-    #and asserts whether and exam can fit in the allotted time or not
-
-    for stu in students:
-        intervals = student_intervals.get(stu)
-        if not intervals:
-            continue
-
-        i = bisect.bisect_right(intervals, (start, end))
-
-        if i > 0:
-            prev_start, prev_end = intervals[i - 1]
-            if prev_end > start:
-                return False
-        if i < len(intervals):
-            next_start, next_end = intervals[i]
-            if end > next_start:
-                return False
-
-    return True
-
-def commit_students(student_intervals, students, start, end):
-    for stu in students:
-        student_intervals.setdefault(stu, []).append((start, end))
-
-def get_enrollment_counts(students: Graph) -> Dict[URIRef, int]:
-    counts: Dict[URIRef, int] = {}
+def get_enrollment_counts(students: Graph) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
     for _, _, cls in students.triples((None, ENROLLED_IN, None)):
         if isinstance(cls, URIRef):
-            counts[cls] = counts.get(cls, 0) + 1
+            counts[str(cls)] = counts.get(str(cls), 0) + 1
     return counts
 
 def get_rooms(rooms_graph: Graph) -> List[Room]:
@@ -87,27 +63,42 @@ def get_rooms(rooms_graph: Graph) -> List[Room]:
         cap = int(cap_lit)
 
         slots = list(rooms_graph.objects(room_uri, HAS_AVAILABILITY))
-        free: List[Tuple[datetime, datetime]] = []
+        free: List[Tuple[int, int]] = []
 
         for slot in slots:
             for available_from in rooms_graph.objects(slot, AVAILABLE_FROM):
                 for available_until in rooms_graph.objects(slot, AVAILABLE_UNTIL):
-                    start_time = parse_iso_dt(str(available_from))
-                    end_time = parse_iso_dt(str(available_until))
+                    start_time = to_minutes(parse_iso_dt(str(available_from)))
+                    end_time = to_minutes(parse_iso_dt(str(available_until)))
                     if end_time > start_time:
                         free.append((start_time, end_time))
 
         # Keep intervals sorted
-        free.sort(key=lambda ab: (ab[0], ab[1]))
+        free.sort()
 
         if free:
-            rooms.append(Room(uri=room_uri, capacity=cap, free=free))
+            rooms.append(Room(
+                uri=room_uri,
+                capacity=cap,
+                free_starts=array("q", (a for a, _ in free)),
+                free_ends=array("q", (b for _, b in free)),
+            ))
 
     # sort rooms by capacity ascending to keep big rooms free if needed
     rooms.sort(key=lambda r: r.capacity)
     return rooms
 
-def build_courses(g_classes: Graph, enrollment_counts: Dict[URIRef, int]) -> List[Course]:
+def availability_offset(rooms_graph: Graph) -> Optional[int]:
+    # the one UTC offset (minutes) all availability times share, None if they are naive
+    offsets = set()
+    for predicate in (AVAILABLE_FROM, AVAILABLE_UNTIL):
+        for _, _, value in rooms_graph.triples((None, predicate, None)):
+            offsets.add(utc_offset(parse_iso_dt(str(value))))
+    if len(offsets) > 1:
+        raise ValueError("Availability times mix UTC offsets (or naive and offset times); use one offset for the term")
+    return offsets.pop() if offsets else None
+
+def build_courses(g_classes: Graph, enrollment_counts: Dict[str, int]) -> List[Course]:
     courses: List[Course] = []
 
     for cls_uri, _, dur_lit in g_classes.triples((None, EXAM_DURATION, None)):
@@ -116,7 +107,7 @@ def build_courses(g_classes: Graph, enrollment_counts: Dict[URIRef, int]) -> Lis
 
         # examDuration stored as hours
         minutes = int(float(dur_lit) * 60)
-        enrolled = enrollment_counts.get(cls_uri, 0)
+        enrolled = enrollment_counts.get(str(cls_uri), 0)
 
         # per-class minimum room capacity constraint
         min_cap = 0
@@ -138,42 +129,80 @@ def build_students_by_class(g_students: Graph) -> dict[str, list[str]]:
         students_by_class.setdefault(str(cls), []).append(str(student))
     return students_by_class
 
-def schedule_greedy(courses: List[Course], rooms: List[Room], students_by_class: Dict[str, List[str]]):
-    student_intervals: Dict[str, List[Tuple[datetime, datetime]]] = {}
+def build_enrollment(g_students: Graph) -> Enrollment:
+    # single pass over enrolledIn, replaces get_enrollment_counts + build_students_by_class
+    return Enrollment.from_pairs(
+        (student, cls)
+        for student, _, cls in g_students.triples((None, ENROLLED_IN, None))
+        if isinstance(cls, URIRef)
+    )
+
+def schedule_greedy(model: TermModel, state: Optional[ScheduleState] = None, courses: Optional[Sequence[Course]] = None,
+                    stats: Optional[Stats] = None, progress: Optional[Callable[[int, int], None]] = None,
+                    failures: Optional[Dict[str, Dict[str, int]]] = None):
+    # state -> free blocks + calendar to schedule into, mutated in place; a fresh one by default
+    # courses -> order to place in, model.courses by default
+    # stats -> count candidates and why they were rejected (costs a little, off by default)
+    # progress -> called with (courses done, courses) about a hundred times per run; may raise to abort
+    # failures -> filled with class IRI -> the loop's rejection counts for every course it could not place
+    # the model itself is never modified, so it can be reused across runs
+    if state is None:
+        state = ScheduleState.initial(model)
+    if courses is None:
+        courses = model.courses
+    rooms = model.rooms
+    students_by_class = model.enrollment
+    index = state.index
+    calendar = state.calendar
+    gaps = state.gaps
     schedule = []
+    step = max(1, len(courses) // 100)
 
-    for course in courses:
+    for done, course in enumerate(courses):
+        if progress is not None and done % step == 0:
+            progress(done, len(courses))
         cls_key = str(course.uri)
         mins = course.exam_minutes
-        # required seats = max(enrollment, min_room_capacity)
-        need = max(course.enrollment, course.min_room_capacity or 0)
+        need = course.need
 
         students = students_by_class.get(cls_key, [])
-
-        best = None  # (start, end, room_index, block_index)
-
-        for room_index, room in enumerate(rooms):
-            if room.capacity < need:
-                #break case if more students need room than available
-                continue
-
-            for block_index, (a, b) in enumerate(room.free):
-                #goes through free rooms
-                if (b - a).total_seconds() < mins * 60:
-                    #checking a time condition
-                    continue
-
-                start = a
-                end = a + timedelta(minutes=mins)
-
-                if not can_place_for_students(student_intervals, students, start, end):
-                    continue
-
-                cand = (start, end, room_index, block_index)
-                if best is None or cand[0] < best[0]: #what is the extra condition here
-                    best = cand
+        calendar.prepare(cls_key, students)
+        # per course counts when diagnosing failures, added to stats afterwards
+        probe = stats if failures is None else Stats()
+        if stats is not None:
+            stats.count("courses")
+        if probe is not None:
+            probe.count("rejected_capacity", index.live_below(need))
+
+        # earliest live block that is big enough, long enough and conflict free
+        # (at its start, or with state.gaps anywhere inside it)
+        best = None
+        start = None
+        for entry in index.candidates(need, mins, probe):
+            if gaps:
+                start = calendar.earliest(entry[START], entry[END], mins)
+            elif calendar.fits(entry[START], entry[START] + mins):
+                start = entry[START]
+            if probe is not None:
+                probe.count("candidates_evaluated")
+                # students whose calendars the check may look at, an upper bound for engines that stop early
+                probe.count("student_interval_probes", len(students))
+                if start is None:
+                    probe.count("rejected_student_conflict")
+            if start is not None:
+                best = entry
+                break
+
+        if failures is not None:
+            if best is None:
+                failures[cls_key] = dict(probe.counters)
+            if stats is not None:
+                for name, n in probe.counters.items():
+                    stats.count(name, n)
 
         if best is None:
+            if stats is not None:
+                stats.count("unscheduled")
             schedule.append({
                 "class": cls_key,
                 "room": None,
@@ -182,79 +211,251 @@ def schedule_greedy(courses: List[Course], rooms: List[Room], students_by_class:
             })
             continue
 
-        start, end, room_index, block_index = best
-        room = rooms[room_index]
-
-        # update room free blocks
-        a, b = room.free[block_index]
-        room.free.pop(block_index)
-        if end < b:
-            room.free.insert(block_index, (end, b))
+        end = start + mins
+        room = rooms[best[ROOM]]
 
-        commit_students(student_intervals, students, start, end)
+        # update room free blocks and calendars
+        state.place(cls_key, best, start, end)
 
         schedule.append({
             "class": cls_key,
             "room": str(room.uri),
-            "start": start.isoformat(),
-            "end": end.isoformat()
+            "start": iso_from_minutes(start, model.utc_offset),
+            "end": iso_from_minutes(end, model.utc_offset)
         })
 
-    #print('total time for optimized scheduling', (time_optimimum/1000000000), 's')
-
+    if progress is not None:
+        progress(len(courses), len(courses))
     return schedule
 
-def main() -> None:
-    students_path = data_directory + "students.ttl"
-    classes_path = data_directory + "classes.ttl"
-    rooms_path = data_directory + "rooms.ttl"
-    out_path = Path("exam_schedule.json")
-
-    students = load_graph(students_path)
-    classes = load_graph(classes_path)
-    rooms = load_graph(rooms_path)
-
-    # Enrollment counts -> Dict[URIRef, int]
-    enrollment_counts = get_enrollment_counts(students)
-    # Rooms list -> List[Room]
-    rooms_list = get_rooms(rooms) 
-    # Courses list -> List[Course]
-    courses_list = build_courses(classes, enrollment_counts) 
-    # Students by Class -> Dict[str, List[str]]
-    students_by_class = build_students_by_class(students)
-
-    # Greedy algorithm
-    schedule = schedule_greedy(courses_list, rooms_list, students_by_class)
-
-    groups = {}
-    counter = 1
-
-    for item in schedule:
-        if item["room"] is None:
-            continue
-
-        group_id = f"group_{counter:04d}"
-        counter += 1
-
-        class_iri = item["class"]
-
-        groups[group_id] = {
-            "students": students_by_class.get(class_iri, []),
-            "room": {
-                "room_iri": item["room"],
-                "start": item["start"],
-                "end": item["end"]
-            },
-            "class_iri": class_iri
-        }
-
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(groups, f, indent=2)
+def build_groups(schedule, enrollment: Enrollment) -> dict:
+    # scheduler items -> exam_schedule.json groups, numbered in schedule order
+    return dict(output.iter_groups(schedule, enrollment))
+
+def load_sources(students_path: str, classes_path: str, rooms_path: str, streaming: bool = True):
+    # streaming -> read only the predicates above with ttl_stream instead of building full rdflib graphs
+    if streaming:
+        return ttl_stream.load_filtered_many([
+            (students_path, [str(p) for p in STUDENT_PREDICATES]),
+            (classes_path, [str(p) for p in CLASS_PREDICATES]),
+            (rooms_path, [str(p) for p in ROOM_PREDICATES]),
+        ])
+    return load_graph(students_path), load_graph(classes_path), load_graph(rooms_path)
+
+def model_from_graphs(students, classes, rooms, stats: Optional[Stats] = None) -> TermModel:
+    stats = stats or Stats()
+    # Enrollment -> CSR class x student ids, counts are its row lengths
+    with stats.phase("enrollment"):
+        enrollment = build_enrollment(students)
+    with stats.phase("rooms_courses"):
+        # Rooms list -> List[Room]
+        rooms_list = get_rooms(rooms)
+        offset = availability_offset(rooms)
+        # Courses list -> List[Course]
+        courses_list = build_courses(classes, enrollment.counts())
+
+    return TermModel(rooms=rooms_list, courses=courses_list, enrollment=enrollment, utc_offset=offset)
+
+def build_model(students_path: str, classes_path: str, rooms_path: str, streaming: bool = True,
+                stats: Optional[Stats] = None) -> TermModel:
+    stats = stats or Stats()
+    with stats.phase("graph_load"):
+        graphs = load_sources(students_path, classes_path, rooms_path, streaming)
+    return model_from_graphs(*graphs, stats=stats)
+
+def load_model(directory: str = data_directory, cache: bool = True, stats: Optional[Stats] = None) -> TermModel:
+    # cache -> reuse the compiled snapshot in <directory>/.cache while the TTL files are unchanged
+    # stats -> phase timings; a cache hit shows up as snapshot_load instead of the build phases
+    stats = stats or Stats()
+    paths = [directory + "students.ttl", directory + "classes.ttl", directory + "rooms.ttl"]
+    if not cache:
+        return build_model(*paths, stats=stats)
+    built = []
+
+    def build():
+        built.append(True)
+        return build_model(*paths, stats=stats)
+
+    start = perf_counter()
+    model = snapshot.load_or_build(paths, Path(directory) / ".cache", build)
+    if not built:
+        stats.phases["snapshot_load"] = perf_counter() - start
+    return model
+
+def report_unscheduled(model: TermModel, schedule: List[dict], checked: Optional[Precheck],
+                       failures: Optional[Dict[str, Dict[str, int]]]) -> Optional[dict]:
+    # print why courses are unscheduled: the precheck's reasons always, the loop's with failures
+    # returns the failures and room shortfalls for the run report when there were loop counts
+    checked = checked or precheck(model)
+    missing = {item["class"] for item in schedule if item["room"] is None}
+    if failures is None:
+        ruled_out = [item for item in checked.infeasible.values() if item.class_iri in missing]
+        counts = summary(ruled_out)
+        if len(missing) > len(ruled_out):
+            counts["other"] = len(missing) - len(ruled_out)
+        print("Unscheduled: " + "  ".join(f"{reason}={n}" for reason, n in counts.items()) + "  (--diagnose for details)")
+        return None
+
+    explained = [item for item in explain(model, checked, failures) if item.class_iri in missing]
+    print("Unscheduled: " + "  ".join(f"{reason}={n}" for reason, n in summary(explained).items()))
+    for item in explained:
+        print(f"  {item.class_iri}: {item.reason}, {item.message}")
+    for shortfall in checked.shortfalls:
+        print(f"  rooms with {shortfall.seats}+ seats: {shortfall.courses} courses want {shortfall.demand} minutes, "
+              f"{shortfall.supply} are free")
+    return {
+        "unscheduled": [item.to_dict() for item in explained],
+        "shortfalls": [shortfall.to_dict() for shortfall in checked.shortfalls],
+    }
+
+def main(engine: str = DEFAULT_ENGINE, cache: bool = True, portfolio: bool = False, repair_budget: float = 0.0,
+         gaps: bool = False, compact: bool = False, validate: bool = False, report: Optional[str] = None,
+         profile: Optional[str] = None, shards: int = 0, store: Optional[str] = None,
+         resume: bool = False, index: str = DEFAULT_INDEX, ordering: str = "size", diagnose: bool = False,
+         progress: Optional[Callable[[str, int, int], None]] = None) -> dict:
+    # portfolio -> run every course ordering in portfolio.py on all cores and keep the best
+    # repair_budget -> seconds of repair.py local search for courses the greedy pass left unscheduled
+    # gaps -> place exams at the earliest conflict free start inside a block, not only at its start
+    # compact -> write exam_schedule.ndjson (IRI tables + integer ids) instead of exam_schedule.json
+    # validate -> run verify.py's checks on the schedule in memory against the same model
+    # report -> also count candidates/rejections in the greedy pass and write the timing report here as JSON
+    # profile -> "cpu" (cProfile) or "memory" (tracemalloc) summary of the whole run in the report
+    # shards -> split the conflict graph's components into this many shards scheduled in parallel
+    # store -> also save the schedule to this SQLite database (store.py) for indexed lookups
+    # resume -> start from the placements already in store that are still valid, schedule only the rest
+    # index -> free block index for the greedy pass, "vector" (numpy) or "heap"; both give the same schedule
+    # ordering -> course order for the greedy pass, an ordering.py name; "dsatur" picks the next course as it goes
+    # diagnose -> say why every unscheduled course failed, also in the report under "unscheduled"
+    # progress -> called with (phase, done, total) as phases start and while scheduling; may raise to abort
+    # returns the report: seconds per phase, counters, profile
+    get_ordering(ordering)  # fail on a bad name before loading anything
+    out_path = Path("exam_schedule.ndjson" if compact else "exam_schedule.json")
+    stats = Stats(on_phase=None if progress is None else lambda name: progress(name, 0, 0))
+    placed = None if progress is None else lambda done, total: progress("schedule", done, total)
+    counting = stats if report is not None else None
+
+    with profiled(profile, stats):
+        model = load_model(data_directory, cache, stats)
+        enrollment = model.enrollment
+
+        # rejection counts of the courses the greedy pass could not place, when diagnosing
+        failures: Optional[Dict[str, Dict[str, int]]] = {} if diagnose else None
+
+        # Greedy algorithm
+        with stats.phase("schedule"):
+            # courses no schedule could place are left out of every mode's greedy pass
+            checked = precheck(model)
+            if portfolio:
+                from portfolio import schedule_portfolio
+                result = schedule_portfolio(model, engine=engine, gaps=gaps, index=index, checked=checked,
+                                            diagnose=diagnose)
+                schedule = result.schedule + [{"class": cls_key, "room": None, "start": None, "end": None}
+                                              for cls_key in checked.infeasible]
+                if failures is not None:
+                    failures.update(result.failures)
+                print(f"Best ordering: {result.ordering} (unscheduled, makespan, -utilisation) = {result.score}")
+                # the winner ran in a worker process, rebuild its state here for repair and the store
+                state, _ = ScheduleState.replay(model, result.placements, engine, gaps=gaps, index=index)
+            elif shards > 0:
+                from sharding import schedule_sharded
+                result = schedule_sharded(model, engine=engine, shards=shards, gaps=gaps, index=index, checked=checked,
+                                          failures=failures)
+                state = result.state
+                schedule = result.schedule
+                print(f"Sharded: {result.components} components in {result.shards} shards, {result.retried} retried"
+                      + (", kept the serial schedule" if result.serial else ""))
+            else:
+                resumed = resume and store is not None and Path(store).exists()
+                if resumed:
+                    from store import ScheduleStore
+                    with ScheduleStore(store) as db:
+                        state = db.load_state(model, engine, gaps, index)
+                    print(f"Resumed {len(state.placements)} placements from {store}")
+                else:
+                    state = ScheduleState.initial(model, engine, gaps=gaps, index=index)
+                courses = model.courses if ordering in ("size", "dsatur") else order_courses(model, ordering)
+                # a resumed state only schedules the courses it does not hold yet
+                rest = checked.feasible(course for course in courses if str(course.uri) not in state.placements)
+                if ordering == "dsatur":
+                    from dsatur import schedule_dsatur
+                    schedule = schedule_dsatur(model, state, stats=counting, progress=placed, failures=failures,
+                                               courses=rest)
+                else:
+                    schedule = schedule_greedy(model, state, rest, stats=counting, progress=placed, failures=failures)
+                if resumed:
+                    # the resumed placements as well, in model course order
+                    schedule = state.schedule()
+                else:
+                    schedule += [{"class": cls_key, "room": None, "start": None, "end": None}
+                                 for cls_key in checked.infeasible]
+        if repair_budget > 0 and len(state.placements) < len(model.courses):
+            from repair import repair
+            with stats.phase("repair"):
+                state = repair(model, state, repair_budget)
+                schedule = state.schedule()
+
+        # groups are streamed out one at a time
+        with stats.phase("write"):
+            if compact:
+                output.write_compact(out_path, schedule, enrollment)
+            else:
+                output.write_json(out_path, schedule, enrollment)
+
+        if store is not None:
+            from store import ScheduleStore
+            with stats.phase("store"):
+                with ScheduleStore(store) as db:
+                    db.save(model, state, schedule, engine=engine)
+
+        if validate:
+            from verify import ScheduleValidator
+            with stats.phase("validate"):
+                violations = ScheduleValidator(model=model).validate(schedule)
 
     # Diagnoses test statements
     scheduled = sum(1 for x in schedule if x["room"] is not None)
     unscheduled = len(schedule) - scheduled
     print(f"Wrote {out_path} | scheduled={scheduled} unscheduled={unscheduled}")
+    diagnosis = report_unscheduled(model, schedule, checked, failures) if unscheduled else None
+
+    if validate:
+        for violation in violations:
+            print(violation.message)
+        print("Valid schedule" if not violations else f"INVALID schedule, {len(violations)} violations")
+
+    run_report = stats.report()
+    if diagnosis is not None:
+        run_report.update(diagnosis)
+    if report is not None:
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump(run_report, f, indent=2)
+        print(f"Wrote {report} | " + "  ".join(f"{name}={seconds:.4f}s" for name, seconds in run_report["phases"].items()))
+    return run_report
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Greedy exam scheduler")
+    parser.add_argument("--engine", default=DEFAULT_ENGINE, choices=ENGINES)
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="rebuild the model from the TTL files")
+    parser.add_argument("--repair-budget", type=float, default=0.0, metavar="SECONDS")
+    parser.add_argument("--gaps", action="store_true")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--validate", action="store_true")
+    parser.add_argument("--report", metavar="PATH", help="write phase timings and hot-path counters as JSON")
+    parser.add_argument("--profile", choices=PROFILERS)
+    parser.add_argument("--ordering", help=f"one of {', '.join(ORDERINGS)} or random:<seed>; size by default")
+    parser.add_argument("--diagnose", action="store_true", help="explain every unscheduled course")
+    parser.add_argument("--index", default=DEFAULT_INDEX, choices=INDEXES)
+    parser.add_argument("--store", metavar="PATH", help="also save the schedule to this SQLite database")
+    # the modes pick their own course order, and each starts from its own state
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--portfolio", action="store_true", help="run every ordering in parallel and keep the best")
+    mode.add_argument("--resume", action="store_true", help="keep the placements already in --store where still valid")
+    mode.add_argument("--shards", type=int, default=0, metavar="N", help="schedule conflict-graph components in N parallel shards")
+    args = parser.parse_args()
+    if args.ordering is not None and (args.portfolio or args.shards > 0):
+        parser.error("--ordering cannot be combined with --portfolio or --shards")
+    if args.resume and args.store is None:
+        parser.error("--resume needs --store")
+    if args.ordering is None:
+        args.ordering = "size"
+    main(**vars(args))
@@ -0,0 +1,72 @@
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from enrollment import Enrollment
+
+
+# Every time inside the scheduler is an integer number of minutes since EPOCH.
+# datetime objects only exist at the input (TTL literals) and output (JSON) boundary.
+# Times with a UTC offset are kept as UTC minutes; the term's offset is stored
+# on the TermModel and put back on the way out, so the output keeps it.
+EPOCH = datetime(1970, 1, 1)
+ONE_MINUTE = timedelta(minutes=1)
+
+
+def to_minutes(dt: datetime) -> int:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - EPOCH) // ONE_MINUTE
+
+
+def utc_offset(dt: datetime) -> Optional[int]:
+    # minutes east of UTC, None for a naive datetime
+    offset = dt.utcoffset()
+    return None if offset is None else offset // ONE_MINUTE
+
+
+def from_minutes(minutes: int, offset: Optional[int] = None) -> datetime:
+    dt = EPOCH + timedelta(minutes=minutes)
+    if offset is None:
+        return dt
+    return dt.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(minutes=offset)))
+
+
+def iso_from_minutes(minutes: int, offset: Optional[int] = None) -> str:
+    return from_minutes(minutes, offset).isoformat()
+
+
+@dataclass(slots=True)
+class Room:
+    uri: str
+    capacity: int
+    # free blocks as parallel (start, end) arrays in epoch minutes, sorted by start
+    free_starts: array
+    free_ends: array
+
+    def blocks(self):
+        return zip(self.free_starts, self.free_ends)
+
+
+@dataclass(slots=True)
+class Course:
+    uri: str
+    exam_minutes: int
+    enrollment: int
+    min_room_capacity: int
+
+    @property
+    def need(self) -> int:
+        # required seats = max(enrollment, min_room_capacity)
+        return max(self.enrollment, self.min_room_capacity or 0)
+
+
+@dataclass
+class TermModel:
+    # everything the scheduler reads; courses are already in greedy order
+    rooms: List[Room]
+    courses: List[Course]
+    enrollment: Enrollment
+    # UTC offset in minutes of the availability times, None when they are naive
+    utc_offset: Optional[int] = None
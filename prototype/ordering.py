@@ -0,0 +1,71 @@
+from typing import Callable, Dict, List, Optional
+
+import random
+
+from conflicts import ConflictGraph, build_conflict_graph, conflict_degree, shared_students
+from model import Course, TermModel
+
+# Course orderings for schedule_greedy. Each takes the model and its class
+# conflict graph and returns the courses in the order they should be placed.
+
+Ordering = Callable[[TermModel, ConflictGraph], List[Course]]
+
+
+def by_size(model: TermModel, graph: ConflictGraph) -> List[Course]:
+    # build_courses' order: seats needed, then enrollment, then exam length
+    return list(model.courses)
+
+
+def by_exam_length(model: TermModel, graph: ConflictGraph) -> List[Course]:
+    # the LEGACY VERSION from build_courses, longest exams first
+    return sorted(model.courses, key=lambda c: c.exam_minutes, reverse=True)
+
+
+def by_conflict_degree(model: TermModel, graph: ConflictGraph) -> List[Course]:
+    return sorted(
+        model.courses,
+        key=lambda c: (conflict_degree(graph, str(c.uri)), shared_students(graph, str(c.uri)), c.need),
+        reverse=True,
+    )
+
+
+def perturbed(seed: int, spread: float = 0.25) -> Ordering:
+    """build_courses' order with every course's size key jittered by up to +-spread."""
+    def order(model: TermModel, graph: ConflictGraph) -> List[Course]:
+        rnd = random.Random(seed)
+        return sorted(
+            model.courses,
+            key=lambda c: (c.need * rnd.uniform(1 - spread, 1 + spread), c.exam_minutes),
+            reverse=True,
+        )
+    return order
+
+
+def by_saturation(model: TermModel, graph: ConflictGraph) -> List[Course]:
+    # dsatur.py's dynamic order, fewest feasible slots left first, replayed as a fixed order
+    from dsatur import dsatur_order
+    return dsatur_order(model, graph)
+
+
+ORDERINGS: Dict[str, Ordering] = {
+    "size": by_size,
+    "exam_length": by_exam_length,
+    "conflict_degree": by_conflict_degree,
+    "dsatur": by_saturation,
+}
+
+
+def get_ordering(name: str) -> Ordering:
+    """Look up an ordering by name; "random:<seed>" gives a seeded perturbation of "size"."""
+    if name.startswith("random:"):
+        return perturbed(int(name.split(":", 1)[1]))
+    try:
+        return ORDERINGS[name]
+    except KeyError:
+        raise ValueError(f"Unknown ordering: {name!r} (expected one of {', '.join(ORDERINGS)} or random:<seed>)")
+
+
+def order_courses(model: TermModel, name: str, graph: Optional[ConflictGraph] = None) -> List[Course]:
+    if graph is None:
+        graph = build_conflict_graph(model.enrollment)
+    return get_ordering(name)(model, graph)
@@ -0,0 +1,160 @@
+from array import array
+from collections.abc import Mapping, Sequence
+from itertools import chain
+from typing import IO, Dict, Iterable, Iterator, List, Tuple, Union
+
+import json
+
+from enrollment import Enrollment
+
+# Writers for the scheduler's output. write_json() produces exactly what
+# json.dump(build_groups(...), indent=2) did, one group at a time, so nothing
+# but the group being written is held in memory. write_compact() writes NDJSON:
+# a header line with the student and room IRI tables, then one line per group
+# with integer indexes into them. read_compact() reads that back as a mapping
+# shaped like exam_schedule.json without rebuilding every student list.
+
+COMPACT_FORMAT = "ggs-compact"
+COMPACT_VERSION = 1
+
+
+def iter_groups(schedule: Iterable[dict], enrollment: Enrollment) -> Iterator[Tuple[str, dict]]:
+    """(group id, group) pairs of exam_schedule.json, numbered in schedule order."""
+    counter = 1
+    for item in schedule:
+        if item["room"] is None:
+            continue
+
+        class_iri = item["class"]
+        yield f"group_{counter:04d}", {
+            "students": enrollment.student_iris(class_iri),
+            "room": {
+                "room_iri": item["room"],
+                "start": item["start"],
+                "end": item["end"]
+            },
+            "class_iri": class_iri
+        }
+        counter += 1
+
+
+def dump_groups(groups: Iterable[Tuple[str, dict]], f: IO[str], indent: int = 2) -> int:
+    # same bytes as json.dump(dict(groups), f, indent=indent)
+    pad = " " * indent
+    count = 0
+    f.write("{")
+    for group_id, group in groups:
+        body = json.dumps(group, indent=indent).replace("\n", "\n" + pad)
+        f.write(f'{"," if count else ""}\n{pad}{json.dumps(group_id)}: {body}')
+        count += 1
+    f.write("\n}" if count else "}")
+    return count
+
+
+def write_json(path, schedule: Iterable[dict], enrollment: Enrollment, indent: int = 2) -> int:
+    """Stream exam_schedule.json to path; returns the number of groups written."""
+    with open(path, "w", encoding="utf-8") as f:
+        return dump_groups(iter_groups(schedule, enrollment), f, indent)
+
+
+def write_compact(path, schedule: Sequence[dict], enrollment: Enrollment) -> int:
+    """Write the compact NDJSON form of exam_schedule.json; returns the number of groups written."""
+    rooms = list(dict.fromkeys(item["room"] for item in schedule if item["room"] is not None))
+    room_ids = {room: i for i, room in enumerate(rooms)}
+    compact = (",", ":")
+
+    with open(path, "w", encoding="utf-8") as f:
+        header = {"format": COMPACT_FORMAT, "version": COMPACT_VERSION, "students": enrollment.students, "rooms": rooms}
+        f.write(json.dumps(header, separators=compact) + "\n")
+
+        counter = 0
+        for item in schedule:
+            if item["room"] is None:
+                continue
+            counter += 1
+            group = {
+                "id": f"group_{counter:04d}",
+                "class_iri": item["class"],
+                "room": room_ids[item["room"]],
+                "start": item["start"],
+                "end": item["end"],
+                "students": list(enrollment.get(item["class"], ())),
+            }
+            f.write(json.dumps(group, separators=compact) + "\n")
+    return counter
+
+
+class StudentList(Sequence):
+    """Read-only view of a group's student IRIs through the shared student table."""
+
+    def __init__(self, table: List[str], ids: array):
+        self.table = table
+        self.ids = ids
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.table[s] for s in self.ids[i]]
+        return self.table[self.ids[i]]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        table = self.table
+        return (table[s] for s in self.ids)
+
+
+class CompactSchedule(Mapping):
+    """
+    A compact schedule file as a mapping of group id -> group, like exam_schedule.json.
+
+    Groups are built on access and their student lists are StudentList views,
+    so reading a file costs one int array per group. students and rooms are the
+    IRI tables; groups[id] is (class IRI, room index, start, end, student ids).
+    """
+
+    def __init__(self, students: List[str], rooms: List[str]):
+        self.students = students
+        self.rooms = rooms
+        self.groups: Dict[str, Tuple[str, int, str, str, array]] = {}
+
+    def __getitem__(self, group_id: str) -> dict:
+        class_iri, room, start, end, ids = self.groups[group_id]
+        return {
+            "students": StudentList(self.students, ids),
+            "room": {"room_iri": self.rooms[room], "start": start, "end": end},
+            "class_iri": class_iri,
+        }
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.groups)
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+
+def read_compact(lines: Iterable[str]) -> CompactSchedule:
+    lines = iter(lines)
+    header = json.loads(next(lines))
+    if header.get("format") != COMPACT_FORMAT or header.get("version") != COMPACT_VERSION:
+        raise ValueError(f"Not a {COMPACT_FORMAT} v{COMPACT_VERSION} file")
+
+    schedule = CompactSchedule(header["students"], header["rooms"])
+    for line in lines:
+        if not line.strip():
+            continue
+        group = json.loads(line)
+        schedule.groups[group["id"]] = (
+            group["class_iri"], group["room"], group["start"], group["end"], array("q", group["students"]),
+        )
+    return schedule
+
+
+def load_schedule(path) -> Union[dict, CompactSchedule]:
+    """Read either exam_schedule.json or its compact form, telling them apart by the first line."""
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        if first.startswith('{"format":"' + COMPACT_FORMAT + '"'):
+            return read_compact(chain([first], f))
+        f.seek(0)
+        return json.load(f)
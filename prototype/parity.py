@@ -0,0 +1,229 @@
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import tempfile
+
+from availability import DEFAULT_INDEX, INDEXES
+from benchmark import PHASES, SIZES
+from calendars import DEFAULT_ENGINE
+from generate import DatasetSpec, generate
+from state import ScheduleState
+from verify import ScheduleValidator
+
+import main
+import output
+
+# The Python scheduler against the C++ one in src/, on the same generated
+# terms. src/ is built with its Makefile into the work directory. The binary
+# reads ../data/ and writes exam_schedule.json into the directory it runs in,
+# so every size is laid out as <work>/<size>/data and <work>/<size>/cpp. The
+# Python side runs in process, phase by phase as in benchmark.py. Group ids
+# follow each scheduler's course order, so both outputs are normalised to
+# class IRI -> room, start, end and sorted students before they are diffed.
+# Both are then validated against the term's model and timed side by side.
+
+SOURCE = Path(__file__).resolve().parent.parent / "src"
+# the binary prints "total time for <name> <seconds> s" per phase
+CPP_PHASES = {"parsing": "load", "courses": "model", "scheduling": "schedule", "writing": "write"}
+CPP_TIME = re.compile(r"total time for (\w+) (\S+) s")
+
+# class IRI -> (room IRI, start, end, sorted student IRIs)
+Assignments = Dict[str, Tuple[str, str, str, Tuple[str, ...]]]
+
+
+@dataclass
+class SizeParity:
+    size: str
+    spec: dict
+    courses: int
+    # phase -> seconds; "process" is the binary's wall clock, start to exit
+    python: Dict[str, float] = field(default_factory=dict)
+    cpp: Dict[str, float] = field(default_factory=dict)
+    # classes placed identically by both
+    matched: int = 0
+    # class IRIs placed by one scheduler only, or in a different room or time
+    only_python: List[str] = field(default_factory=list)
+    only_cpp: List[str] = field(default_factory=list)
+    moved: List[str] = field(default_factory=list)
+    # classes whose student lists differ, wherever they were placed
+    rosters: List[str] = field(default_factory=list)
+    # "python"/"cpp" -> check name -> violations
+    violations: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def identical(self) -> bool:
+        return not (self.only_python or self.only_cpp or self.moved or self.rosters)
+
+
+def build(work: Path, source: Path = SOURCE) -> Path:
+    """Build src/ with its Makefile into work, unless the binary is newer than every source."""
+    binary = work / "main.exe"
+    sources = [path for pattern in ("*.cpp", "*.hpp", "Makefile") for path in source.glob(pattern)]
+    if binary.exists() and all(path.stat().st_mtime <= binary.stat().st_mtime for path in sources):
+        return binary
+    work.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["make", f"TARGET={binary}"], cwd=source, check=True)
+    return binary
+
+
+def normalise(groups) -> Assignments:
+    """exam_schedule.json groups keyed by class IRI, independent of group ids and roster order."""
+    return {
+        group["class_iri"]: (
+            group["room"]["room_iri"], group["room"]["start"], group["room"]["end"], tuple(sorted(group["students"]))
+        )
+        for group in groups.values()
+    }
+
+
+def diff(result: SizeParity, python: Assignments, cpp: Assignments) -> None:
+    """Fill in how the two normalised schedules agree."""
+    result.only_python = sorted(python.keys() - cpp.keys())
+    result.only_cpp = sorted(cpp.keys() - python.keys())
+    for cls_iri in sorted(python.keys() & cpp.keys()):
+        ours, theirs = python[cls_iri], cpp[cls_iri]
+        if ours[3] != theirs[3]:
+            result.rosters.append(cls_iri)
+        if ours[:3] != theirs[:3]:
+            result.moved.append(cls_iri)
+        elif ours[3] == theirs[3]:
+            result.matched += 1
+
+
+def run_python(directory: Path, engine: str = DEFAULT_ENGINE, index: str = DEFAULT_INDEX):
+    """Schedule the term in directory; returns (seconds per phase, model, path of the JSON written)."""
+    paths = [str(directory / "students.ttl"), str(directory / "classes.ttl"), str(directory / "rooms.ttl")]
+    out_path = directory.parent / "python" / "exam_schedule.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    seconds: Dict[str, float] = {}
+
+    def timed(phase, fn, *args):
+        t = perf_counter()
+        value = fn(*args)
+        seconds[phase] = perf_counter() - t
+        return value
+
+    graphs = timed("load", main.load_sources, *paths)
+    model = timed("model", main.model_from_graphs, *graphs)
+    del graphs
+    # the state is built inside the phase: the binary's scheduling timer covers its own setup as well
+    schedule = timed("schedule", lambda: main.schedule_greedy(model, ScheduleState.initial(model, engine, index=index)))
+    timed("write", output.write_json, out_path, schedule, model.enrollment)
+    return seconds, model, out_path
+
+
+def run_cpp(binary: Path, directory: Path):
+    """Run the binary on the term in directory, which must be called data; returns (seconds per phase, JSON path)."""
+    cwd = directory.parent / "cpp"
+    cwd.mkdir(parents=True, exist_ok=True)
+    t = perf_counter()
+    done = subprocess.run([str(binary)], cwd=cwd, capture_output=True, text=True)
+    elapsed = perf_counter() - t
+    if done.returncode != 0:
+        raise RuntimeError(f"{binary} failed on {directory}: {done.stderr.strip()}")
+
+    seconds: Dict[str, float] = {}
+    for name, value in CPP_TIME.findall(done.stdout):
+        phase = CPP_PHASES.get(name, name)
+        seconds[phase] = seconds.get(phase, 0.0) + float(value)
+    seconds["process"] = elapsed
+    return seconds, cwd / "exam_schedule.json"
+
+
+def violations(validator: ScheduleValidator, groups) -> Dict[str, int]:
+    return dict(Counter(violation.check for violation in validator.validate(groups)))
+
+
+def parity_size(name: str, spec: DatasetSpec, work: Path, binary: Path, engine: str = DEFAULT_ENGINE,
+                index: str = DEFAULT_INDEX) -> SizeParity:
+    directory = work / name / "data"
+    if not (directory / "spec.json").exists() or json.loads((directory / "spec.json").read_text()) != asdict(spec):
+        generate(spec, directory)
+
+    python_seconds, model, python_path = run_python(directory, engine, index)
+    cpp_seconds, cpp_path = run_cpp(binary, directory)
+    result = SizeParity(size=name, spec=asdict(spec), courses=len(model.courses),
+                        python=python_seconds, cpp=cpp_seconds)
+
+    validator = ScheduleValidator(model=model)
+    python_groups = output.load_schedule(python_path)
+    with open(cpp_path, "r", encoding="utf-8") as f:
+        cpp_groups = json.load(f)
+    result.violations = {"python": violations(validator, python_groups), "cpp": violations(validator, cpp_groups)}
+    diff(result, normalise(python_groups), normalise(cpp_groups))
+    return result
+
+
+def print_size(result: SizeParity, show: int = 0) -> None:
+    agreement = (f"matched={result.matched}/{result.courses}  moved={len(result.moved)}  "
+                 f"only_python={len(result.only_python)}  only_cpp={len(result.only_cpp)}  "
+                 f"rosters={len(result.rosters)}")
+    checks = "  ".join(
+        f"{side}={sum(found.values())}" + (f" ({', '.join(f'{k}={n}' for k, n in found.items())})" if found else "")
+        for side, found in result.violations.items()
+    )
+    print(f"{result.size:>5} | {agreement} | violations {checks}")
+    print(f"{'':>5} | {'phase':<8} {'python':>10} {'c++':>10} {'ratio':>8}")
+    for phase in PHASES + ("total",):
+        ours = sum(result.python.values()) if phase == "total" else result.python.get(phase)
+        theirs = sum(v for k, v in result.cpp.items() if k != "process") if phase == "total" else result.cpp.get(phase)
+        if ours is None or theirs is None:
+            continue
+        ratio = f"{ours / theirs:.1f}x" if theirs else "-"
+        print(f"{'':>5} | {phase:<8} {ours:>9.4f}s {theirs:>9.4f}s {ratio:>8}")
+
+    for label, classes in (("moved", result.moved), ("only python", result.only_python),
+                           ("only c++", result.only_cpp), ("roster differs", result.rosters)):
+        for cls_iri in classes[:show]:
+            print(f"{'':>5} | {label}: {cls_iri}")
+
+
+def run_parity(sizes: Sequence[str] = ("1k", "10k"), work: Optional[Path] = None, seed: int = 0,
+               engine: str = DEFAULT_ENGINE, index: str = DEFAULT_INDEX, source: Path = SOURCE,
+               show: int = 0) -> dict:
+    """Compare both schedulers on every named size and return the report that --out stores."""
+    work = Path(work) if work is not None else Path(tempfile.gettempdir()) / "ggs-parity"
+    binary = build(work, Path(source))
+    results: List[SizeParity] = []
+    for name in sizes:
+        result = parity_size(name, DatasetSpec.scaled(SIZES[name], seed), work, binary, engine, index)
+        results.append(result)
+        print_size(result, show)
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "engine": engine,
+        "index": index,
+        "results": [dict(asdict(result), identical=result.identical) for result in results],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff and time the Python and C++ schedulers on generated terms")
+    parser.add_argument("--sizes", default="1k,10k", help=f"comma separated, from {', '.join(SIZES)}")
+    parser.add_argument("--engine", default=DEFAULT_ENGINE)
+    parser.add_argument("--index", default=DEFAULT_INDEX, choices=INDEXES)
+    parser.add_argument("--work", help="where the binary and generated terms are kept between runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--src", default=str(SOURCE), help="the C++ sources to build")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="list up to N differing classes per kind")
+    parser.add_argument("--out", help="write the report as JSON here")
+    args = parser.parse_args()
+
+    report = run_parity(args.sizes.split(","), args.work, args.seed, args.engine, args.index, Path(args.src), args.show)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
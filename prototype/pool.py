@@ -0,0 +1,45 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+import multiprocessing
+import os
+
+# Process pools over one shared, read-only context (the model, its conflict
+# graph, settings). Workers get the context through fork where the platform
+# has it, or once per worker through the pool initializer otherwise, never
+# once per task; tasks themselves should be small (a name, a list of keys).
+
+_CONTEXT: Any = None
+
+
+def _init(context: Any) -> None:
+    global _CONTEXT
+    _CONTEXT = context
+
+
+def worker_context() -> Any:
+    """The context run_pool() was given, inside a task."""
+    return _CONTEXT
+
+
+def run_pool(fn: Callable[[Any], Any], tasks: Sequence[Any], context: Any, workers: Optional[int] = None) -> List[Any]:
+    """
+    fn(task) for every task, in task order, with worker_context() set to context.
+
+    fn must be a module level function so it can be sent to the workers.
+    One worker (or one task) runs everything in this process.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        _init(context)
+        return [fn(task) for task in tasks]
+    with executor(context, workers) as pool:
+        return list(pool.map(fn, tasks))
+
+
+def executor(context: Any, workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """A process pool whose tasks see context through worker_context(), for callers that keep it open."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        _init(context)
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    return ProcessPoolExecutor(workers, initializer=_init, initargs=(context,))
@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from availability import DEFAULT_INDEX
+from calendars import DEFAULT_ENGINE
+from conflicts import build_conflict_graph
+from diagnostics import Precheck
+from main import schedule_greedy
+from model import TermModel
+from ordering import ORDERINGS, get_ordering
+from pool import run_pool, worker_context
+from state import ScheduleState
+
+# Portfolio mode: run schedule_greedy under several course orderings on all
+# cores and keep the best schedule. Workers share the model and conflict graph
+# through pool.run_pool; tasks only carry the ordering name. Courses a precheck
+# ruled out are left out of every run, as in main's greedy pass.
+
+# (unscheduled courses, makespan in minutes, -room utilisation): lower is better
+Score = Tuple[int, int, float]
+
+
+@dataclass
+class PortfolioResult:
+    ordering: str
+    score: Score
+    schedule: List[dict]
+    # the best run's ScheduleState.placements, for ScheduleState.replay()
+    placements: Dict[str, Tuple[int, int, int]] = field(default_factory=dict)
+    scores: Dict[str, Score] = field(default_factory=dict)
+    # the best run's rejection counts per course it could not place, when asked for
+    failures: Optional[Dict[str, Dict[str, int]]] = None
+
+
+def score_state(model: TermModel, state: ScheduleState) -> Score:
+    placements = state.placements
+    unscheduled = len(model.courses) - len(placements)
+    if not placements:
+        return unscheduled, 0, 0.0
+
+    makespan = max(end for _, _, end in placements.values()) - min(start for _, start, _ in placements.values())
+    used = offered = 0
+    for cls_key, (room_index, start, end) in placements.items():
+        used += model.enrollment.count(cls_key) * (end - start)
+        offered += model.rooms[room_index].capacity * (end - start)
+    return unscheduled, makespan, -(used / offered if offered else 0.0)
+
+
+def default_orderings(seeds: int = 8) -> List[str]:
+    return list(ORDERINGS) + [f"random:{seed}" for seed in range(seeds)]
+
+
+def _run(name: str):
+    model, graph, engine, gaps, index, checked, diagnose = worker_context()
+    state = ScheduleState.initial(model, engine, graph=graph, gaps=gaps, index=index)
+    courses = get_ordering(name)(model, graph)
+    if checked is not None:
+        courses = checked.feasible(courses)
+    failures: Optional[Dict[str, Dict[str, int]]] = {} if diagnose else None
+    schedule = schedule_greedy(model, state, courses, failures=failures)
+    return name, score_state(model, state), schedule, state.placements, failures
+
+
+def schedule_portfolio(model: TermModel, orderings: Optional[Sequence[str]] = None, engine: str = DEFAULT_ENGINE,
+                       workers: Optional[int] = None, gaps: bool = False, index: str = DEFAULT_INDEX,
+                       checked: Optional[Precheck] = None, diagnose: bool = False) -> PortfolioResult:
+    """
+    Schedule model once per ordering and return the best run by Score.
+
+    Ties go to the ordering listed first, so "size" (the normal order) wins
+    unless another ordering is strictly better. With checked, its infeasible
+    courses are left out of every run (and of the schedule); with diagnose,
+    the result carries the best run's failures for diagnostics.explain().
+    """
+    if orderings is None:
+        orderings = default_orderings()
+    for name in orderings:
+        get_ordering(name)  # fail on a bad name before starting any workers
+    graph = build_conflict_graph(model.enrollment)
+    results = run_pool(_run, list(orderings), (model, graph, engine, gaps, index, checked, diagnose), workers)
+
+    scores = {name: score for name, score, _, _, _ in results}
+    name, score, schedule, placements, failures = min(results, key=lambda r: r[1])
+    return PortfolioResult(ordering=name, score=score, schedule=schedule, placements=placements, scores=scores,
+                           failures=failures)
@@ -0,0 +1,116 @@
+from random import Random
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from availability import START
+from conflicts import ConflictGraph, build_conflict_graph
+from main import schedule_greedy
+from model import Course, TermModel
+from state import ScheduleState
+
+# Anytime repair after the greedy pass. Each move picks an unscheduled course,
+# ejects the placed exams in the way of one slot it could use (its clashing
+# neighbours at that time, or the exam holding a big enough room) and
+# re-places the course and the ejected exams greedily. A move is kept when it
+# places the course without leaving more courses unscheduled than before;
+# ejected exams that could not go back become the next links of the chain.
+# Moves run on clones, so every state kept is a valid schedule.
+
+MAX_EJECTED = 3   # longer chains rarely pay off and make each move expensive
+CANDIDATES = 32   # free blocks looked at per move
+TABU_MOVES = 7    # a course just placed is not ejected again for this many moves
+
+
+def _missing(model: TermModel, state: ScheduleState) -> int:
+    return len(model.courses) - len(state.placements)
+
+
+def _blocking(state: ScheduleState, graph: ConflictGraph, cls_key: str, start: int, end: int) -> List[str]:
+    # placed neighbours whose exam overlaps [start, end)
+    placements = state.placements
+    return [
+        other for other in graph.get(cls_key, ())
+        if other in placements and placements[other][1] < end and start < placements[other][2]
+    ]
+
+
+def _victims(model: TermModel, state: ScheduleState, graph: ConflictGraph, course: Course,
+             rnd: Random, tabu: Dict[str, int], move: int) -> Optional[List[str]]:
+    cls_key, mins, need = str(course.uri), course.exam_minutes, course.need
+    free = []
+    if rnd.random() < 0.5:
+        for entry in state.index.candidates(need, mins):
+            free.append(entry)
+            if len(free) == CANDIDATES:
+                break
+
+    if free:
+        # a free block the course fits in but for student clashes
+        start = rnd.choice(free)[START]
+        victims = _blocking(state, graph, cls_key, start, start + mins)
+    else:
+        # room time held by another exam in a big enough room
+        held = [
+            key for key, (room_index, _, _) in state.placements.items()
+            if model.rooms[room_index].capacity >= need
+        ]
+        if not held:
+            return None
+        victim = rnd.choice(held)
+        start = state.placements[victim][1]
+        victims = [victim] + [key for key in _blocking(state, graph, cls_key, start, start + mins) if key != victim]
+
+    if not victims or len(victims) > MAX_EJECTED or any(tabu.get(key, 0) > move for key in victims):
+        return None
+    return victims
+
+
+def repair(model: TermModel, state: ScheduleState, budget: float = 1.0, seed: int = 0,
+           graph: Optional[ConflictGraph] = None, max_moves: Optional[int] = None) -> ScheduleState:
+    """
+    Try to place the courses state left unscheduled, for at most budget seconds.
+
+    Returns the best state found so far (fewest unscheduled courses); state
+    itself is not modified. max_moves bounds the search independently of the
+    clock, for reproducible runs.
+    """
+    deadline = perf_counter() + budget
+    rnd = Random(seed)
+    if graph is None:
+        graph = build_conflict_graph(model.enrollment)
+    courses: Dict[str, Course] = {str(course.uri): course for course in model.courses}
+
+    best = current = state
+    best_missing = current_missing = _missing(model, state)
+    tabu: Dict[str, int] = {}
+    chain: List[str] = []
+    move = 0
+
+    while best_missing and perf_counter() < deadline and (max_moves is None or move < max_moves):
+        move += 1
+        chain = [key for key in chain if key not in current.placements]
+        if chain:
+            target = chain.pop()
+        else:
+            target = rnd.choice([key for key in courses if key not in current.placements])
+
+        victims = _victims(model, current, graph, courses[target], rnd, tabu, move)
+        if victims is None:
+            continue
+
+        trial = current.clone()
+        for key in victims:
+            trial.unplace(key)
+        schedule_greedy(model, trial, [courses[target]] + [courses[key] for key in victims])
+
+        trial_missing = _missing(model, trial)
+        if target not in trial.placements or trial_missing > current_missing:
+            continue
+
+        current, current_missing = trial, trial_missing
+        tabu[target] = move + TABU_MOVES
+        chain.extend(key for key in victims if key not in trial.placements)
+        if current_missing < best_missing:
+            best, best_missing = current, current_missing
+
+    return best
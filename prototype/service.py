@@ -0,0 +1,377 @@
+from datetime import datetime
+from http import HTTPStatus
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import argparse
+import asyncio
+import json
+
+from calendars import DEFAULT_ENGINE, ENGINES
+from conflicts import build_conflict_graph
+from incremental import AddEnrollment, CloseRoom, Delta, DropEnrollment, ExtendAvailability, Rescheduler
+from main import data_directory, load_model, schedule_greedy
+from model import iso_from_minutes, to_minutes
+from ordering import get_ordering
+from pool import executor, worker_context
+from state import ScheduleState
+
+import output
+
+# A local scheduling service that loads a term once and keeps it warm. It
+# speaks plain HTTP/1.1 with JSON bodies, on a TCP port or a Unix socket:
+#
+#   GET  /status                     term size and what is scheduled
+#   POST /schedule    {"ordering", "repair_budget"}   schedule the term, keep the result
+#   GET  /schedule                   the kept schedule, shaped like exam_schedule.json
+#   POST /reschedule  {"overrides": [...]}            what-if: incremental.py deltas on the kept schedule
+#   POST /validate    {"schedule", "checks"}          verify.py checks, the kept schedule by default
+#   GET  /student?iri=...            one student's exams in the kept schedule
+#
+# The event loop only parses requests and answers lookups; scheduling,
+# rescheduling and validation run on a process pool whose workers got the model
+# once at startup (pool.executor), so no request reparses anything. Overrides
+# are deltas like {"type": "add", "student": IRI, "class_iri": IRI}, "drop"
+# likewise, {"type": "close", "room_iri": IRI, "start": ISO, "end": ISO} (times
+# optional) and {"type": "extend", "room_iri": IRI, "start": ISO, "end": ISO}.
+
+DEFAULT_PORT = 8765
+Placement = Tuple[int, int, int]
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _minutes(value: str) -> int:
+    try:
+        return to_minutes(datetime.fromisoformat(value))
+    except (TypeError, ValueError):
+        raise BadRequest(f"Not an ISO date/time: {value!r}") from None
+
+
+def parse_delta(data: dict) -> Delta:
+    """An incremental.py delta from its JSON form."""
+    try:
+        kind = data["type"]
+        if kind in ("add", "drop"):
+            return (AddEnrollment if kind == "add" else DropEnrollment)(data["student"], data["class_iri"])
+        if kind == "close":
+            start, end = data.get("start"), data.get("end")
+            return CloseRoom(data["room_iri"], None if start is None else _minutes(start),
+                             None if end is None else _minutes(end))
+        if kind == "extend":
+            return ExtendAvailability(data["room_iri"], _minutes(data["start"]), _minutes(data["end"]))
+    except (KeyError, TypeError) as e:
+        raise BadRequest(f"Bad override {data!r}: missing {e}") from None
+    raise BadRequest(f"Unknown override type: {kind!r} (expected add, drop, close or extend)")
+
+
+# jobs, run in the pool's workers against worker_context() = (model, graph, engine, gaps)
+
+_validator = None
+
+
+def _schedule_job(ordering: str, repair_budget: float) -> Dict[str, Placement]:
+    model, graph, engine, gaps = worker_context()
+    state = ScheduleState.initial(model, engine, graph=graph, gaps=gaps)
+    schedule_greedy(model, state, get_ordering(ordering)(model, graph))
+    if repair_budget > 0 and len(state.placements) < len(model.courses):
+        from repair import repair
+        state = repair(model, state, repair_budget, graph=graph)
+    return state.placements
+
+
+def _reschedule_job(placements: Dict[str, Placement], deltas: List[Delta]) -> Tuple[List[dict], int]:
+    model, graph, engine, gaps = worker_context()
+    state, _ = ScheduleState.replay(model, placements, engine, graph, gaps)
+    rescheduler = Rescheduler(model, state)
+    changes = rescheduler.apply(*deltas)
+    return [change.to_dict() for change in changes], len(rescheduler.state.placements)
+
+
+def _validate_job(schedule, checks: Optional[List[str]]) -> List[dict]:
+    global _validator
+    if _validator is None:
+        from verify import ScheduleValidator
+        _validator = ScheduleValidator(model=worker_context()[0])
+    return [violation.to_dict() for violation in _validator.validate(schedule, checks)]
+
+
+class SchedulerService:
+    """
+    The warm term and the schedule kept for it, answering requests by route.
+
+    Only the event loop touches the kept schedule. A newer POST /schedule
+    replaces it when it finishes, an older one that finishes later does not.
+    """
+
+    def __init__(self, directory: str = data_directory, engine: str = DEFAULT_ENGINE, gaps: bool = False,
+                 workers: Optional[int] = None, cache: bool = True):
+        start = perf_counter()
+        self.model = load_model(directory, cache)
+        self.engine = engine
+        self.gaps = gaps
+        graph = build_conflict_graph(self.model.enrollment)
+        # build the student lookup tables now rather than on the first /student request
+        self.model.enrollment.student_id("")
+        self.model.enrollment.transpose
+        self.pool = executor((self.model, graph, engine, gaps), workers)
+        self.load_seconds = perf_counter() - start
+
+        self.placements: Optional[Dict[str, Placement]] = None
+        self.group_ids: Dict[str, str] = {}
+        self.started = 0  # number of the latest POST /schedule
+        self.kept = 0  # number of the POST /schedule the kept schedule came from
+
+        self.routes = {
+            ("GET", "/status"): self.status,
+            ("POST", "/schedule"): self.schedule,
+            ("GET", "/schedule"): self.get_schedule,
+            ("POST", "/reschedule"): self.reschedule,
+            ("POST", "/validate"): self.validate,
+            ("GET", "/student"): self.student,
+        }
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    def _keep(self, placements: Dict[str, Placement]) -> None:
+        self.placements = placements
+        self.group_ids = {}
+        for course in self.model.courses:
+            cls_key = str(course.uri)
+            if cls_key in placements:
+                self.group_ids[cls_key] = f"group_{len(self.group_ids) + 1:04d}"
+
+    def _items(self) -> List[dict]:
+        rooms = self.model.rooms
+        items = []
+        for course in self.model.courses:
+            cls_key = str(course.uri)
+            placed = self.placements.get(cls_key)
+            if placed is None:
+                items.append({"class": cls_key, "room": None, "start": None, "end": None})
+            else:
+                room_index, start, end = placed
+                items.append({"class": cls_key, "room": str(rooms[room_index].uri),
+                              "start": iso_from_minutes(start, self.model.utc_offset),
+                              "end": iso_from_minutes(end, self.model.utc_offset)})
+        return items
+
+    async def _ensure_schedule(self) -> None:
+        if self.placements is None:
+            await self.schedule({}, {})
+
+    async def status(self, query: dict, body: dict) -> dict:
+        model = self.model
+        return {
+            "rooms": len(model.rooms),
+            "courses": len(model.courses),
+            "students": len(model.enrollment.students),
+            "engine": self.engine,
+            "gaps": self.gaps,
+            "load_seconds": round(self.load_seconds, 6),
+            "scheduled": None if self.placements is None else len(self.placements),
+        }
+
+    async def schedule(self, query: dict, body: dict) -> dict:
+        ordering = str(body.get("ordering", "size"))
+        try:
+            get_ordering(ordering)
+        except ValueError as e:
+            raise BadRequest(str(e)) from None
+        try:
+            repair_budget = float(body.get("repair_budget", 0.0))
+        except (TypeError, ValueError):
+            raise BadRequest(f'"repair_budget" must be a number of seconds, not {body.get("repair_budget")!r}') from None
+
+        self.started += 1
+        number = self.started
+        start = perf_counter()
+        placements = await self._run(_schedule_job, ordering, repair_budget)
+        seconds = perf_counter() - start
+        if number > self.kept:
+            self.kept = number
+            self._keep(placements)
+        return {
+            "ordering": ordering,
+            "scheduled": len(placements),
+            "unscheduled": len(self.model.courses) - len(placements),
+            "unscheduled_classes": [str(c.uri) for c in self.model.courses if str(c.uri) not in placements],
+            "seconds": round(seconds, 6),
+        }
+
+    async def get_schedule(self, query: dict, body: dict) -> dict:
+        await self._ensure_schedule()
+        return dict(output.iter_groups(self._items(), self.model.enrollment))
+
+    async def reschedule(self, query: dict, body: dict) -> dict:
+        overrides = body.get("overrides")
+        if not isinstance(overrides, list) or not overrides:
+            raise BadRequest('"overrides" must be a non-empty list')
+        deltas = [parse_delta(data) for data in overrides]
+        await self._ensure_schedule()
+        start = perf_counter()
+        try:
+            changes, scheduled = await self._run(_reschedule_job, self.placements, deltas)
+        except KeyError as e:
+            raise BadRequest(f"Unknown room in overrides: {e}") from None
+        return {
+            "changes": changes,
+            "scheduled": scheduled,
+            "unscheduled": len(self.model.courses) - scheduled,
+            "seconds": round(perf_counter() - start, 6),
+        }
+
+    async def validate(self, query: dict, body: dict) -> dict:
+        schedule = body.get("schedule")
+        checks = body.get("checks")
+        if checks is not None:
+            from verify import CHECK_NAMES
+            if not isinstance(checks, list) or not all(isinstance(name, str) for name in checks):
+                raise BadRequest('"checks" must be a list of check names')
+            unknown = [name for name in checks if name not in CHECK_NAMES]
+            if unknown:
+                raise BadRequest(f"Unknown checks: {', '.join(unknown)} (expected any of {', '.join(CHECK_NAMES)})")
+        if schedule is None:
+            await self._ensure_schedule()
+            schedule = self._items()
+        violations = await self._run(_validate_job, schedule, checks)
+        return {"valid": not violations, "violations": violations}
+
+    async def student(self, query: dict, body: dict) -> dict:
+        iri = (query.get("iri") or [None])[0]
+        if iri is None:
+            raise BadRequest("student needs ?iri=")
+        enrollment = self.model.enrollment
+        s = enrollment.student_id(iri)
+        if s is None:
+            raise LookupError(f"Unknown student: {iri}")
+        await self._ensure_schedule()
+
+        exams, unscheduled = [], []
+        for c in enrollment.classes_of(s):
+            cls_key = enrollment.classes[c]
+            placed = self.placements.get(cls_key)
+            if placed is None:
+                unscheduled.append(cls_key)
+                continue
+            room_index, start, end = placed
+            exams.append({
+                "group_id": self.group_ids[cls_key],
+                "class_iri": cls_key,
+                "room_iri": str(self.model.rooms[room_index].uri),
+                "start": iso_from_minutes(start, self.model.utc_offset),
+                "end": iso_from_minutes(end, self.model.utc_offset),
+            })
+        exams.sort(key=lambda exam: (exam["start"], exam["class_iri"]))
+        return {"student": iri, "exams": exams, "unscheduled": unscheduled}
+
+    async def dispatch(self, method: str, target: str, raw: bytes) -> Tuple[int, object]:
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            known = any(path == url.path for _, path in self.routes)
+            status = HTTPStatus.METHOD_NOT_ALLOWED if known else HTTPStatus.NOT_FOUND
+            return status, {"error": f"{method} {url.path} is not a route"}
+        try:
+            body = json.loads(raw) if raw.strip() else {}
+            if not isinstance(body, dict):
+                raise BadRequest("The request body must be a JSON object")
+            return HTTPStatus.OK, await handler(parse_qs(url.query), body)
+        except (BadRequest, json.JSONDecodeError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except LookupError as e:
+            return HTTPStatus.NOT_FOUND, {"error": str(e)}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, payload: object, keep_alive: bool) -> None:
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+        )
+        await writer.drain()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 with Content-Length bodies and keep-alive, which is all the registrar tooling sends
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                parts = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if not header.strip():
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length") or "0"
+                if len(parts) != 3 or not length.isdigit():
+                    # no way to tell where the next request would start, so answer and hang up
+                    if len(parts) != 3:
+                        error = f"Malformed request line: {line.strip()!r}"
+                    else:
+                        error = f"Bad Content-Length: {length!r}"
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": error}, keep_alive=False)
+                    break
+                method, target, version = parts
+                raw = await reader.readexactly(int(length))
+
+                status, payload = await self.dispatch(method, target, raw)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service: SchedulerService, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                unix: Optional[str] = None, warm: bool = True) -> None:
+    """Serve until cancelled; with warm, the default schedule is made before the first request."""
+    if warm:
+        await service.schedule({}, {})
+    if unix is not None:
+        server = await asyncio.start_unix_server(service.handle_connection, unix)
+        where = unix
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Serving {len(service.model.courses)} courses on {where} (loaded in {service.load_seconds:.3f}s)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep a term loaded and answer scheduling requests over HTTP")
+    parser.add_argument("--data", default=data_directory, help="directory with students.ttl, classes.ttl, rooms.ttl")
+    parser.add_argument("--engine", default=DEFAULT_ENGINE, choices=ENGINES)
+    parser.add_argument("--gaps", action="store_true")
+    parser.add_argument("--workers", type=int, help="scheduling processes, every core by default")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="rebuild the model from the TTL files")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    args = parser.parse_args()
+
+    service = SchedulerService(args.data, args.engine, args.gaps, args.workers, args.cache)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
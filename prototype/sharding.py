@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from heapq import heapify, heapreplace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import os
+
+from availability import DEFAULT_INDEX
+from calendars import DEFAULT_ENGINE
+from conflicts import ConflictGraph, build_conflict_graph, connected_components
+from diagnostics import Precheck
+from main import schedule_greedy
+from model import Course, TermModel
+from pool import run_pool, worker_context
+from state import ScheduleState
+
+# Sharded mode: classes in different components of the conflict graph share no
+# students, so groups of components can be scheduled greedily in parallel, each
+# against all the rooms. Shard placements can then only collide on room time:
+# merge replays them shard by shard, each in model course order, and keeps a
+# placement only while its room block is still free. The losers of those
+# clashes and whatever a shard could not place are then placed greedily, in
+# model course order, against the room time left over. That can still lose
+# classes one serial pass would have placed (a big loser finds the big rooms
+# taken by smaller exams), so a merge that leaves classes unscheduled is checked
+# against one serial greedy pass and the better schedule kept. The result only
+# depends on the model and the shard count, not on the number of workers.
+# Courses a precheck ruled out are never tried, as in main's greedy pass.
+
+Placement = Tuple[int, int, int]  # (room index, start, end) as in ScheduleState.placements
+
+
+@dataclass
+class Shard:
+    courses: List[str]  # class IRIs, in model course order
+
+
+@dataclass
+class ShardedResult:
+    schedule: List[dict]
+    state: ScheduleState
+    shards: int
+    components: int
+    # courses that lost a room clash in the merge or were left unscheduled by their shard, placed again greedily
+    retried: int
+    # the merge left more classes unscheduled than one serial greedy pass, whose schedule this is
+    serial: bool = False
+
+
+def make_shards(model: TermModel, graph: ConflictGraph, count: int) -> Tuple[List[Shard], int]:
+    """
+    Pack the conflict graph's components into at most count shards of similar work.
+
+    Work is enrolment plus one per class. Largest components go first, each to
+    the lightest shard; ties break on position, so the packing only depends on
+    the model. Returns the shards and the number of components.
+    """
+    order = [str(course.uri) for course in model.courses]
+    position = {cls: i for i, cls in enumerate(order)}
+    components = connected_components(graph, order)
+    enrollment = model.enrollment
+
+    def work(component):
+        return sum(enrollment.count(cls) + 1 for cls in component)
+
+    components.sort(key=lambda component: (-work(component), position[component[0]]))
+    count = max(1, min(count, len(components)))
+    if count == 1:
+        return [Shard(order)], len(components)
+
+    loads: List[Tuple[int, int]] = [(0, s) for s in range(count)]
+    heapify(loads)
+    shards = [Shard([]) for _ in range(count)]
+    for component in components:
+        load, s = loads[0]
+        shards[s].courses.extend(component)
+        heapreplace(loads, (load + work(component), s))
+    for shard in shards:
+        shard.courses.sort(key=position.__getitem__)
+    return shards, len(components)
+
+
+def _feasible(model: TermModel, checked: Optional[Precheck]) -> Sequence[Course]:
+    return model.courses if checked is None else checked.feasible(model.courses)
+
+
+def _run_shard(shard: Shard) -> Dict[str, Placement]:
+    model, graph, engine, gaps, index, checked = worker_context()
+    by_key = {str(course.uri): course for course in model.courses}
+    state = ScheduleState.initial(model, engine, graph=graph, gaps=gaps, index=index)
+    courses = [by_key[key] for key in shard.courses]
+    schedule_greedy(model, state, courses if checked is None else checked.feasible(courses))
+    return state.placements
+
+
+def merge(model: TermModel, shard_placements: Sequence[Dict[str, Placement]], engine: str = DEFAULT_ENGINE,
+          graph: Optional[ConflictGraph] = None, gaps: bool = False, index: str = DEFAULT_INDEX,
+          checked: Optional[Precheck] = None,
+          failures: Optional[Dict[str, Dict[str, int]]] = None) -> Tuple[ScheduleState, int]:
+    """
+    One state holding the shard placements that survive the merge, with the rest placed greedily.
+
+    Shards are replayed in order, each in model course order. A placement
+    whose room block an earlier one already took (or whose students are
+    booked, only possible if the shards overlap) loses and is placed greedily
+    afterwards, together with the courses no shard placed (but not the ones
+    checked ruled out). failures is passed on to that greedy pass. Returns the
+    state and the number of courses placed that way.
+    """
+    position = {str(course.uri): i for i, course in enumerate(model.courses)}
+    state = ScheduleState.initial(model, engine, graph=graph, gaps=gaps, index=index)
+    for placements in shard_placements:
+        for cls_key in sorted(placements, key=position.__getitem__):
+            slot = placements[cls_key]
+            entry = state.index.block_containing(*slot)
+            if entry is None or cls_key in state.placements:
+                continue
+            state.calendar.prepare(cls_key, model.enrollment.get(cls_key, ()))
+            if state.calendar.fits(slot[1], slot[2]):
+                state.place(cls_key, entry, slot[1], slot[2])
+    leftovers = [course for course in _feasible(model, checked) if str(course.uri) not in state.placements]
+    schedule_greedy(model, state, leftovers, failures=failures)
+    return state, len(leftovers)
+
+
+def schedule_sharded(model: TermModel, engine: str = DEFAULT_ENGINE, workers: Optional[int] = None,
+                     shards: Optional[int] = None, gaps: bool = False, index: str = DEFAULT_INDEX,
+                     checked: Optional[Precheck] = None,
+                     failures: Optional[Dict[str, Dict[str, int]]] = None) -> ShardedResult:
+    """
+    Schedule groups of conflict-graph components in parallel and merge them.
+
+    shards defaults to workers, which defaults to every core. A term whose
+    classes form one component (or shards=1) gets the ordinary greedy schedule,
+    and no term gets more classes unscheduled than it would get from that.
+    With checked, its infeasible courses are never tried; failures is filled
+    for the courses the returned schedule leaves unscheduled.
+    """
+    graph = build_conflict_graph(model.enrollment)
+    packed, components = make_shards(model, graph, shards or workers or os.cpu_count() or 1)
+    results = run_pool(_run_shard, packed, (model, graph, engine, gaps, index, checked), workers)
+    merged: Optional[Dict[str, Dict[str, int]]] = None if failures is None else {}
+    state, retried = merge(model, results, engine, graph, gaps, index, checked, merged)
+    serial = False
+    courses = _feasible(model, checked)
+    if len(packed) > 1 and len(state.placements) < len(courses):
+        single = ScheduleState.initial(model, engine, graph=graph, gaps=gaps, index=index)
+        rejected: Optional[Dict[str, Dict[str, int]]] = None if failures is None else {}
+        schedule_greedy(model, single, courses, failures=rejected)
+        if len(single.placements) > len(state.placements):
+            state, serial, merged = single, True, rejected
+    if failures is not None:
+        failures.update(merged)
+    return ShardedResult(
+        schedule=state.schedule(),
+        state=state,
+        shards=len(packed),
+        components=components,
+        retried=retried,
+        serial=serial,
+    )
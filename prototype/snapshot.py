@@ -0,0 +1,166 @@
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+from enrollment import Enrollment
+from model import Course, Room, TermModel
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+# Compiled snapshot of a TermModel. Layout:
+#   MAGIC | u64 header length | JSON header | zero padding to 8 bytes | int64 columns
+# The header holds the source digest, the term's UTC offset, the interned string
+# table and, per column, its (offset, count) in the int64 area. Every IRI is
+# stored once and referenced by index. Columns are native-endian, snapshots are a local cache and not an
+# interchange format.
+
+MAGIC = b"GGSNAP01"
+FORMAT_VERSION = 3
+SUFFIX = ".snap"
+
+
+def source_digest(paths: Sequence[str]) -> str:
+    digest = hashlib.sha256(f"ggsnap{FORMAT_VERSION}".encode())
+    for path in paths:
+        digest.update(Path(path).name.encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_snapshot(path: Path, model: TermModel, digest: str) -> None:
+    strings: Dict[str, int] = {}
+
+    def intern(value) -> int:
+        return strings.setdefault(str(value), len(strings))
+
+    columns: Dict[str, array] = {name: array("q") for name in (
+        "room_iri", "room_capacity", "room_blocks", "block_start", "block_end",
+        "course_iri", "course_minutes", "course_enrollment", "course_min_capacity",
+        "class_iri", "class_students", "student_ids", "student_iri",
+    )}
+
+    columns["room_blocks"].append(0)
+    for room in model.rooms:
+        columns["room_iri"].append(intern(room.uri))
+        columns["room_capacity"].append(room.capacity)
+        columns["block_start"].extend(room.free_starts)
+        columns["block_end"].extend(room.free_ends)
+        columns["room_blocks"].append(len(columns["block_start"]))
+
+    for course in model.courses:
+        columns["course_iri"].append(intern(course.uri))
+        columns["course_minutes"].append(course.exam_minutes)
+        columns["course_enrollment"].append(course.enrollment)
+        columns["course_min_capacity"].append(course.min_room_capacity)
+
+    # enrollment CSR as is: student_ids[class_students[i]:class_students[i + 1]] are
+    # positions in student_iri, which in turn index the string table
+    enrollment = model.enrollment.compacted()
+    columns["class_iri"].extend(intern(cls) for cls in enrollment.classes)
+    columns["student_iri"].extend(intern(stu) for stu in enrollment.students)
+    columns["class_students"] = enrollment.indptr
+    columns["student_ids"] = enrollment.indices
+
+    layout = {}
+    offset = 0
+    for name, column in columns.items():
+        layout[name] = [offset, len(column)]
+        offset += len(column)
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "digest": digest,
+        "utc_offset": model.utc_offset,
+        "strings": list(strings),
+        "columns": layout,
+    }).encode("utf-8")
+    padding = -(len(MAGIC) + 8 + len(header)) % 8
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * padding)
+        for column in columns.values():
+            column.tofile(f)
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: Path) -> TermModel:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a schedule snapshot")
+        (header_len,) = struct.unpack_from("<Q", mm, len(MAGIC))
+        body = len(MAGIC) + 8 + header_len
+        header = json.loads(mm[len(MAGIC) + 8:body])
+        body += -body % 8
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot version {header.get('version')}")
+
+        # one copy of the whole int64 area, then columns are plain slices of it
+        data = array("q")
+        data.frombytes(mm[body:])
+
+    strings: List[str] = header["strings"]
+
+    def column(name: str) -> array:
+        offset, count = header["columns"][name]
+        return data[offset:offset + count]
+
+    rooms: List[Room] = []
+    room_blocks = column("room_blocks")
+    block_start, block_end = column("block_start"), column("block_end")
+    for i, (iri, cap) in enumerate(zip(column("room_iri"), column("room_capacity"))):
+        lo, hi = room_blocks[i], room_blocks[i + 1]
+        rooms.append(Room(
+            uri=strings[iri],
+            capacity=cap,
+            free_starts=block_start[lo:hi],
+            free_ends=block_end[lo:hi],
+        ))
+
+    courses = [
+        Course(uri=strings[iri], exam_minutes=minutes, enrollment=enrolled, min_room_capacity=min_cap)
+        for iri, minutes, enrolled, min_cap in zip(
+            column("course_iri"), column("course_minutes"),
+            column("course_enrollment"), column("course_min_capacity"))
+    ]
+
+    enrollment = Enrollment(
+        students=[strings[i] for i in column("student_iri")],
+        classes=[strings[i] for i in column("class_iri")],
+        indptr=column("class_students"),
+        indices=column("student_ids"),
+    )
+
+    return TermModel(rooms=rooms, courses=courses, enrollment=enrollment, utc_offset=header.get("utc_offset"))
+
+
+def load_or_build(paths: Sequence[str], cache_dir: Path, build: Callable[[], TermModel]) -> TermModel:
+    """
+    Return the model for paths from cache_dir, calling build() and caching the
+    result when no snapshot matches the current content of the files.
+    """
+    digest = source_digest(paths)
+    path = Path(cache_dir) / (digest + SUFFIX)
+
+    if path.exists():
+        try:
+            return load_snapshot(path)
+        except (ValueError, KeyError, OSError):
+            pass  # unreadable snapshot, rebuild it
+
+    model = build()
+    save_snapshot(path, model, digest)
+    for old in Path(cache_dir).glob("*" + SUFFIX):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return model
@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional, Tuple
+
+from availability import DEFAULT_INDEX, AvailabilityIndex, make_index
+from calendars import DEFAULT_ENGINE, make_calendar
+from conflicts import ConflictGraph
+from model import Course, TermModel, iso_from_minutes
+
+
+class ScheduleState:
+    """
+    The mutable side of a scheduling run, kept apart from the immutable TermModel.
+
+    Holds the free room blocks, the conflict calendar and the placements made
+    so far (class IRI -> (room index, start, end)). schedule_greedy only ever
+    changes the state it is given; clone() first to keep a state around, e.g.
+    to run several what-if schedules from the same starting point.
+
+    With gaps set, schedule_greedy places an exam at the earliest conflict free
+    start inside a free block rather than only at the block's start. It is off
+    by default so the schedule stays the same as the C++ scheduler's.
+    """
+
+    def __init__(self, model: TermModel, index: AvailabilityIndex, calendar,
+                 placements: Optional[Dict[str, Tuple[int, int, int]]] = None, gaps: bool = False):
+        self.model = model
+        self.index = index
+        self.calendar = calendar
+        self.placements: Dict[str, Tuple[int, int, int]] = placements if placements is not None else {}
+        self.gaps = gaps
+
+    @classmethod
+    def initial(cls, model: TermModel, engine: str = DEFAULT_ENGINE, tick: Optional[int] = None,
+                graph: Optional[ConflictGraph] = None, gaps: bool = False, index: str = DEFAULT_INDEX) -> "ScheduleState":
+        """Empty state: every room block free, nobody booked. index is an availability.INDEXES kind."""
+        calendar = make_calendar(engine, model.rooms, model.courses, model.enrollment, tick, graph)
+        return cls(model, make_index(index, model.rooms), calendar, gaps=gaps)
+
+    @classmethod
+    def replay(cls, model: TermModel, placements: Dict[str, Tuple[int, int, int]], engine: str = DEFAULT_ENGINE,
+               graph: Optional[ConflictGraph] = None, gaps: bool = False,
+               index: str = DEFAULT_INDEX) -> Tuple["ScheduleState", List[Course]]:
+        """
+        A state holding the placements that are still valid for model, and the courses left unplaced.
+
+        Placements are replayed in model course order; one whose room is too
+        small, or whose room time or students are already taken, is dropped.
+        index is the availability.INDEXES kind, as for initial().
+        """
+        state = cls.initial(model, engine, graph=graph, gaps=gaps, index=index)
+        unplaced = []
+        for course in model.courses:
+            cls_key = str(course.uri)
+            slot = placements.get(cls_key)
+            entry = None
+            if slot is not None and 0 <= slot[0] < len(model.rooms) and model.rooms[slot[0]].capacity >= course.need:
+                entry = state.index.block_containing(*slot)
+            if entry is not None:
+                state.calendar.prepare(cls_key, model.enrollment.get(cls_key, ()))
+                if state.calendar.fits(slot[1], slot[2]):
+                    state.place(cls_key, entry, slot[1], slot[2])
+                    continue
+            unplaced.append(course)
+        return state, unplaced
+
+    def clone(self) -> "ScheduleState":
+        return ScheduleState(self.model, self.index.clone(), self.calendar.clone(), dict(self.placements), self.gaps)
+
+    def place(self, cls_key: str, entry: list, start: int, end: int) -> None:
+        """Book [start, end) inside the free block entry; calendar.prepare() must be for cls_key."""
+        self.index.take(entry, start, end)
+        self.calendar.commit(start, end)
+        self.placements[cls_key] = (entry[1], start, end)
+
+    def unplace(self, cls_key: str) -> None:
+        """Undo place(): free the room time and take the class off the calendar."""
+        room_index, start, end = self.placements.pop(cls_key)
+        self.calendar.prepare(cls_key, self.model.enrollment.get(cls_key, ()))
+        self.calendar.release(start, end)
+        self.index.add_free(room_index, start, end)
+
+    def schedule(self) -> List[dict]:
+        """Placements in schedule_greedy's item format, in the model's course order."""
+        items = []
+        for course in self.model.courses:
+            cls_key = str(course.uri)
+            placed = self.placements.get(cls_key)
+            if placed is None:
+                items.append({"class": cls_key, "room": None, "start": None, "end": None})
+                continue
+            room_index, start, end = placed
+            items.append({
+                "class": cls_key,
+                "room": str(self.model.rooms[room_index].uri),
+                "start": iso_from_minutes(start, self.model.utc_offset),
+                "end": iso_from_minutes(end, self.model.utc_offset)
+            })
+        return items
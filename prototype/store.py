@@ -0,0 +1,326 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import argparse
+import json
+import sqlite3
+
+from availability import DEFAULT_INDEX
+from calendars import DEFAULT_ENGINE
+from model import TermModel, iso_from_minutes, to_minutes
+from state import ScheduleState
+
+# A schedule kept in SQLite so single lookups ("where is this student's exam",
+# "what is in this room on Tuesday") are an index probe, not a parse of
+# exam_schedule.json. Times are stored as epoch minutes and only turned into
+# ISO strings on the way out. save() writes a whole state in one transaction;
+# update() rewrites only the classes and rooms an incremental change touched,
+# and load_state() turns the stored placements back into a ScheduleState so a
+# run can resume from them.
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rooms (id INTEGER PRIMARY KEY, iri TEXT NOT NULL UNIQUE, capacity INTEGER NOT NULL);
+-- the term's room availability, and what of it is still free after the placements
+CREATE TABLE IF NOT EXISTS availability (room_id INTEGER NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS free (room_id INTEGER NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL);
+-- one row per class; room_id, start and end are NULL while it is unscheduled
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    group_id TEXT UNIQUE,
+    class_iri TEXT NOT NULL UNIQUE,
+    room_id INTEGER,
+    start INTEGER,
+    end INTEGER
+);
+CREATE TABLE IF NOT EXISTS students (id INTEGER PRIMARY KEY, iri TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS enrolled (
+    student_id INTEGER NOT NULL,
+    class_id INTEGER NOT NULL,
+    seat INTEGER NOT NULL,  -- position in the class roster, the order exam_schedule.json lists students in
+    PRIMARY KEY (student_id, class_id)
+) WITHOUT ROWID;
+"""
+
+# created after the bulk insert in save(), which is cheaper than maintaining them row by row
+INDEXES = """
+CREATE INDEX IF NOT EXISTS availability_room ON availability (room_id, start);
+CREATE INDEX IF NOT EXISTS free_room ON free (room_id, start);
+CREATE INDEX IF NOT EXISTS groups_room ON groups (room_id, start);
+CREATE INDEX IF NOT EXISTS enrolled_class ON enrolled (class_id, seat);
+"""
+
+EXAM_QUERY = """
+SELECT g.group_id, g.class_iri, r.iri, g.start, g.end FROM groups g JOIN rooms r ON r.id = g.room_id
+"""
+
+Time = Union[int, str, datetime]  # epoch minutes, an ISO string or a datetime
+
+
+def _minutes(value: Time) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return to_minutes(value)
+
+
+def _exam(row, offset: Optional[int] = None) -> dict:
+    group_id, class_iri, room_iri, start, end = row
+    return {
+        "group_id": group_id,
+        "class_iri": class_iri,
+        "room_iri": room_iri,
+        "start": iso_from_minutes(start, offset),
+        "end": iso_from_minutes(end, offset),
+    }
+
+
+class ScheduleStore:
+    """
+    A schedule database at path, created on first use.
+
+    save() numbers group ids in the order of the schedule it is given, so they
+    match the exam_schedule.json written from that schedule; update() keeps
+    existing ids and gives newly placed classes the next free number, so an
+    id handed out once keeps pointing at the same class.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # autocommit mode: transactions are opened explicitly around every write
+        self.conn = sqlite3.connect(str(path), isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.executescript(INDEXES)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ScheduleStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write(self, fn, *args) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            fn(*args)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def meta(self) -> Dict[str, str]:
+        return dict(self.conn.execute("SELECT key, value FROM meta"))
+
+    def utc_offset(self) -> Optional[int]:
+        """The saved term's UTC offset in minutes, None when its times are naive."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'utc_offset'").fetchone()
+        return None if row is None else int(row[0])
+
+    # writing
+
+    def save(self, model: TermModel, state: ScheduleState, schedule: Optional[Sequence[dict]] = None,
+             **meta: str) -> None:
+        """
+        Replace the stored schedule with state, in one transaction; meta is kept alongside.
+
+        schedule is the item list exam_schedule.json was written from; group
+        ids follow its order. Without it they follow state.schedule(), the
+        model's course order.
+        """
+        self._write(self._save, model, state, schedule, meta)
+
+    def _save(self, model: TermModel, state: ScheduleState, schedule: Optional[Sequence[dict]],
+              meta: Dict[str, str]) -> None:
+        conn = self.conn
+        for table in ("meta", "rooms", "availability", "free", "groups", "students", "enrolled"):
+            conn.execute(f"DELETE FROM {table}")
+        for name in ("availability_room", "free_room", "groups_room", "enrolled_class"):
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+        meta = {"schema": str(SCHEMA_VERSION), "saved": datetime.now().isoformat(timespec="seconds"), **meta}
+        if model.utc_offset is not None:
+            meta["utc_offset"] = str(model.utc_offset)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        conn.executemany("INSERT INTO rooms VALUES (?, ?, ?)",
+                         ((i, str(room.uri), room.capacity) for i, room in enumerate(model.rooms)))
+        conn.executemany("INSERT INTO availability VALUES (?, ?, ?)",
+                         ((i, a, b) for i, room in enumerate(model.rooms) for a, b in room.blocks()))
+        conn.executemany("INSERT INTO free VALUES (?, ?, ?)", (
+            (i, a, b) for i in range(len(model.rooms)) for a, b in state.index.free_blocks(i)
+        ))
+
+        enrollment = model.enrollment
+        conn.executemany("INSERT INTO students VALUES (?, ?)", enumerate(enrollment.students))
+        # numbered like output.iter_groups: placed classes in schedule order
+        order = [item["class"] for item in (schedule if schedule is not None else state.schedule())
+                 if item["room"] is not None]
+        group_ids: Dict[str, str] = {}
+        for cls_key in order + list(state.placements):
+            if cls_key in state.placements and cls_key not in group_ids:
+                group_ids[cls_key] = f"group_{len(group_ids) + 1:04d}"
+        rows = []
+        for class_id, course in enumerate(model.courses):
+            cls_key = str(course.uri)
+            placed = state.placements.get(cls_key)
+            if placed is None:
+                rows.append((class_id, None, cls_key, None, None, None))
+            else:
+                rows.append((class_id, group_ids[cls_key], cls_key, *placed))
+        conn.executemany("INSERT INTO groups VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO enrolled VALUES (?, ?, ?)", (
+            (student, class_id, seat) for class_id, course in enumerate(model.courses)
+            for seat, student in enumerate(enrollment.get(str(course.uri), ()))
+        ))
+        for statement in INDEXES.strip().splitlines():
+            conn.execute(statement)
+
+    def update(self, model: TermModel, state: ScheduleState, classes: Iterable[str] = (),
+               rooms: Iterable[str] = ()) -> None:
+        """
+        Rewrite the given classes (slot and roster) and rooms (availability and free time) from state.
+
+        Rooms a class moved out of or into are refreshed as well. Meant for
+        incremental.Rescheduler, whose GroupChange list names the classes.
+        """
+        self._write(self._update, model, state, list(classes), set(rooms))
+
+    def _update(self, model: TermModel, state: ScheduleState, classes: List[str], rooms: set) -> None:
+        conn = self.conn
+        room_ids = {str(room.uri): i for i, room in enumerate(model.rooms)}
+        enrollment = model.enrollment
+        touched = {room_ids[iri] for iri in rooms}
+        next_group = 1 + max((int(group_id[6:]) for (group_id,) in
+                              conn.execute("SELECT group_id FROM groups WHERE group_id IS NOT NULL")), default=0)
+
+        for cls_key in classes:
+            row = conn.execute("SELECT id, group_id, room_id FROM groups WHERE class_iri = ?", (cls_key,)).fetchone()
+            if row is None:
+                class_id = conn.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM groups").fetchone()[0]
+                group_id, old_room = None, None
+                conn.execute("INSERT INTO groups (id, class_iri) VALUES (?, ?)", (class_id, cls_key))
+            else:
+                class_id, group_id, old_room = row
+            if old_room is not None:
+                touched.add(old_room)
+
+            placed = state.placements.get(cls_key)
+            if placed is None:
+                conn.execute("UPDATE groups SET room_id = NULL, start = NULL, end = NULL WHERE id = ?", (class_id,))
+            else:
+                if group_id is None:
+                    group_id = f"group_{next_group:04d}"
+                    next_group += 1
+                conn.execute("UPDATE groups SET group_id = ?, room_id = ?, start = ?, end = ? WHERE id = ?",
+                             (group_id, *placed, class_id))
+                touched.add(placed[0])
+
+            conn.execute("DELETE FROM enrolled WHERE class_id = ?", (class_id,))
+            for seat, student in enumerate(enrollment.student_iris(cls_key)):
+                conn.execute("INSERT OR IGNORE INTO students (iri) VALUES (?)", (student,))
+                conn.execute("INSERT INTO enrolled SELECT id, ?, ? FROM students WHERE iri = ?", (class_id, seat, student))
+
+        for room_id in sorted(touched):
+            room = model.rooms[room_id]
+            conn.execute("UPDATE rooms SET capacity = ? WHERE id = ?", (room.capacity, room_id))
+            conn.execute("DELETE FROM availability WHERE room_id = ?", (room_id,))
+            conn.execute("DELETE FROM free WHERE room_id = ?", (room_id,))
+            conn.executemany("INSERT INTO availability VALUES (?, ?, ?)", ((room_id, a, b) for a, b in room.blocks()))
+            conn.executemany("INSERT INTO free VALUES (?, ?, ?)",
+                             ((room_id, a, b) for a, b in state.index.free_blocks(room_id)))
+
+    # resuming
+
+    def placements(self) -> Dict[str, tuple]:
+        """Stored placements as class IRI -> (room IRI, start, end) in epoch minutes."""
+        return {cls_key: (room, start, end) for cls_key, room, start, end in self.conn.execute(
+            "SELECT g.class_iri, r.iri, g.start, g.end FROM groups g JOIN rooms r ON r.id = g.room_id"
+        )}
+
+    def load_state(self, model: TermModel, engine: str = DEFAULT_ENGINE, gaps: bool = False,
+                   index: str = DEFAULT_INDEX) -> ScheduleState:
+        """
+        A ScheduleState for model holding the stored placements that are still valid in it.
+
+        See ScheduleState.replay(); placements in rooms the model no longer has
+        are dropped as well, so schedule_greedy() on the courses still unplaced
+        finishes the schedule.
+        """
+        room_ids = {str(room.uri): i for i, room in enumerate(model.rooms)}
+        placements = {
+            cls_key: (room_ids[room], start, end)
+            for cls_key, (room, start, end) in self.placements().items() if room in room_ids
+        }
+        state, _ = ScheduleState.replay(model, placements, engine, gaps=gaps, index=index)
+        return state
+
+    # lookups
+
+    def student_exams(self, student_iri: str) -> List[dict]:
+        """The student's scheduled exams, earliest first."""
+        offset = self.utc_offset()
+        return [_exam(row, offset) for row in self.conn.execute(
+            EXAM_QUERY + "JOIN enrolled e ON e.class_id = g.id JOIN students s ON s.id = e.student_id "
+                         "WHERE s.iri = ? ORDER BY g.start, g.class_iri", (student_iri,)
+        )]
+
+    def room_exams(self, room_iri: str, start: Optional[Time] = None, end: Optional[Time] = None) -> List[dict]:
+        """Exams in the room overlapping [start, end), earliest first; the whole term by default."""
+        lo = -(1 << 62) if start is None else _minutes(start)
+        hi = 1 << 62 if end is None else _minutes(end)
+        offset = self.utc_offset()
+        return [_exam(row, offset) for row in self.conn.execute(
+            EXAM_QUERY + "WHERE r.iri = ? AND g.start < ? AND g.end > ? ORDER BY g.start", (room_iri, hi, lo)
+        )]
+
+    def class_exam(self, class_iri: str) -> Optional[dict]:
+        row = self.conn.execute(EXAM_QUERY + "WHERE g.class_iri = ?", (class_iri,)).fetchone()
+        return None if row is None else _exam(row, self.utc_offset())
+
+    def roster(self, class_iri: str) -> List[str]:
+        return [iri for (iri,) in self.conn.execute(
+            "SELECT s.iri FROM groups g JOIN enrolled e ON e.class_id = g.id JOIN students s ON s.id = e.student_id "
+            "WHERE g.class_iri = ? ORDER BY e.seat", (class_iri,)
+        )]
+
+    def free_rooms(self, start: Time, end: Time, capacity: int = 0) -> List[str]:
+        """Rooms with at least capacity seats that are free for all of [start, end)."""
+        return [iri for (iri,) in self.conn.execute(
+            "SELECT DISTINCT r.iri FROM free f JOIN rooms r ON r.id = f.room_id "
+            "WHERE r.capacity >= ? AND f.start <= ? AND f.end >= ? ORDER BY r.id",
+            (capacity, _minutes(start), _minutes(end))
+        )]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up exams in a schedule database written with main.py --store")
+    parser.add_argument("database")
+    sub = parser.add_subparsers(dest="query", required=True)
+    sub.add_parser("student").add_argument("iri")
+    room = sub.add_parser("room")
+    room.add_argument("iri")
+    room.add_argument("--from", dest="start", help="ISO date/time")
+    room.add_argument("--to", dest="end", help="ISO date/time")
+    sub.add_parser("class").add_argument("iri")
+    free = sub.add_parser("free")
+    free.add_argument("start")
+    free.add_argument("end")
+    free.add_argument("--capacity", type=int, default=0)
+    args = parser.parse_args()
+
+    with ScheduleStore(args.database) as store:
+        if args.query == "student":
+            result = store.student_exams(args.iri)
+        elif args.query == "room":
+            result = store.room_exams(args.iri, args.start, args.end)
+        elif args.query == "class":
+            result = store.class_exam(args.iri)
+        else:
+            result = store.free_rooms(args.start, args.end, args.capacity)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,48 @@
+import pytest
+
+import availability
+from generate import DatasetSpec, generate
+from main import load_model, schedule_greedy
+from state import ScheduleState
+
+pytestmark = pytest.mark.skipif(availability.np is None, reason="VectorIndex requires numpy")
+
+
+@pytest.fixture(scope="module")
+def model(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("term")
+    # fragmented rooms: short blocks with gaps, so gaps mode has room to move exams
+    generate(DatasetSpec(students=2_000, classes=60, rooms=8, days=3, fragmentation=3, seed=4), directory)
+    return load_model(f"{directory}/", cache=False)
+
+
+def run(model, index, gaps):
+    state = ScheduleState.initial(model, gaps=gaps, index=index)
+    schedule_greedy(model, state)
+    return state
+
+
+def free_blocks(state):
+    return [state.index.free_blocks(r) for r in range(len(state.model.rooms))]
+
+
+@pytest.mark.parametrize("gaps", [False, True])
+def test_heap_and_vector_place_the_same(model, gaps):
+    heap, vector = run(model, "heap", gaps), run(model, "vector", gaps)
+    assert 0 < len(heap.placements) < len(model.courses)
+    assert vector.placements == heap.placements
+
+    # clones of both, with every third exam taken out and everything unplaced tried again
+    heap, vector = heap.clone(), vector.clone()
+    assert vector.placements == heap.placements
+    removed = set(sorted(heap.placements)[::3])
+    for state in (heap, vector):
+        for cls_key in sorted(removed):
+            state.unplace(cls_key)
+        assert free_blocks(state) == free_blocks(heap)
+
+    again = [course for course in model.courses if str(course.uri) not in heap.placements]
+    for state in (heap, vector):
+        schedule_greedy(model, state, again)
+    assert vector.placements == heap.placements
+    assert free_blocks(vector) == free_blocks(heap)
@@ -0,0 +1,57 @@
+from array import array
+
+from diagnostics import Shortfall, explain, precheck, summary
+from enrollment import Enrollment
+from model import Course, Room, TermModel
+
+
+def room(name, capacity, *blocks):
+    return Room(f"ex:{name}", capacity, array("q", (a for a, _ in blocks)), array("q", (b for _, b in blocks)))
+
+
+def course(name, minutes, need):
+    return Course(f"ex:{name}", minutes, need, 0)
+
+
+def term(*courses):
+    rooms = [room("Small", 10, (0, 120), (200, 260)), room("Big", 50, (0, 90))]
+    return TermModel(rooms, list(courses), Enrollment.from_lists({}))
+
+
+def test_course_bigger_than_every_room():
+    checked = precheck(term(course("Huge", 60, 80), course("Fits", 60, 50)))
+    assert list(checked.infeasible) == ["ex:Huge"]
+    failure = checked.infeasible["ex:Huge"]
+    assert (failure.reason, failure.need, failure.minutes) == ("no_room_big_enough", 80, 60)
+    assert "the biggest room has 50" in failure.message
+
+
+def test_exam_longer_than_every_big_enough_block():
+    # 120 minutes fit the small room's first block, but not any block of a room with 30 seats
+    model = term(course("Long", 120, 30), course("LongSmall", 120, 5))
+    checked = precheck(model)
+    assert list(checked.infeasible) == ["ex:Long"]
+    assert checked.infeasible["ex:Long"].reason == "no_block_long_enough"
+    assert "is 90" in checked.infeasible["ex:Long"].message
+    assert [str(c.uri) for c in checked.feasible(model.courses)] == ["ex:LongSmall"]
+
+
+def test_shortfalls_per_room_size():
+    model = term(course("Huge", 60, 80), course("A", 60, 40), course("B", 60, 40),
+                 course("LongSmall", 120, 5), course("C", 60, 5))
+    checked = precheck(model)
+    # the big room offers 90 minutes to A and B's 120; all rooms offer 270 to everything's 300
+    assert checked.shortfalls == [Shortfall(10, 4, 300, 270), Shortfall(50, 2, 120, 90)]
+    assert [str(c.uri) for c in checked.feasible(model.courses)] == ["ex:A", "ex:B", "ex:LongSmall", "ex:C"]
+
+    # explain() gives the precheck's failures and the greedy pass's together, in model order
+    explained = explain(model, checked, {"ex:B": {"rejected_capacity": 2}})
+    assert [(item.class_iri, item.reason) for item in explained] == [
+        ("ex:Huge", "no_room_big_enough"), ("ex:B", "rooms_used_up"),
+    ]
+    assert summary(explained) == {"no_room_big_enough": 1, "rooms_used_up": 1}
+
+
+def test_no_shortfall_when_supply_covers_demand():
+    checked = precheck(term(course("A", 60, 40), course("C", 60, 5)))
+    assert checked.infeasible == {} and checked.shortfalls == []
@@ -0,0 +1,25 @@
+import pytest
+
+from conflicts import build_conflict_graph
+from dsatur import schedule_dsatur
+from generate import DatasetSpec, generate
+from main import load_model, schedule_greedy
+from ordering import get_ordering
+from state import ScheduleState
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_dsatur_ordering_replays_the_dsatur_schedule(tmp_path, seed):
+    generate(DatasetSpec(students=1_000, classes=50, rooms=6, days=3, fragmentation=2, seed=seed), tmp_path)
+    model = load_model(f"{tmp_path}/", cache=False)
+    graph = build_conflict_graph(model.enrollment)
+
+    dynamic = ScheduleState.initial(model, graph=graph)
+    picked = schedule_dsatur(model, dynamic, graph)
+    replayed = ScheduleState.initial(model, graph=graph)
+    items = schedule_greedy(model, replayed, get_ordering("dsatur")(model, graph))
+
+    assert items == picked
+    assert replayed.placements == dynamic.placements
+    # placed and unscheduled courses both have to come out the same
+    assert 0 < len(dynamic.placements) < len(model.courses)
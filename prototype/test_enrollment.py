@@ -0,0 +1,55 @@
+from enrollment import Enrollment
+
+ROSTERS = {"ex:A": ["s1", "s2"], "ex:B": ["s2", "s3"], "ex:C": ["s3"]}
+
+
+def rosters(enrollment: Enrollment):
+    return {cls: enrollment.student_iris(cls) for cls in enrollment}
+
+
+def classes_of(enrollment: Enrollment, student: str):
+    return sorted(enrollment.classes[c] for c in enrollment.classes_of(enrollment.student_id(student)))
+
+
+def test_transpose_lists_each_students_classes():
+    enrollment = Enrollment.from_lists(ROSTERS)
+    indptr, indices = enrollment.transpose
+    assert len(indptr) == len(enrollment.students) + 1
+    for s, student in enumerate(enrollment.students):
+        expected = sorted(cls for cls, members in ROSTERS.items() if student in members)
+        assert sorted(enrollment.classes[c] for c in indices[indptr[s]:indptr[s + 1]]) == expected
+        assert classes_of(enrollment, student) == expected
+
+
+def test_with_changes_leaves_the_original_alone():
+    base = Enrollment.from_lists(ROSTERS)
+    changed = base.with_changes(added=[("s4", "ex:A"), ("s1", "ex:D"), ("s1", "ex:A")],
+                                dropped=[("s2", "ex:A"), ("s3", "ex:A")])
+
+    assert rosters(changed) == {"ex:A": ["s1", "s4"], "ex:B": ["s2", "s3"], "ex:C": ["s3"], "ex:D": ["s1"]}
+    assert changed.count("ex:A") == 2 and changed.count("ex:D") == 1
+    assert classes_of(changed, "s1") == ["ex:A", "ex:D"]
+    assert classes_of(changed, "s2") == ["ex:B"]
+    assert classes_of(changed, "s4") == ["ex:A"]
+
+    assert rosters(base) == ROSTERS
+    assert base.students == ["s1", "s2", "s3"] and base.student_id("s4") is None
+    assert classes_of(base, "s2") == ["ex:A", "ex:B"]
+
+    # dropping what nobody holds interns nothing
+    same = base.with_changes(dropped=[("s9", "ex:A"), ("s1", "ex:Z")])
+    assert same.students == base.students and same.classes == base.classes
+    assert rosters(same) == ROSTERS
+
+
+def test_compacted_folds_the_changes_in():
+    base = Enrollment.from_lists(ROSTERS)
+    assert base.compacted() is base
+
+    changed = base.with_changes(added=[("s4", "ex:C")], dropped=[("s1", "ex:A")])
+    compact = changed.compacted()
+    assert compact.overrides == {} and compact.student_overrides == {}
+    assert {cls: sorted(members) for cls, members in rosters(compact).items()} == \
+        {cls: sorted(members) for cls, members in rosters(changed).items()}
+    for student in ("s2", "s3", "s4"):
+        assert classes_of(compact, student) == classes_of(changed, student)
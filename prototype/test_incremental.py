@@ -0,0 +1,102 @@
+import pytest
+
+from generate import DatasetSpec, generate
+from incremental import AddEnrollment, CloseRoom, DropEnrollment, ExtendAvailability, Rescheduler
+from main import load_model
+from output import iter_groups
+from verify import ValidationIndex, validate_schedule
+
+HARD_CHECKS = ["room_capacity", "student_exam_conflicts", "exam_room_fit", "no_room_overlaps",
+               "no_duplicate_exam_assignments"]
+NOBODY = "http://example.org/_Nobody"
+
+
+@pytest.fixture
+def rescheduler(tmp_path):
+    generate(DatasetSpec(students=300, classes=40, rooms=6, days=2, seed=1), tmp_path)
+    return Rescheduler(load_model(f"{tmp_path}/", cache=False))
+
+
+def hard_violations(r: Rescheduler):
+    groups = dict(iter_groups(r.schedule(), r.model.enrollment))
+    return validate_schedule(groups, ValidationIndex.from_model(r.model), HARD_CHECKS)
+
+
+def clashing_add(r: Rescheduler) -> AddEnrollment:
+    # a student of one exam joining a class whose exam overlaps it, so the class has to move
+    placements = r.state.placements
+    for cls_key, (_, start, end) in sorted(placements.items()):
+        roster = set(r.model.enrollment.student_iris(cls_key))
+        for other, (_, a, b) in sorted(placements.items()):
+            if other != cls_key and a < end and start < b:
+                student = next((s for s in r.model.enrollment.student_iris(other) if s not in roster), None)
+                if student is not None:
+                    return AddEnrollment(student, cls_key)
+    raise AssertionError("no overlapping exams")
+
+
+def first_drop(r: Rescheduler) -> DropEnrollment:
+    cls_key = min(r.state.placements)
+    return DropEnrollment(r.model.enrollment.student_iris(cls_key)[0], cls_key)
+
+
+def first_window(r: Rescheduler) -> CloseRoom:
+    room_index, start, _ = r.state.placements[min(r.state.placements)]
+    room = r.model.rooms[room_index]
+    a, b = next((a, b) for a, b in room.blocks() if a <= start < b)
+    return CloseRoom(str(room.uri), a, b)
+
+
+def extra_day(r: Rescheduler) -> ExtendAvailability:
+    room = r.model.rooms[0]
+    last = max(b for _, b in room.blocks())
+    return ExtendAvailability(str(room.uri), last + 24 * 60, last + 24 * 60 + 8 * 60)
+
+
+def took_effect(r: Rescheduler, delta) -> bool:
+    if isinstance(delta, AddEnrollment):
+        return delta.student in r.model.enrollment.student_iris(delta.class_iri)
+    if isinstance(delta, DropEnrollment):
+        return delta.student not in r.model.enrollment.student_iris(delta.class_iri)
+    room_index = r.room_ids[delta.room_iri]
+    if isinstance(delta, CloseRoom):
+        return all(not (room == room_index and start < delta.end and delta.start < end)
+                   for room, start, end in r.state.placements.values())
+    return (delta.start, delta.end) in list(r.model.rooms[room_index].blocks())
+
+
+@pytest.mark.parametrize("make_delta", [clashing_add, first_drop, first_window, extra_day])
+def test_delta_keeps_schedule_valid(rescheduler, make_delta):
+    assert hard_violations(rescheduler) == []
+    delta = make_delta(rescheduler)
+    rescheduler.apply(delta)
+
+    assert took_effect(rescheduler, delta)
+    assert hard_violations(rescheduler) == []
+    unplaced = {str(course.uri) for course in rescheduler.model.courses} - rescheduler.state.placements.keys()
+    assert rescheduler.unscheduled == unplaced
+
+
+def test_apply_returns_only_changed_groups(rescheduler):
+    before = dict(rescheduler.state.placements)
+    add, close = clashing_add(rescheduler), first_window(rescheduler)
+    changes = rescheduler.apply(add, close)
+    after = rescheduler.state.placements
+
+    moved = {key for key in before.keys() | after.keys() if before.get(key) != after.get(key)}
+    if add.class_iri in after:
+        moved.add(add.class_iri)
+    assert moved
+    assert {change.class_iri for change in changes} == moved
+    assert all(change.students_changed == (change.class_iri == add.class_iri) for change in changes)
+
+
+def test_dropping_an_unknown_student_changes_nothing(rescheduler):
+    enrollment = rescheduler.model.enrollment
+    students = len(enrollment.students)
+    assert rescheduler.apply(DropEnrollment(NOBODY, min(rescheduler.state.placements))) == []
+
+    assert rescheduler.model.enrollment.student_id(NOBODY) is None
+    assert len(rescheduler.model.enrollment.students) == students
+    dropped = enrollment.with_changes(dropped=[(NOBODY, min(rescheduler.state.placements))])
+    assert dropped.student_id(NOBODY) is None and len(dropped.students) == students
@@ -0,0 +1,57 @@
+import pytest
+
+from main import load_model, schedule_greedy
+from output import load_schedule, write_json
+from verify import ScheduleValidator, load_data
+
+STUDENTS = """@prefix ex: <http://example.org/> .
+ex:_Ann a ex:Person ; ex:enrolledIn ex:Math, ex:Physics .
+ex:_Bob a ex:Person ; ex:enrolledIn ex:Math .
+"""
+
+CLASSES = """@prefix ex: <http://example.org/> .
+ex:Math ex:examDuration 2.0 ; ex:hasMinimumRoomCapacity 2 .
+ex:Physics ex:examDuration 1.5 ; ex:hasMinimumRoomCapacity 1 .
+"""
+
+ROOMS = """@prefix ex: <http://example.org/> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+ex:Hall a ex:Room ; ex:roomCapacity 10 ; ex:hasAvailability ex:_Slot_0, ex:_Slot_1 .
+ex:_Slot_0 ex:availableFrom "{0}"^^xsd:dateTime ; ex:availableUntil "2026-05-11T12:00:00-05:00"^^xsd:dateTime .
+ex:_Slot_1 ex:availableFrom "2026-05-12T08:00:00-05:00"^^xsd:dateTime ;
+    ex:availableUntil "2026-05-12T12:00:00-05:00"^^xsd:dateTime .
+"""
+
+
+def write_term(directory, first_start="2026-05-11T08:00:00-05:00"):
+    (directory / "students.ttl").write_text(STUDENTS)
+    (directory / "classes.ttl").write_text(CLASSES)
+    (directory / "rooms.ttl").write_text(ROOMS.format(first_start))
+    return f"{directory}/"
+
+
+def test_offset_availability_is_written_and_verified_with_its_offset(tmp_path):
+    directory = write_term(tmp_path)
+    model = load_model(directory)
+    assert model.utc_offset == -300
+    # the second load comes from the snapshot, which has to keep the offset too
+    assert load_model(directory).utc_offset == -300
+
+    schedule = schedule_greedy(model)
+    assert [(item["start"], item["end"]) for item in schedule] == [
+        ("2026-05-11T08:00:00-05:00", "2026-05-11T10:00:00-05:00"),
+        ("2026-05-11T10:00:00-05:00", "2026-05-11T11:30:00-05:00"),
+    ]
+
+    path = tmp_path / "exam_schedule.json"
+    write_json(path, schedule, model.enrollment)
+    groups = load_schedule(path)
+    # what `python verify.py exam_schedule.json` checks against, the TTL parsed as is
+    assert ScheduleValidator(graph=load_data(str(tmp_path))).validate(groups) == []
+    assert ScheduleValidator(model=model).validate(groups) == []
+
+
+def test_mixed_offsets_are_rejected(tmp_path):
+    directory = write_term(tmp_path, first_start="2026-05-11T08:00:00")
+    with pytest.raises(ValueError, match="UTC offsets"):
+        load_model(directory, cache=False)
@@ -0,0 +1,61 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from main import load_model, schedule_greedy
+from output import CompactSchedule, iter_groups, load_schedule, write_compact, write_json
+from verify import TTL_DIRECTORY
+
+HERE = Path(__file__).resolve().parent
+
+
+@pytest.fixture(scope="module")
+def term():
+    # the sample data verify.py checks against when run as a script
+    model = load_model(TTL_DIRECTORY, cache=False)
+    return model, schedule_greedy(model)
+
+
+def test_write_json_is_json_dump(tmp_path, term):
+    model, schedule = term
+    path = tmp_path / "exam_schedule.json"
+    assert write_json(path, schedule, model.enrollment) == len(schedule)
+    expected = json.dumps(dict(iter_groups(schedule, model.enrollment)), indent=2)
+    assert path.read_text(encoding="utf-8") == expected
+
+    write_json(path, [], model.enrollment)
+    assert path.read_text(encoding="utf-8") == json.dumps({}, indent=2)
+
+
+def test_compact_reads_back_as_the_json_groups(tmp_path, term):
+    model, schedule = term
+    write_json(tmp_path / "exam_schedule.json", schedule, model.enrollment)
+    assert write_compact(tmp_path / "exam_schedule.ndjson", schedule, model.enrollment) == len(schedule)
+
+    groups = load_schedule(tmp_path / "exam_schedule.json")
+    compact = load_schedule(tmp_path / "exam_schedule.ndjson")
+    assert isinstance(compact, CompactSchedule)
+    assert list(compact) == list(groups)
+    for group_id, group in groups.items():
+        students = compact[group_id]["students"]
+        assert list(students) == group["students"] and len(students) == len(group["students"])
+        assert students[1:] == group["students"][1:]
+        assert dict(compact[group_id], students=list(students)) == group
+
+
+def test_verify_script_accepts_the_compact_file(tmp_path, term):
+    model, schedule = term
+    path = tmp_path / "exam_schedule.ndjson"
+    write_compact(path, schedule, model.enrollment)
+    done = subprocess.run([sys.executable, "verify.py", str(path)], cwd=HERE, capture_output=True, text=True)
+    assert done.returncode == 0, done.stdout + done.stderr
+    assert "This is a valid schedule!" in done.stdout
+
+    # and rejects one with an exam taken out
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    path.write_text("".join(lines[:-1]), encoding="utf-8")
+    done = subprocess.run([sys.executable, "verify.py", str(path)], cwd=HERE, capture_output=True, text=True)
+    assert done.returncode == 1
@@ -0,0 +1,22 @@
+import pytest
+
+from generate import DatasetSpec, generate
+from main import load_model, schedule_greedy
+from repair import repair
+from state import ScheduleState
+from verify import ScheduleValidator
+
+
+@pytest.mark.parametrize("seed", [2, 3])
+def test_repair_keeps_exams_inside_one_window(tmp_path, seed):
+    generate(DatasetSpec.scaled(2_000, seed), tmp_path)
+    model = load_model(f"{tmp_path}/", cache=False)
+    # rooms whose availability windows touch, the case a merged free block could straddle
+    assert any(b == c for room in model.rooms for (_, b), (c, _) in zip(room.blocks(), list(room.blocks())[1:]))
+
+    state = ScheduleState.initial(model)
+    schedule_greedy(model, state)
+    repaired = repair(model, state, budget=60.0, seed=seed, max_moves=300)
+
+    violations = ScheduleValidator(model=model).validate(repaired.schedule(), ["exam_room_fit", "no_room_overlaps"])
+    assert violations == []
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import re
+from urllib.parse import quote
+
+import pytest
+
+from generate import DatasetSpec, generate
+from service import SchedulerService
+
+
+class Writer:
+    # the StreamWriter calls handle_connection makes, into a buffer
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("term")
+    generate(DatasetSpec(students=200, classes=20, rooms=4, seed=2), directory)
+    service = SchedulerService(f"{directory}/", workers=1, cache=False)
+    yield service
+    service.close()
+
+
+def request(method: str, target: str, body: object = None) -> bytes:
+    raw = b"" if body is None else json.dumps(body).encode()
+    return f"{method} {target} HTTP/1.1\r\nContent-Length: {len(raw)}\r\n\r\n".encode("latin-1") + raw
+
+
+def exchange(service: SchedulerService, *requests: bytes):
+    """Send requests down one keep-alive connection; returns the status codes answered and the writer."""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"".join(requests))
+        reader.feed_eof()
+        writer = Writer()
+        await service.handle_connection(reader, writer)
+        return writer
+
+    writer = asyncio.run(run())
+    statuses, data = [], bytes(writer.data)
+    while data:
+        head, _, data = data.partition(b"\r\n\r\n")
+        statuses.append(int(head.split()[1]))
+        length = int(re.search(rb"Content-Length: (\d+)", head).group(1))
+        data = data[length:]
+    return statuses, writer
+
+
+def test_routes_answer_with_their_status(service):
+    student = quote(service.model.enrollment.students[0], safe="")
+    statuses, writer = exchange(
+        service,
+        request("GET", "/status"),
+        request("GET", f"/student?iri={student}"),
+        request("GET", "/student?iri=http%3A%2F%2Fexample.org%2F_Nobody"),
+        request("GET", "/student"),
+        request("POST", "/validate", {"checks": ["no_such_check"]}),
+        request("POST", "/validate", {"checks": "room_capacity"}),
+        request("POST", "/reschedule", {"overrides": []}),
+        request("POST", "/reschedule", {"overrides": [{"type": "move"}]}),
+        request("POST", "/reschedule", {"overrides": [{"type": "add", "student": "x"}]}),
+        request("POST", "/schedule", {"repair_budget": "soon"}),
+        request("DELETE", "/status"),
+        request("GET", "/nowhere"),
+    )
+    assert statuses == [200, 200, 404, 400, 400, 400, 400, 400, 400, 400, 405, 404]
+    assert writer.closed
+
+
+def test_malformed_request_line_is_answered_and_closes(service):
+    statuses, writer = exchange(service, b"GET /status\r\n\r\n", request("GET", "/status"))
+    assert statuses == [400]
+    assert b"Malformed request line" in writer.data and writer.closed
+
+    statuses, _ = exchange(service, b"GET /status HTTP/1.1\r\nContent-Length: lots\r\n\r\n", request("GET", "/status"))
+    assert statuses == [400]
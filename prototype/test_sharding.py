@@ -0,0 +1,29 @@
+from dataclasses import replace
+
+import pytest
+
+from generate import DatasetSpec, generate
+from main import load_model, schedule_greedy
+from sharding import schedule_sharded
+from state import ScheduleState
+from verify import ScheduleValidator
+
+PLACEMENT_CHECKS = ["room_capacity", "student_exam_conflicts", "exam_room_fit", "no_room_overlaps",
+                    "no_duplicate_exam_assignments"]
+
+
+# (seed, rooms divisor, shards): enough rooms for everything, and so few that the merge alone loses classes
+@pytest.mark.parametrize("seed, rooms_div, shards", [(0, 1, 4), (3, 4, 4), (2, 4, 2)])
+def test_sharded_is_never_worse_than_serial(tmp_path, seed, rooms_div, shards):
+    spec = DatasetSpec.scaled(2_000, seed)
+    # departments with no cross enrolment: every department is its own component
+    generate(replace(spec, department_size=10, cross_enrollment=0.0, rooms=spec.rooms // rooms_div), tmp_path)
+    model = load_model(f"{tmp_path}/", cache=False)
+
+    serial = ScheduleState.initial(model)
+    schedule_greedy(model, serial)
+    result = schedule_sharded(model, workers=1, shards=shards)
+    assert result.components > 1 and result.shards == shards
+
+    assert len(result.state.placements) >= len(serial.placements)
+    assert ScheduleValidator(model=model).validate(result.schedule, PLACEMENT_CHECKS) == []
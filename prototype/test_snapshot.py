@@ -0,0 +1,56 @@
+from dataclasses import replace
+
+from generate import DatasetSpec, generate
+from main import build_model
+from snapshot import SUFFIX, load_or_build, load_snapshot, save_snapshot, source_digest
+
+
+def fields(model):
+    # snapshots give back plain str IRIs where the parser gives URIRefs, so compare as str
+    return (
+        [(str(room.uri), room.capacity, list(room.blocks())) for room in model.rooms],
+        [(str(c.uri), c.exam_minutes, c.enrollment, c.min_room_capacity) for c in model.courses],
+        {cls: model.enrollment.student_iris(cls) for cls in model.enrollment},
+        model.utc_offset,
+    )
+
+
+def sources(tmp_path):
+    directory = tmp_path / "data"
+    generate(DatasetSpec(students=300, classes=20, rooms=5, seed=3), directory)
+    return [str(directory / name) for name in ("students.ttl", "classes.ttl", "rooms.ttl")]
+
+
+def test_snapshot_round_trip(tmp_path):
+    paths = sources(tmp_path)
+    model = replace(build_model(*paths), utc_offset=-300)
+    path = tmp_path / ("term" + SUFFIX)
+    save_snapshot(path, model, source_digest(paths))
+    assert fields(load_snapshot(path)) == fields(model)
+
+
+def test_stale_snapshot_is_rebuilt(tmp_path):
+    paths = sources(tmp_path)
+    cache = tmp_path / "cache"
+    builds = []
+
+    def build():
+        builds.append(1)
+        return build_model(*paths)
+
+    first = load_or_build(paths, cache, build)
+    again = load_or_build(paths, cache, build)
+    assert len(builds) == 1
+    assert fields(again) == fields(first)
+
+    # any change to a source changes the digest: the old snapshot misses and is replaced
+    with open(paths[1], "a", encoding="utf-8") as f:
+        f.write("# edited\n")
+    load_or_build(paths, cache, build)
+    assert len(builds) == 2
+    assert [path.name for path in cache.glob("*" + SUFFIX)] == [source_digest(paths) + SUFFIX]
+
+    # an unreadable snapshot is rebuilt rather than trusted
+    (cache / (source_digest(paths) + SUFFIX)).write_bytes(b"not a snapshot")
+    assert fields(load_or_build(paths, cache, build)) == fields(first)
+    assert len(builds) == 3
@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+from rdflib import BNode, Graph, URIRef
+
+from ttl_stream import UnsupportedTurtle, iter_triples, load_filtered
+from verify import TTL_DIRECTORY
+
+EX = "http://example.org/"
+
+
+def rdflib_triples(path, predicates=None):
+    graph = Graph()
+    graph.parse(str(path), format="turtle")
+    return {
+        (str(s), str(p), str(o)) for s, p, o in graph
+        if predicates is None or str(p) in predicates
+    }
+
+
+def filtered_triples(graph):
+    return {(str(s), str(p), str(o)) for s, p, o in graph.triples((None, None, None))}
+
+
+@pytest.mark.parametrize("name", ["students.ttl", "classes.ttl", "rooms.ttl"])
+def test_sample_data_reads_like_rdflib(name):
+    path = Path(TTL_DIRECTORY) / name
+    expected = rdflib_triples(path)
+    predicates = {p for _, p, _ in expected}
+    assert filtered_triples(load_filtered(str(path), predicates)) == expected
+
+    # and only the predicates asked for
+    some = set(sorted(predicates)[:1])
+    assert filtered_triples(load_filtered(str(path), some)) == rdflib_triples(path, some)
+
+
+def test_escapes_and_datatypes_read_like_rdflib(tmp_path):
+    path = tmp_path / "classes.ttl"
+    path.write_text(f"""@prefix ex: <{EX}> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+ex:Math ex:label "Math \\"A\\"\\tII"@en ; ex:examDuration 2.5 , "3"^^xsd:integer ;
+    ex:open true .
+<{EX}Art> a ex:Class .
+""", encoding="utf-8")
+    expected = rdflib_triples(path)
+    assert filtered_triples(load_filtered(str(path), {p for _, p, _ in expected})) == expected
+
+
+def test_blank_nodes_fall_back_to_rdflib(tmp_path, capsys):
+    path = tmp_path / "rooms.ttl"
+    path.write_text(f"""@prefix ex: <{EX}> .
+ex:Hall ex:roomCapacity 10 ; ex:hasAvailability [ ex:availableFrom "2026-05-11T08:00:00" ] .
+""", encoding="utf-8")
+    with pytest.raises(UnsupportedTurtle):
+        list(iter_triples(path.read_text().splitlines(), {EX + "roomCapacity"}))
+
+    graph = load_filtered(str(path), [EX + "roomCapacity", EX + "hasAvailability"])
+    assert "falling back to rdflib" in capsys.readouterr().err
+    hall = URIRef(EX + "Hall")
+    assert list(graph.objects(hall, URIRef(EX + "roomCapacity"))) == ["10"]
+    (availability,) = graph.objects(hall, URIRef(EX + "hasAvailability"))
+    assert isinstance(availability, BNode)
@@ -0,0 +1,233 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from rdflib import Graph, Literal, URIRef
+
+import os
+import re
+import sys
+
+# Line-by-line reader for the Turtle subset our data files use: @prefix/PREFIX,
+# full and prefixed IRIs, "a", single-line string literals with a datatype or
+# language tag, numbers and booleans, and the ; , . separators. Only triples whose
+# predicate is asked for are kept. Anything else (blank node brackets,
+# collections, long strings, @base, relative IRIs) raises UnsupportedTurtle and
+# the file is read with rdflib instead.
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+# files smaller than this together are parsed in-process, forking costs more than it saves
+PARALLEL_MIN_BYTES = 8 << 20
+
+TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<iri><[^<>"{}|^`\\\s]*>)
+      | (?P<string>"(?:[^"\\\n]|\\.)*")(?:\^\^(?P<dtype><[^>\s]*>|[A-Za-z][\w.-]*:[\w-]*|:[\w-]*)|@(?P<lang>[A-Za-z]+(?:-[A-Za-z0-9]+)*))?
+      | (?P<number>[+-]?(?:\d*\.\d+|\d+)(?:[eE][+-]?\d+)?)
+      | (?P<pname>(?:[A-Za-z][\w.-]*)?:(?:[\w:-](?:[\w.:-]*[\w:-])?)?)
+      | (?P<keyword>@prefix|PREFIX|a\b|true\b|false\b)
+      | (?P<punct>[;,.])
+      | (?P<comment>\#.*)
+      | (?P<other>\S)
+    )
+""", re.VERBOSE)
+
+ESCAPE = re.compile(r"\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)")
+ESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+
+class UnsupportedTurtle(ValueError):
+    pass
+
+
+def _unescape(match: re.Match) -> str:
+    code = match.group(1)
+    if code[0] in "uU" and len(code) > 1:
+        return chr(int(code[1:], 16))
+    return ESCAPES.get(code, code)
+
+
+class FilteredGraph:
+    """
+    The part of an rdflib Graph that the scheduler uses, for a fixed set of predicates.
+
+    IRIs are URIRefs so isinstance checks keep working; literals are their
+    lexical form as str, which int(), float() and str() read like rdflib Literals.
+    Like a Graph it is a set: repeated triples are kept once, in first-seen order.
+    """
+
+    def __init__(self, triples: Iterable[Tuple[str, str, str]] = ()):
+        self.by_predicate: Dict[str, Dict[Tuple[str, str], None]] = {}
+        self._objects: Optional[Dict[Tuple[str, str], List[str]]] = None
+        for s, p, o in triples:
+            pairs = self.by_predicate.get(p)
+            if pairs is None:
+                pairs = self.by_predicate[p] = {}
+            pairs[s, o] = None
+
+    def __len__(self) -> int:
+        return sum(len(pairs) for pairs in self.by_predicate.values())
+
+    def triples(self, pattern):
+        s, p, o = pattern
+        predicates = self.by_predicate if p is None else {p: self.by_predicate.get(p, ())}
+        for pred, pairs in predicates.items():
+            for subj, obj in pairs:
+                if (s is None or subj == s) and (o is None or obj == o):
+                    yield subj, pred, obj
+
+    def objects(self, subject, predicate):
+        if self._objects is None:
+            index: Dict[Tuple[str, str], List[str]] = {}
+            for pred, pairs in self.by_predicate.items():
+                for subj, obj in pairs:
+                    index.setdefault((subj, pred), []).append(obj)
+            self._objects = index
+        return iter(self._objects.get((subject, predicate), ()))
+
+
+def iter_triples(lines: Iterable[str], predicates: Set[str]) -> Iterator[Tuple[URIRef, URIRef, str]]:
+    prefixes: Dict[str, str] = {}
+    interned: Dict[str, URIRef] = {}
+
+    def iri(value: str) -> URIRef:
+        ref = interned.get(value)
+        if ref is None:
+            ref = interned[value] = URIRef(value)
+        return ref
+
+    def expand(kind: str, text: str) -> str:
+        if kind == "iri":
+            value = text[1:-1]
+            if ":" not in value:
+                raise UnsupportedTurtle(f"relative IRI {text}")
+            return value
+        prefix, _, local = text.partition(":")
+        if prefix not in prefixes:
+            raise UnsupportedTurtle(f"undeclared prefix {prefix}:")
+        return prefixes[prefix] + local
+
+    # statement state: expecting one of subject / predicate / object / separator,
+    # or the three parts of a prefix directive
+    state = "subject"
+    subject = predicate = None
+    directive = prefix_name = None
+
+    for lineno, line in enumerate(lines, 1):
+        pos = 0
+        end = len(line)
+        while pos < end:
+            m = TOKEN.match(line, pos)
+            if m is None:
+                break
+            pos = m.end()
+            kind = m.lastgroup
+            if kind is None or kind == "comment":
+                continue
+            if kind in ("dtype", "lang"):
+                kind = "string"
+            text = m.group(kind)
+
+            if kind == "other" or (kind == "string" and text.startswith('"""')):
+                raise UnsupportedTurtle(f"line {lineno}: unsupported syntax {text!r}")
+
+            if state == "prefix":
+                if kind != "pname" or not text.endswith(":"):
+                    raise UnsupportedTurtle(f"line {lineno}: bad prefix declaration")
+                prefix_name = text[:-1]
+                state = "prefix_iri"
+            elif state == "prefix_iri":
+                if kind != "iri":
+                    raise UnsupportedTurtle(f"line {lineno}: bad prefix declaration")
+                prefixes[prefix_name] = text[1:-1]
+                state = "prefix_end" if directive == "@prefix" else "subject"
+            elif state == "prefix_end":
+                if text != ".":
+                    raise UnsupportedTurtle(f"line {lineno}: expected '.' after @prefix")
+                state = "subject"
+            elif state == "subject":
+                if text in ("@prefix", "PREFIX"):
+                    directive = text
+                    state = "prefix"
+                elif kind in ("iri", "pname"):
+                    subject = expand(kind, text)
+                    state = "predicate"
+                else:
+                    raise UnsupportedTurtle(f"line {lineno}: unsupported subject {text!r}")
+            elif state == "predicate":
+                if text == "." and predicate is not None:
+                    # trailing ';' before '.'
+                    state = "subject"
+                    predicate = None
+                elif text == "a":
+                    predicate = RDF_TYPE
+                    state = "object"
+                elif kind in ("iri", "pname"):
+                    predicate = expand(kind, text)
+                    state = "object"
+                else:
+                    raise UnsupportedTurtle(f"line {lineno}: unsupported predicate {text!r}")
+            elif state == "object":
+                if kind in ("iri", "pname"):
+                    obj = expand(kind, text)
+                    if predicate in predicates:
+                        yield iri(subject), iri(predicate), iri(obj)
+                elif kind in ("string", "number", "keyword") and text not in ("a", "@prefix", "PREFIX"):
+                    if predicate in predicates:
+                        if kind == "string":
+                            text = m.group("string")[1:-1]
+                            if "\\" in text:
+                                text = ESCAPE.sub(_unescape, text)
+                        yield iri(subject), iri(predicate), text
+                else:
+                    raise UnsupportedTurtle(f"line {lineno}: unsupported object {text!r}")
+                state = "separator"
+            elif state == "separator":
+                if text == ",":
+                    state = "object"
+                elif text == ";":
+                    state = "predicate"
+                elif text == ".":
+                    state = "subject"
+                    subject = predicate = None
+                else:
+                    raise UnsupportedTurtle(f"line {lineno}: expected separator, got {text!r}")
+
+        if pos < end and line[pos:].strip():
+            raise UnsupportedTurtle(f"line {lineno}: unreadable input {line[pos:pos + 20]!r}")
+
+    if state != "subject":
+        raise UnsupportedTurtle("unterminated statement at end of file")
+
+
+def load_filtered(path: str, predicates: Sequence[str]) -> FilteredGraph:
+    """Read path keeping only the given predicates, through rdflib if the fast reader can't."""
+    wanted = set(predicates)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return FilteredGraph(iter_triples(f, wanted))
+    except UnsupportedTurtle as e:
+        print(f"{path}: {e}, falling back to rdflib", file=sys.stderr)
+
+    graph = Graph()
+    graph.parse(str(path), format="turtle")
+    return FilteredGraph(
+        (s, p, str(o) if isinstance(o, Literal) else o)
+        for p in map(URIRef, wanted)
+        for s, _, o in graph.triples((None, p, None))
+    )
+
+
+def load_filtered_many(jobs: Sequence[Tuple[str, Sequence[str]]], parallel: Optional[bool] = None) -> List[FilteredGraph]:
+    """
+    load_filtered over several (path, predicates) jobs, one process per file
+    when the files are big enough to be worth it.
+    """
+    if parallel is None:
+        parallel = len(jobs) > 1 and sum(os.path.getsize(path) for path, _ in jobs) >= PARALLEL_MIN_BYTES
+    if not parallel:
+        return [load_filtered(path, predicates) for path, predicates in jobs]
+
+    with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+        futures = [pool.submit(load_filtered, path, list(predicates)) for path, predicates in jobs]
+        return [future.result() for future in futures]
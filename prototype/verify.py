@@ -1,13 +1,17 @@
-import json
+import bisect
 import jsonschema
 import os
 import sys
 from rdflib import Graph, Namespace, URIRef
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 
+from model import from_minutes
+from output import iter_groups, load_schedule
+
 # ---------------------------------------------------------
 # Typing
-from typing import TypedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple, TypedDict
 
 
 class RoomInfo(TypedDict):
@@ -35,44 +39,278 @@ EX = Namespace("http://example.org/")
 SCHEMA = Namespace("http://schema.org/")
 RDF = Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
 
-# Import data
-g = Graph()
-for filename in os.listdir(TTL_DIRECTORY):
-    if filename.endswith(".ttl"):
-        file_path = os.path.join(TTL_DIRECTORY, filename)
-        g.parse(file_path, format="ttl")
-print("Successfully loaded data!\n")
+# Data is parsed on first use, not at import, so the checks can be imported
+# (and run against the scheduler's own model) without an rdflib load.
+_graph: Optional[Graph] = None
 
-# ---------------------------------------------------------
-# Verification functions
 
+def load_data(directory: str = TTL_DIRECTORY) -> Graph:
+    """Parse every .ttl file in directory into one graph."""
+    graph = Graph()
+    for filename in os.listdir(directory):
+        if filename.endswith(".ttl"):
+            file_path = os.path.join(directory, filename)
+            graph.parse(file_path, format="ttl")
+    return graph
 
-def verify_room_capacity(output: OutputType, graph: Graph):
+
+def get_graph() -> Graph:
+    """The graph of TTL_DIRECTORY, parsed once on the first call."""
+    global _graph
+    if _graph is None:
+        _graph = load_data()
+        print("Successfully loaded data!\n")
+    return _graph
+
+
+def __getattr__(name: str):
+    # verify.g used to be loaded at import; keep it working, lazily
+    if name == "g":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ---------------------------------------------------------
+# Validation engine
+#
+# ValidationIndex holds everything the checks look up (room capacities and
+# availability, enrollments), built once from a graph or the scheduler's
+# model. validate_schedule() then runs every check in a single pass over the
+# schedule plus one sort per room and per student, and returns Violations
+# instead of printing and asserting.
+
+CHECK_NAMES = (
+    "room_capacity",
+    "student_exam_conflicts",
+    "all_students_have_all_finals",
+    "exam_room_fit",
+    "no_room_overlaps",
+    "no_duplicate_exam_assignments",
+    "all_student_exams_are_accounted_for",
+)
+
+
+@dataclass
+class Violation:
+    check: str
+    message: str
+    group_id: Optional[str] = None
+    class_iri: Optional[str] = None
+    room_iri: Optional[str] = None
+    student: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class ValidationIndex:
+    # room IRI -> capacity
+    capacity: Dict[str, int] = field(default_factory=dict)
+    # room IRI -> availability windows sorted by start
+    slots: Dict[str, List[Tuple[datetime, datetime]]] = field(default_factory=dict)
+    # student IRI -> enrolled class IRIs
+    enrolled: Dict[str, Set[str]] = field(default_factory=dict)
+    # sum of enrollments over every student of the term
+    expected_exams: int = 0
+    # per room: window starts, and the latest end among the windows up to each one
+    _starts: Dict[str, List[datetime]] = field(default_factory=dict, repr=False)
+    _reach: Dict[str, List[datetime]] = field(default_factory=dict, repr=False)
+
+    def _index_slots(self) -> "ValidationIndex":
+        for room_iri, windows in self.slots.items():
+            windows.sort()
+            reach = []
+            for _, end in windows:
+                reach.append(end if not reach or end > reach[-1] else reach[-1])
+            self._starts[room_iri] = [start for start, _ in windows]
+            self._reach[room_iri] = reach
+        return self
+
+    def room_fits(self, room_iri: str, start: datetime, end: datetime) -> bool:
+        """True when some availability window of the room holds [start, end)."""
+        i = bisect.bisect_right(self._starts.get(room_iri, ()), start)
+        return i > 0 and self._reach[room_iri][i - 1] >= end
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "ValidationIndex":
+        """Build the index with one triple scan per predicate."""
+        index = cls()
+        for room, _, cap in graph.triples((None, EX.roomCapacity, None)):
+            index.capacity.setdefault(str(room), int(cap))
+
+        starts = {node: value for node, _, value in graph.triples((None, EX.availableFrom, None))}
+        ends = {node: value for node, _, value in graph.triples((None, EX.availableUntil, None))}
+        for room, _, node in graph.triples((None, EX.hasAvailability, None)):
+            if node in starts and node in ends:
+                index.slots.setdefault(str(room), []).append(parse_time_slot(str(starts[node]), str(ends[node])))
+
+        for student, _, cls_iri in graph.triples((None, EX.enrolledIn, None)):
+            index.enrolled.setdefault(str(student), set()).add(str(cls_iri))
+        index.expected_exams = sum(
+            len(index.enrolled.get(str(student), ()))
+            for student in set(graph.subjects(predicate=RDF.type, object=EX.Person))
+        )
+        return index._index_slots()
+
+    @classmethod
+    def from_model(cls, model) -> "ValidationIndex":
+        """Build the index from the scheduler's TermModel, no parsing involved."""
+        index = cls()
+        for room in model.rooms:
+            index.capacity[str(room.uri)] = room.capacity
+            index.slots[str(room.uri)] = [
+                (from_minutes(a, model.utc_offset), from_minutes(b, model.utc_offset)) for a, b in room.blocks()
+            ]
+
+        enrollment = model.enrollment
+        for cls_iri in enrollment.classes:
+            for s in enrollment[cls_iri]:
+                index.enrolled.setdefault(enrollment.students[s], set()).add(cls_iri)
+        index.expected_exams = sum(len(classes) for classes in index.enrolled.values())
+        return index._index_slots()
+
+
+def validate_schedule(output: OutputType, index: ValidationIndex,
+                      checks: Optional[Iterable[str]] = None) -> List[Violation]:
     """
-    Check that no room has more students assigned than it can hold.
+    Run the checks named in checks (all by default) over the schedule in one pass.
 
     Arguments:
-        output (dict): The exam schedule.
-        graph (rdflib.Graph): The RDF graph containing room capacities.
+        output (dict): The exam schedule, or any mapping shaped like it.
+        index (ValidationIndex): Room and enrollment data to check against.
+        checks (iterable): Names from CHECK_NAMES.
     Returns:
-        bool: True if all groups fit in their rooms, False if any group exceeds the room capacity.
+        list[Violation]: Every problem found, empty for a valid schedule.
     """
-    all_ok = True
+    wanted = set(CHECK_NAMES if checks is None else checks)
+    unknown = wanted - set(CHECK_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown checks: {', '.join(sorted(unknown))}")
+    violations: List[Violation] = []
+
+    by_room: Dict[str, List[Tuple[datetime, datetime, str]]] = {}
+    by_student: Dict[str, List[Tuple[datetime, datetime, str, str]]] = {}
+    # student -> class IRI -> group ids
+    student_exams: Dict[str, Dict[str, List[str]]] = {}
+    students_in_exams = 0
 
+    # Pass 1: per group checks, collecting per room and per student assignments
     for group_id, group_info in output.items():
         room_iri = group_info["room"]["room_iri"]
-        assigned_students = group_info["students"]
+        class_iri = group_info["class_iri"]
+        students = group_info["students"]
+        start_dt, end_dt = parse_slot_time_slot(group_info["room"])
+        students_in_exams += len(students)
+
+        if "room_capacity" in wanted:
+            room_capacity = index.capacity.get(room_iri)
+            if room_capacity is None:
+                violations.append(Violation("room_capacity", f"ERROR: {group_id} uses unknown room {room_iri}",
+                                            group_id, class_iri, room_iri))
+            elif len(students) > room_capacity:
+                violations.append(Violation(
+                    "room_capacity",
+                    f"ERROR: {group_id} has {len(students)} students "
+                    f"but room capacity is {room_capacity} ({room_iri})",
+                    group_id, class_iri, room_iri))
+
+        if "exam_room_fit" in wanted:
+            if not index.room_fits(room_iri, start_dt, end_dt):
+                violations.append(Violation(
+                    "exam_room_fit",
+                    f"ERROR: Exam {class_iri} in group {group_id} "
+                    f"scheduled {start_dt} - {end_dt} does NOT fit in room {room_iri} availability",
+                    group_id, class_iri, room_iri))
+
+        if "no_room_overlaps" in wanted:
+            by_room.setdefault(room_iri, []).append((start_dt, end_dt, group_id))
+
+        for student in students:
+            if "student_exam_conflicts" in wanted:
+                by_student.setdefault(student, []).append((start_dt, end_dt, class_iri, group_id))
+            student_exams.setdefault(student, {}).setdefault(class_iri, []).append(group_id)
+
+    # Pass 2: overlaps, one sort per room and per student
+    if "no_room_overlaps" in wanted:
+        for room_iri, exams in by_room.items():
+            exams.sort()
+            latest = exams[0]
+            for exam in exams[1:]:
+                if latest[1] > exam[0]:
+                    violations.append(Violation(
+                        "no_room_overlaps",
+                        f"ROOM CONFLICT: Room {room_iri} has overlapping exams "
+                        f"{latest[2]} ({latest[0]} - {latest[1]}) and "
+                        f"{exam[2]} ({exam[0]} - {exam[1]})",
+                        exam[2], None, room_iri))
+                if exam[1] > latest[1]:
+                    latest = exam
+
+    if "student_exam_conflicts" in wanted:
+        for student, assignments in by_student.items():
+            assignments.sort()
+            latest = assignments[0]
+            for current in assignments[1:]:
+                if latest[1] > current[0]:
+                    violations.append(Violation(
+                        "student_exam_conflicts",
+                        f"CONFLICT: {student} has overlapping exams "
+                        f"{latest[2]} (group {latest[3]}) and "
+                        f"{current[2]} (group {current[3]})",
+                        current[3], current[2], None, student))
+                if current[1] > latest[1]:
+                    latest = current
+
+    # Pass 3: per student enrollment checks
+    for student, classes in student_exams.items():
+        if "no_duplicate_exam_assignments" in wanted:
+            for class_iri, groups in classes.items():
+                if len(groups) > 1:
+                    violations.append(Violation(
+                        "no_duplicate_exam_assignments",
+                        f"DUPLICATE EXAM: {student} assigned to multiple groups for class {class_iri}: {groups}",
+                        groups[1], class_iri, None, student))
+
+        if "all_students_have_all_finals" in wanted:
+            missing_classes = index.enrolled.get(student, set()) - classes.keys()
+            if missing_classes:
+                violations.append(Violation(
+                    "all_students_have_all_finals",
+                    f"ERROR: {student} missing finals for:" + "".join(f"\n  - {cls}" for cls in sorted(missing_classes)),
+                    None, None, None, student))
+
+    if "all_student_exams_are_accounted_for" in wanted and students_in_exams != index.expected_exams:
+        violations.append(Violation(
+            "all_student_exams_are_accounted_for",
+            f"ERROR: {students_in_exams} student exams scheduled but {index.expected_exams} enrolled"))
+
+    return violations
 
-        # Get room capacity from RDF graph
-        room_capacity = int(
-            next(graph.objects(URIRef(room_iri), EX.roomCapacity)))
 
-        if len(assigned_students) > room_capacity:
-            print(f"ERROR: {group_id} has {len(assigned_students)} students "
-                  f"but room capacity is {room_capacity} ({room_iri})")
-            all_ok = False
+# ---------------------------------------------------------
+# Verification functions
+#
+# One check each, kept for callers of the old API: they print what the engine
+# finds and assert there was nothing.
 
-    assert all_ok
+
+def _verify(output: OutputType, graph: Optional[Graph], check: str) -> None:
+    index = ValidationIndex.from_graph(graph) if graph is not None else ValidationIndex()
+    violations = validate_schedule(output, index, [check])
+    for violation in violations:
+        print(violation.message)
+    assert not violations
+
+
+def verify_room_capacity(output: OutputType, graph: Graph):
+    """
+    Check that no room has more students assigned than it can hold.
+
+    Arguments:
+        output (dict): The exam schedule.
+        graph (rdflib.Graph): The RDF graph containing room capacities.
+    """
+    _verify(output, graph, "room_capacity")
 
 
 def verify_student_exam_conflicts(output: OutputType):
@@ -81,38 +319,8 @@ def verify_student_exam_conflicts(output: OutputType):
 
     Arguments:
         output (dict): The exam schedule.
-    Returns:
-        bool: True if no student has overlapping exams, False if any conflicts are found.
     """
-    all_ok = True
-    student_assignments = {}
-
-    # Step 1: Collect all student assignments
-    for group_id, group_info in output.items():
-        start_dt, end_dt = parse_slot_time_slot(group_info["room"])
-        class_iri = group_info["class_iri"]
-        for student in group_info["students"]:
-            student_assignments.setdefault(student, []).append({
-                "class": class_iri,
-                "start": start_dt,
-                "end": end_dt,
-                "group_id": group_id
-            })
-
-    # Step 2: Check each student's assignments for overlaps
-    for student, assignments in student_assignments.items():
-        # Sort by start time for easier checking
-        assignments.sort(key=lambda x: x["start"])
-        for i in range(len(assignments) - 1):
-            current = assignments[i]
-            next_ = assignments[i + 1]
-            if current["end"] > next_["start"]:
-                print(f"CONFLICT: {student} has overlapping exams "
-                      f"{current['class']} (group {current['group_id']}) and "
-                      f"{next_['class']} (group {next_['group_id']})")
-                all_ok = False
-
-    assert all_ok
+    _verify(output, None, "student_exam_conflicts")
 
 
 def verify_all_students_have_all_finals(output: OutputType, graph: Graph):
@@ -123,36 +331,8 @@ def verify_all_students_have_all_finals(output: OutputType, graph: Graph):
     Arguments:
         output (dict): Scheduler output.
         graph (rdflib.Graph): RDF graph with enrollment data.
-    Returns:
-        bool: True if all students are correctly scheduled, False otherwise
     """
-    all_ok = True
-
-    # Step 1: Build map of scheduled classes per student
-    scheduled_classes: dict[str, set] = {}  # student -> set(classIRI)
-
-    for group in output.values():
-        class_iri = group["class_iri"]
-        for student in group["students"]:
-            scheduled_classes.setdefault(student, set()).add(class_iri)
-
-    # Step 2: Compare with enrolled classes from RDF
-    for student in scheduled_classes:
-        enrolled_classes = {
-            str(c) for c in graph.objects(URIRef(student), EX.enrolledIn)
-        }
-
-        assigned_classes = scheduled_classes.get(student, set())
-
-        missing_classes = enrolled_classes - assigned_classes
-
-        if len(missing_classes):
-            print(f"ERROR: {student} missing finals for:")
-            for cls in missing_classes:
-                print(f"  - {cls}")
-            all_ok = False
-
-    assert all_ok
+    _verify(output, graph, "all_students_have_all_finals")
 
 
 def verify_exam_room_fit(output: OutputType, graph: Graph):
@@ -162,37 +342,8 @@ def verify_exam_room_fit(output: OutputType, graph: Graph):
     Arguments:
         output (dict): The exam schedule.
         graph (rdflib.Graph): RDF graph containing rooms and their available times
-    Returns:
-        bool: True if all exams are scheduled within room availability, False otherwise.
     """
-    all_ok = True
-
-    for group_id, group_info in output.items():
-        room_iri = URIRef(group_info["room"]["room_iri"])
-
-        start_str = group_info["room"]["start"]
-        end_str = group_info["room"]["end"]
-        exam_start = datetime.fromisoformat(start_str)
-        exam_end = datetime.fromisoformat(end_str)
-
-        # Convert to datetime pairs
-        availability_windows = get_room_slots(graph, room_iri)
-
-        # Check if exam fits in any availability window
-        fits = False
-        for avail_start, avail_end in availability_windows:
-            if exam_start >= avail_start and exam_end <= avail_end:
-                fits = True
-                break
-
-        if not fits:
-            print(f"ERROR: Exam {group_info['class_iri']} in group {group_id} "
-                  f"scheduled {exam_start} - {exam_end} does NOT fit in room {room_iri} availability")
-            all_ok = False
-        else:
-            pass
-
-    assert all_ok
+    _verify(output, graph, "exam_room_fit")
 
 
 def verify_no_room_overlaps(output: OutputType):
@@ -201,40 +352,8 @@ def verify_no_room_overlaps(output: OutputType):
 
     Arguments:
         output (OutputType): Scheduler output.
-    Returns:
-        bool: True if no room overlaps are found, False otherwise
     """
-    all_ok = True
-    # Key is the room IRI and the value is the exam info (start, end, and ID of the exam)
-    exam_assignments: dict[str, list[tuple[str, str, str]]] = {}
-
-    # Step 1: Collect all exams per room
-    for group_id, group_info in output.items():
-        room_iri = group_info["room"]["room_iri"]
-        start_dt, end_dt = parse_slot_time_slot(group_info["room"])
-
-        exam_assignments.setdefault(room_iri, []).append(
-            (start_dt, end_dt, group_id)
-        )
-
-    # Step 2: Check overlaps per room
-    for room_iri, exams in exam_assignments.items():
-        # Sort by start time
-        exams.sort(key=lambda x: x[0])
-
-        for i in range(len(exams) - 1):
-            curr_start, curr_end, curr_group = exams[i]
-            next_start, next_end, next_group = exams[i + 1]
-
-            if curr_end > next_start:
-                print(
-                    f"ROOM CONFLICT: Room {room_iri} has overlapping exams "
-                    f"{curr_group} ({curr_start} - {curr_end}) and "
-                    f"{next_group} ({next_start} - {next_end})"
-                )
-                all_ok = False
-
-    assert all_ok
+    _verify(output, None, "no_room_overlaps")
 
 
 def verify_no_duplicate_exam_assignments(output: OutputType):
@@ -244,43 +363,8 @@ def verify_no_duplicate_exam_assignments(output: OutputType):
 
     Arguments:
         output (OutputType): Scheduler output
-    Returns:
-        bool: True if no duplicate assignments are found, False otherwise
     """
-    all_ok = True
-
-    # {
-    #   [student_iri]: { [class_iri]: list of group_ids[] }
-    # }
-    student_exam_map: dict[str, dict[str, list[str]]] = {}
-
-    for group_id, group_info in output.items():
-        class_iri = group_info["class_iri"]
-
-        for student in group_info["students"]:
-            student_exam_map.setdefault(student, {}).setdefault(
-                class_iri, []).append(group_id)
-
-    # Check for duplicates
-    for student, classes in student_exam_map.items():
-        seen = set()
-        duplicates = set()
-
-        for cls in classes:
-            if cls in seen:
-                duplicates.add(cls)
-            else:
-                seen.add(cls)
-        if len(duplicates):
-            print(
-                f"DUPLICATE EXAM: {student} was assigned to the following class exams multiple times: {duplicates}")
-        for class_iri, groups in classes.items():
-            if len(groups) > 1:
-                print(
-                    f"DUPLICATE EXAM: {student} assigned to multiple groups for class {class_iri}: {groups}")
-                all_ok = False
-
-    assert all_ok
+    _verify(output, None, "no_duplicate_exam_assignments")
 
 
 def verify_all_student_exams_are_accounted_for(output: OutputType, graph: Graph):
@@ -290,22 +374,8 @@ def verify_all_student_exams_are_accounted_for(output: OutputType, graph: Graph)
     Arguments:
         output (dict): The exam schedule.
         graph (rdflib.Graph): RDF graph containing students and their enrolled classes
-
-    Returns:
-        bool: True if every student appears in all of their classes' exams, False otherwise.
     """
-    students_in_exams = 0
-    expected_number_of_students_in_exams = 0
-    for group_info in output.values():
-        students_in_exams += len(group_info["students"])
-    students = get_students(graph)
-    for student in students:
-        expected_number_of_students_in_exams += len(
-            get_student_classes(graph, student))
-
-    all_ok = students_in_exams == expected_number_of_students_in_exams
-
-    assert all_ok
+    _verify(output, graph, "all_student_exams_are_accounted_for")
 
 
 # ---------------------------------------------------------
@@ -376,6 +446,50 @@ def get_exam_duration_hours(graph: Graph, class_iri: str):
         raise ValueError(
             f"Unsupported examDuration format: {duration_literal}")
 
+# ---------------------------------------------------------
+# Validator API
+
+
+class ScheduleValidator:
+    """
+    Validates schedules held in memory against one ValidationIndex.
+
+    Built from the scheduler's TermModel (no parsing at all), from an rdflib
+    graph, or from neither, in which case the TTL files in TTL_DIRECTORY are
+    parsed on the first validate() call. The index is built once and reused.
+    """
+
+    def __init__(self, graph: Optional[Graph] = None, model=None):
+        self.model = model
+        self._graph = graph
+        self._index: Optional[ValidationIndex] = None
+
+    @property
+    def index(self) -> ValidationIndex:
+        if self._index is None:
+            if self.model is not None:
+                self._index = ValidationIndex.from_model(self.model)
+            else:
+                self._index = ValidationIndex.from_graph(self._graph if self._graph is not None else get_graph())
+        return self._index
+
+    def validate(self, schedule, checks: Optional[Iterable[str]] = None) -> List[Violation]:
+        """
+        Check schedule and return its violations.
+
+        Arguments:
+            schedule: exam_schedule.json groups (a dict or CompactSchedule),
+                or schedule_greedy items when the validator has a model.
+            checks (iterable): Names from CHECK_NAMES, all by default.
+        Returns:
+            list[Violation]: Empty when the schedule is valid.
+        """
+        if isinstance(schedule, list):
+            if self.model is None:
+                raise TypeError("schedule items need a validator built from a model")
+            schedule = dict(iter_groups(schedule, self.model.enrollment))
+        return validate_schedule(schedule, self.index, checks)
+
 
 # ---------------------------------------------------------
 # Main
@@ -387,9 +501,8 @@ if "__main__" == __name__:
 
     # Get the filename from command-line arguments
     filename = sys.argv[1]
-    # Open the JSON file and load it into a Python dictionary
-    with open(filename, "r") as f:
-        schedule = json.load(f)
+    # Load the JSON file, or the compact NDJSON form written by main(compact=True)
+    schedule = load_schedule(filename)
 
     schema = {
         "type": "object",
@@ -418,14 +531,16 @@ if "__main__" == __name__:
 
     # Validate the input is correctly structure JSON
     try:
-        jsonschema.validate(instance=schedule, schema=schema)
-        verify_room_capacity(schedule, g)
-        verify_student_exam_conflicts(schedule)
-        verify_all_students_have_all_finals(schedule, g)
-        verify_exam_room_fit(schedule, g)
-        verify_no_room_overlaps(schedule)
-        verify_no_duplicate_exam_assignments(schedule)
-        verify_all_student_exams_are_accounted_for(schedule, g)
-        print("This is a valid schedule!")
+        if isinstance(schedule, dict):
+            # the compact reader builds its groups in this shape already
+            jsonschema.validate(instance=schedule, schema=schema)
+        violations = ScheduleValidator(get_graph()).validate(schedule)
     except jsonschema.ValidationError as e:
         print("Validation error:", e)
+        sys.exit(1)
+
+    for violation in violations:
+        print(violation.message)
+    if violations:
+        sys.exit(1)
+    print("This is a valid schedule!")
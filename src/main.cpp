@@ -437,7 +437,14 @@ int main() {
         const std::string rooms_path    = data_directory + "rooms.ttl";
         const std::string out_path      = "exam_schedule.json";
 
+        // Each phase prints "total time for <phase> <seconds> s", like scheduling
+        auto report = [](const char* phase, std::chrono::high_resolution_clock::time_point since) {
+            std::chrono::duration<double> dt = std::chrono::high_resolution_clock::now() - since;
+            std::cout << "total time for " << phase << " " << dt.count() << " s\n";
+        };
+
         // Multithreaded file parsing, small performance increase
+        auto t_parse = std::chrono::high_resolution_clock::now();
         Graph g1, g2, g3;
 
         auto fut_students = std::async(std::launch::async, [&] {
@@ -459,16 +466,21 @@ int main() {
         auto classes_triples  = fut_classes.get();
 
         auto rooms = fut_rooms.get(); 
+        report("parsing", t_parse);
 
         //auto enrollment_counts = get_enrollment_counts(students_triples);
         //auto students_by_class = build_students_by_class(students_triples);
 
+        auto t_courses = std::chrono::high_resolution_clock::now();
         auto courses = build_courses(classes_triples, student_derived.enrollment_counts);
+        report("courses", t_courses);
 
         auto schedule = schedule_greedy(courses, rooms, student_derived.students_by_class);
 
         // JSON output
+        auto t_write = std::chrono::high_resolution_clock::now();
         write_schedule_json(out_path, schedule, student_derived.students_by_class);
+        report("writing", t_write);
 
     }
     catch (const std::exception& e) {